@@ -1,4 +1,5 @@
 import pandas as pd
+from multi_hot import MultiHotEncoder
 
 # Example DataFrame with the 'action' column
 data = {
@@ -17,17 +18,11 @@ data = {
 
 df = pd.DataFrame(data)
 
-# Step 1: Extract all unique individual actions
-# Split nested actions and extract unique values
-all_actions = set(
-    action.strip()
-    for actions in df['action'].dropna().str.split('|').tolist()
-    for action in actions
-)
-
-# Step 2: Create columns for each action and one-hot encode
-for action in all_actions:
-    df[action] = df['action'].apply(lambda x: 1 if action in str(x).split('|') else 0)
+# Split the nested actions once and one-hot encode every individual action
+# into sparse 0/1 columns; reuse the fitted encoder to encode new data with
+# the same columns
+encoder = MultiHotEncoder(separator='|')
+df = df.join(encoder.fit(df['action']).transform_frame(df['action']))
 
 # Display the resulting DataFrame
 print(df)
@@ -0,0 +1,134 @@
+import sqlite3
+import hashlib
+import pandas as pd
+from date_normalizer import parse_dates
+
+
+def url_hash(url):
+    """Returns the key an article is deduplicated on."""
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+class ArticleStore:
+    """Append-only store of collected articles in a local SQLite file.
+
+    Articles are keyed by a hash of their URL, so the same article seen
+    on every run is stored once and each run only appends what is new.
+    The parsed publication time is indexed, which turns "the N most
+    recent articles across all runs" into an index scan instead of
+    loading and sorting every metadata dump.
+
+    Args:
+        path (str, optional): SQLite database path. ``":memory:"`` keeps
+            the store in process (default is
+            "rss_metadata/articles.sqlite").
+    """
+
+    def __init__(self, path="rss_metadata/articles.sqlite"):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            " url_hash TEXT PRIMARY KEY,"
+            " url TEXT NOT NULL,"
+            " title TEXT,"
+            " published_date TEXT,"
+            " published_at INTEGER,"
+            " feed_url TEXT,"
+            " first_seen TEXT)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS articles_published_at "
+            "ON articles (published_at)"
+        )
+        self._conn.commit()
+
+    def __len__(self):
+        query = "SELECT COUNT(*) FROM articles"
+        return self._conn.execute(query).fetchone()[0]
+
+    def add(self, articles, feed_url=None, first_seen=None):
+        """Appends the articles not stored yet.
+
+        Known URLs are looked up first, so only new articles have their
+        dates parsed and are written.
+
+        Args:
+            articles (list[dict]): Articles with 'title', 'url' and
+                'published_date' keys, as collected by ``process_feeds``.
+            feed_url (str, optional): Feed the articles came from.
+            first_seen (str, optional): Timestamp of the collection run.
+
+        Returns:
+            list[dict]: The articles that were new, in input order.
+        """
+        candidates = {}
+        for article in articles:
+            url = article.get("url")
+            if url and url != "No URL":
+                candidates.setdefault(url_hash(url), article)
+        if not candidates:
+            return []
+
+        keys = list(candidates)
+        known = set()
+        # Stay below SQLite's default limit on bound parameters.
+        for start in range(0, len(keys), 900):
+            batch = keys[start:start + 900]
+            known.update(row[0] for row in self._conn.execute(
+                "SELECT url_hash FROM articles WHERE url_hash IN "
+                f"({','.join('?' * len(batch))})", batch
+            ))
+
+        new_keys = [key for key in keys if key not in known]
+        new_articles = [candidates[key] for key in new_keys]
+        published_dates = [
+            article.get("published_date") for article in new_articles
+        ]
+        published = parse_dates(published_dates, feed_url)
+        published_at = [
+            None if pd.isna(timestamp) else int(timestamp.timestamp())
+            for timestamp in published
+        ]
+        rows = [
+            (key, article["url"], article.get("title"), published_date,
+             timestamp, feed_url, first_seen)
+            for key, article, published_date, timestamp in zip(
+                new_keys, new_articles, published_dates, published_at
+            )
+        ]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO articles VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return new_articles
+
+    def recent(self, top_n=100):
+        """Returns the most recently published articles across all runs.
+
+        Articles whose date could not be parsed are left out.
+
+        Args:
+            top_n (int, optional): Number of articles (default is 100).
+
+        Returns:
+            pandas.DataFrame: 'title', 'url' and 'published_date' (UTC,
+            timezone-aware) of the newest articles, newest first.
+        """
+        frame = pd.read_sql_query(
+            "SELECT title, url, published_at FROM articles "
+            "WHERE published_at IS NOT NULL "
+            "ORDER BY published_at DESC LIMIT ?",
+            self._conn, params=(top_n,)
+        )
+        frame["published_date"] = pd.to_datetime(
+            frame.pop("published_at"), unit="s", utc=True
+        )
+        return frame
+
+    def close(self):
+        """Closes the underlying SQLite connection."""
+        self._conn.close()
@@ -0,0 +1,32 @@
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(path):
+    """Writes a file through a temporary file renamed over it when done.
+
+    The block writes to the yielded temporary path next to ``path``. Only
+    when the block completes is it renamed over ``path`` with
+    ``os.replace``, which is atomic, so a crash mid-write never leaves a
+    truncated file behind or corrupts the previous version. If the block
+    raises, the temporary file is removed and the error propagates.
+
+    Example:
+        with atomic_write(path) as tmp_path, open(tmp_path, "w") as f:
+            json.dump(state, f)
+
+    Args:
+        path (str): The file to write.
+
+    Yields:
+        str: The temporary path to write to.
+    """
+    tmp_path = f"{path}.tmp"
+    try:
+        yield tmp_path
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
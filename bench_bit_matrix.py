@@ -0,0 +1,56 @@
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from bit_matrix import BitMatrix, binary_column_names
+
+
+def build_features(n_rows, n_columns, seed=0):
+    """Builds int64 0/1 OHE-style columns with skewed supports."""
+    rng = np.random.default_rng(seed)
+    supports = rng.uniform(0.001, 0.4, n_columns)
+    values = (rng.random((n_rows, n_columns)) < supports).astype(np.int64)
+    return pd.DataFrame(values, columns=[f"tag_{i}" for i in range(n_columns)])
+
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    print(f"{label:>34}: {time.perf_counter() - start:8.3f} s")
+    return result
+
+
+def run_benchmark(n_rows, n_columns):
+    df = build_features(n_rows, n_columns)
+    print(f"{n_rows} rows x {n_columns} binary columns")
+
+    timed(
+        "screen: apply(isin)",
+        lambda: df.columns[df.apply(lambda col: col.isin([0, 1]).all())],
+    )
+    timed("screen: binary_column_names", binary_column_names, df)
+
+    bits = timed("pack: BitMatrix.from_frame", BitMatrix.from_frame, df)
+    print(
+        f"{'memory':>34}: int64 frame {df.memory_usage().sum() / 2 ** 20:.1f} MiB, "
+        f"packed {bits.nbytes / 2 ** 20:.1f} MiB"
+    )
+
+    timed("support: DataFrame.mean", df.mean)
+    timed("support: popcount", bits.support)
+    dense = timed("co-occurrence: int64 df.T @ df", lambda: df.T @ df)
+    packed = timed("co-occurrence: popcount", bits.co_occurrence)
+    assert (dense.to_numpy() == packed.to_numpy()).all()
+    timed("duplicates: corr == 1.0", lambda: (df.corr() == 1.0).to_numpy())
+    timed("duplicates: packed words", bits.duplicate_columns)
+    timed("to_bool_frame (for mlxtend)", bits.to_bool_frame)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark int64 frames vs bit-packed binary feature matrices."
+    )
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--columns", type=int, default=300)
+    args = parser.parse_args()
+    run_benchmark(args.rows, args.columns)
@@ -0,0 +1,118 @@
+import os
+import time
+import tempfile
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from feed_fetcher import CurlFeedFetcher
+from feed_state import FeedState
+
+FEED_ETAG = '"feed-v1"'
+FEED_BODY = (
+    "<?xml version=\"1.0\"?><rss version=\"2.0\"><channel><title>stub"
+    "</title>" + "<item><title>article</title><link>https://example.com/a"
+    "</link></item>" * 50 + "</channel></rss>"
+).encode()
+
+
+def start_stub_server(delay):
+    """Starts a local feed server that answers every GET after ``delay``s.
+
+    Responses carry an ETag; a matching If-None-Match gets a 304.
+
+    Returns:
+        tuple: The server and its base URL.
+    """
+
+    class StubFeedHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            if self.headers.get("If-None-Match") == FEED_ETAG:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", FEED_ETAG)
+            self.send_header("Content-Type", "application/rss+xml")
+            self.send_header("Content-Length", str(len(FEED_BODY)))
+            self.end_headers()
+            self.wfile.write(FEED_BODY)
+
+        def log_message(self, *args):
+            pass
+
+    class StubFeedServer(ThreadingHTTPServer):
+        # The default backlog of 5 makes concurrent connects retry.
+        request_queue_size = 128
+
+    server = StubFeedServer(("127.0.0.1", 0), StubFeedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def run_benchmark(n_feeds, delay, max_workers):
+    """Times per-feed curl, pooled curl and a conditional rerun (feeds/sec)."""
+    server, base_url = start_stub_server(delay)
+    feed_urls = [f"{base_url}/feed/{i}" for i in range(n_feeds)]
+    try:
+        # The previous process_feeds ran one curl process per feed.
+        start = time.perf_counter()
+        for feed_url in feed_urls:
+            list(CurlFeedFetcher(max_workers=1).fetch([feed_url]))
+        sequential = time.perf_counter() - start
+
+        fetcher = CurlFeedFetcher(max_workers=max_workers)
+        start = time.perf_counter()
+        feed_state = FeedState(os.path.join(tempfile.mkdtemp(), "state.json"))
+        fetched = downloaded = 0
+        for result in fetcher.fetch(feed_urls):
+            if result.content:
+                fetched += 1
+                downloaded += len(result.content)
+                feed_state.update(
+                    result.url, result.etag, result.last_modified,
+                    result.content
+                )
+        concurrent = time.perf_counter() - start
+
+        # A rerun with nothing changed: every feed answers 304.
+        start = time.perf_counter()
+        rerun = CurlFeedFetcher(max_workers=max_workers)
+        rerun_downloaded = sum(
+            len(result.content or "")
+            for result in rerun.fetch(
+                feed_urls, feed_state.validators(feed_urls)
+            )
+        )
+        conditional = time.perf_counter() - start
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(f"{n_feeds} feeds, {delay * 1000:.0f} ms server delay")
+    for label, seconds in (
+        ("sequential, curl per feed", sequential),
+        (f"pooled curl, {max_workers} workers", concurrent),
+        ("conditional rerun", conditional),
+    ):
+        print(f"{label:>28}: {n_feeds / seconds:10.1f} feeds/sec")
+    latency = fetcher.stats()["latency"]
+    print(
+        f"{'pooled latency':>28}: p50 {latency['p50']:.3f}s "
+        f"p95 {latency['p95']:.3f}s ({fetched}/{n_feeds} fetched)"
+    )
+    print(
+        f"{'body bytes':>28}: {downloaded} first run, {rerun_downloaded} "
+        f"conditional rerun ({rerun.stats()['not_modified']} not modified)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark sequential vs concurrent RSS feed fetching."
+    )
+    parser.add_argument("--feeds", type=int, default=100)
+    parser.add_argument("--delay", type=float, default=0.2)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+    run_benchmark(args.feeds, args.delay, args.workers)
@@ -0,0 +1,70 @@
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from multi_hot import MultiHotEncoder
+
+ACTIONS = (
+    "Incorrect password", "Login with creds", "Failed token refresh",
+    "Biometric login", "OTP prompt", "OTP initiated", "Login with OTP",
+    "OTP initiated without prompt",
+)
+
+
+def build_actions(n_rows, seed=0):
+    """Builds an ``action`` column of one to three pipe-joined actions."""
+    rng = np.random.default_rng(seed)
+    n_actions = rng.integers(1, 4, n_rows)
+    picks = rng.integers(0, len(ACTIONS), (n_rows, 3))
+    return pd.Series([
+        "|".join(ACTIONS[code] for code in row[:count])
+        for row, count in zip(picks, n_actions)
+    ])
+
+
+def per_action_loop(actions):
+    """The action.py approach: one apply over the column per action."""
+    df = pd.DataFrame({"action": actions})
+    all_actions = set(
+        action.strip()
+        for split in df["action"].dropna().str.split("|").tolist()
+        for action in split
+    )
+    for action in all_actions:
+        df[action] = df["action"].apply(
+            lambda x: 1 if action in str(x).split("|") else 0
+        )
+    return df
+
+
+def run_benchmark(n_rows):
+    actions = build_actions(n_rows)
+    print(f"{n_rows} rows, {len(ACTIONS)} distinct actions")
+
+    start = time.perf_counter()
+    dense = per_action_loop(actions)
+    seconds = time.perf_counter() - start
+    dense_mib = dense.drop(columns="action").memory_usage().sum() / 2 ** 20
+    print(
+        f"{'apply per action':>18}: {n_rows / seconds:12.1f} rows/sec, "
+        f"{dense_mib:8.1f} MiB"
+    )
+
+    start = time.perf_counter()
+    encoded = MultiHotEncoder().fit(actions).transform_frame(actions)
+    seconds = time.perf_counter() - start
+    sparse_mib = encoded.memory_usage().sum() / 2 ** 20
+    print(
+        f"{'MultiHotEncoder':>18}: {n_rows / seconds:12.1f} rows/sec, "
+        f"{sparse_mib:8.1f} MiB"
+    )
+    assert (dense[encoded.columns].to_numpy() == encoded.sparse.to_dense()).all(axis=None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark per-action apply vs single-pass multi-hot encoding."
+    )
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    args = parser.parse_args()
+    run_benchmark(args.rows)
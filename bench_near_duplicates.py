@@ -0,0 +1,87 @@
+import time
+import random
+import argparse
+import numpy as np
+from near_duplicate_index import NearDuplicateIndex, shingle_hashes
+
+
+def build_corpus(n_documents, words_per_document=300, edit_rate=0.03,
+                 seed=0):
+    """Builds synthetic reports and one lightly edited copy of each.
+
+    Words are drawn from a Zipf-like vocabulary so unrelated reports
+    still share common words. A copy has ``edit_rate`` of its words
+    replaced and a repost banner added, like a report syndicated by
+    another feed.
+
+    Returns:
+        tuple: (documents, edited copies, unrelated documents).
+    """
+    rng = random.Random(seed)
+    vocabulary = [f"w{i}" for i in range(20_000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+
+    def document():
+        return rng.choices(vocabulary, weights=weights, k=words_per_document)
+
+    documents = [document() for _ in range(n_documents)]
+    copies = []
+    for words in documents:
+        words = list(words)
+        for i in rng.sample(range(len(words)), int(edit_rate * len(words))):
+            words[i] = rng.choice(vocabulary)
+        copies.append(["reposted", "from", "another", "feed"] + words)
+    unrelated = [document() for _ in range(n_documents)]
+    return (
+        [" ".join(words) for words in documents],
+        [" ".join(words) for words in copies],
+        [" ".join(words) for words in unrelated],
+    )
+
+
+def jaccard(first, second):
+    first, second = shingle_hashes(first), shingle_hashes(second)
+    return len(np.intersect1d(first, second)) / len(np.union1d(first, second))
+
+
+def run_benchmark(n_documents, threshold, edit_rate):
+    documents, copies, unrelated = build_corpus(n_documents, edit_rate=edit_rate)
+    index = NearDuplicateIndex(threshold=threshold)
+    print(
+        f"{n_documents} documents, threshold {threshold}, "
+        f"{index.bands} bands x {index.rows} rows"
+    )
+
+    start = time.perf_counter()
+    for i, text in enumerate(documents):
+        index.check(f"doc-{i}", text)
+    seconds = time.perf_counter() - start
+    print(f"{'index (check + add)':>22}: {n_documents / seconds:10.1f} docs/sec")
+
+    start = time.perf_counter()
+    found = [index.query(text) for text in copies]
+    seconds = time.perf_counter() - start
+    print(f"{'query':>22}: {n_documents / seconds:10.1f} docs/sec")
+
+    recall = np.mean([
+        bool(matches) and matches[0].key == f"doc-{i}"
+        for i, matches in enumerate(found)
+    ])
+    false_positives = np.mean([bool(index.query(text)) for text in unrelated])
+    similarities = [jaccard(a, b) for a, b in zip(documents[:200], copies)]
+    print(
+        f"{'recall':>22}: {recall:.3f} (mean true Jaccard of copies "
+        f"{np.mean(similarities):.3f})"
+    )
+    print(f"{'false positive rate':>22}: {false_positives:.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the MinHash/LSH near-duplicate index."
+    )
+    parser.add_argument("--documents", type=int, default=10_000)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--edit-rate", type=float, default=0.02)
+    args = parser.parse_args()
+    run_benchmark(args.documents, args.threshold, args.edit_rate)
@@ -0,0 +1,85 @@
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from date_normalizer import parse_dates
+from sampler3 import top_recent_articles
+
+DATE_STYLES = (
+    lambda moment: moment.strftime("%Y-%m-%dT%H:%M:%SZ"),
+    lambda moment: moment.strftime("%a, %d %b %Y %H:%M:%S +0000"),
+)
+
+
+def write_archive(directory, n_files, articles_per_file, seed=0):
+    """Writes ``n_files`` metadata dumps shaped like process_feeds output."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for run in range(n_files):
+        articles = [
+            {
+                "title": f"Article {run}-{i}",
+                "url": f"https://example.com/{run}/{i}",
+                "published_date": rng.choice(DATE_STYLES)(
+                    start + timedelta(minutes=rng.randint(0, 525_600))
+                ),
+            }
+            for i in range(articles_per_file)
+        ]
+        path = os.path.join(directory, f"run-{run:04d}.json")
+        with open(path, "w") as f:
+            json.dump({"timestamp": str(run), "articles": articles}, f)
+
+
+def full_sort(directory, top_n):
+    """The previous approach: load every file, parse and sort everything."""
+    articles = []
+    for name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, name)) as f:
+            articles.extend(json.load(f)["articles"])
+    published = parse_dates([article["published_date"] for article in articles])
+    return [articles[i] for i in published.sort_values(ascending=False).index[:top_n]]
+
+
+def measure(func, *args):
+    """Returns (seconds, peak traced MiB); tracing runs a second call."""
+    start = time.perf_counter()
+    func(*args)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def run_benchmark(n_files, articles_per_file, top_n):
+    """Times full load-and-sort against streaming heap selection."""
+    with tempfile.TemporaryDirectory() as directory:
+        write_archive(directory, n_files, articles_per_file)
+        n_articles = n_files * articles_per_file
+        print(f"{n_articles} articles in {n_files} files, top {top_n}")
+        for label, func in (
+            ("load all + sort", full_sort),
+            ("streaming heap", top_recent_articles),
+        ):
+            seconds, peak = measure(func, directory, top_n)
+            print(
+                f"{label:>16}: {n_articles / seconds:12.1f} articles/sec, "
+                f"peak {peak:8.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark full sort vs streaming top-N article selection."
+    )
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--articles", type=int, default=20_000)
+    parser.add_argument("--top", type=int, default=100)
+    args = parser.parse_args()
+    run_benchmark(args.files, args.articles, args.top)
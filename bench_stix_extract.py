@@ -0,0 +1,115 @@
+import os
+import re
+import json
+import time
+import random
+import argparse
+import tempfile
+import uuid
+from stix_extractor import extract_indicators_from_stix
+
+OBJECT_TYPES = ("indicator", "malware", "intrusion-set", "report", "attack-pattern")
+
+
+def random_hex(rng, length):
+    return "".join(rng.choice("0123456789abcdef") for _ in range(length))
+
+
+def build_object(rng):
+    """Builds one STIX object whose text mentions a few indicators."""
+    domain = f"{random_hex(rng, 8)}.example.{rng.choice(['com', 'net', 'ru'])}"
+    ip = ".".join(str(rng.randint(1, 254)) for _ in range(4))
+    description = (
+        f"Campaign staged payloads on http://{domain}/{random_hex(rng, 6)}.php "
+        f"and contacted {ip}. Dropper sample {random_hex(rng, 64)} exploits "
+        f"CVE-20{rng.randint(10, 24)}-{rng.randint(1000, 49999)}. "
+        + "The actor reuses infrastructure across operations. " * rng.randint(1, 8)
+    )
+    stix_type = rng.choice(OBJECT_TYPES)
+    obj = {
+        "type": stix_type,
+        "spec_version": "2.1",
+        "id": f"{stix_type}--{uuid.UUID(int=rng.getrandbits(128))}",
+        "created": "2024-12-01T00:00:00.000Z",
+        "modified": "2024-12-01T00:00:00.000Z",
+        "name": f"Object {random_hex(rng, 4)}",
+        "description": description,
+        "external_references": [{"source_name": "vendor", "url": f"https://{domain}/report"}],
+    }
+    if stix_type == "indicator":
+        obj["pattern"] = f"[file:hashes.'MD5' = '{random_hex(rng, 32)}']"
+    return obj
+
+
+def write_bundles(directory, n_bundles, objects_per_bundle, seed=0):
+    rng = random.Random(seed)
+    for i in range(n_bundles):
+        bundle = {
+            "type": "bundle",
+            "id": f"bundle--{uuid.UUID(int=rng.getrandbits(128))}",
+            "objects": [build_object(rng) for _ in range(objects_per_bundle)],
+        }
+        with open(os.path.join(directory, f"bundle-{i:04d}.json"), "w") as f:
+            json.dump(bundle, f)
+
+
+# One regex per indicator type, as a per-type extractor would run them.
+PER_TYPE_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r"https?://[^\s'\"<>]+",
+        r"\bCVE-\d{4}-\d{4,7}\b",
+        r"\b(?:\d{1,3}\.){3}\d{1,3}\b",
+        r"\b[a-f0-9]{64}\b",
+        r"\b[a-f0-9]{40}\b",
+        r"\b[a-f0-9]{32}\b",
+        r"\b(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,63}\b",
+    )
+]
+
+
+def per_pattern_scan(directory):
+    """One json.load per bundle and one regex per indicator type and field."""
+    found = {}
+    for name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, name)) as f:
+            bundle = json.loads(f.read())
+        for obj in bundle.get("objects", []):
+            texts = [obj.get("name"), obj.get("description"), obj.get("pattern")]
+            texts += [ref.get("url") for ref in obj.get("external_references", [])]
+            for text in texts:
+                if not text:
+                    continue
+                for pattern in PER_TYPE_PATTERNS:
+                    for value in pattern.findall(text):
+                        found.setdefault(obj["id"], set()).add(value)
+    return found
+
+
+def run_benchmark(n_bundles, objects_per_bundle):
+    with tempfile.TemporaryDirectory() as directory:
+        write_bundles(directory, n_bundles, objects_per_bundle)
+        n_objects = n_bundles * objects_per_bundle
+        print(f"{n_objects} objects in {n_bundles} bundles")
+
+        start = time.perf_counter()
+        per_pattern_scan(directory)
+        seconds = time.perf_counter() - start
+        print(f"{'regex per type/field':>22}: {n_objects / seconds:10.1f} objects/sec")
+
+        start = time.perf_counter()
+        table = extract_indicators_from_stix(directory)
+        seconds = time.perf_counter() - start
+        print(
+            f"{'combined, streamed':>22}: {n_objects / seconds:10.1f} objects/sec "
+            f"({len(table)} indicators)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark per-pattern vs combined STIX indicator extraction."
+    )
+    parser.add_argument("--bundles", type=int, default=20)
+    parser.add_argument("--objects", type=int, default=2_000)
+    args = parser.parse_args()
+    run_benchmark(args.bundles, args.objects)
@@ -0,0 +1,88 @@
+import os
+import time
+import argparse
+import resource
+import tempfile
+import multiprocessing
+import pandas as pd
+from bench_tag_encoding import build_extract
+from tag_chunks import encode_tag_file, fit_tag_vocabulary
+from tag_parser import TagEncoder
+
+
+def write_export(path, n_rows):
+    df = build_extract(n_rows)
+    df.insert(0, "event_id", [f"event-{i}" for i in range(n_rows)])
+    df.to_csv(path, index=False)
+
+
+def imports_only(_source, destination, _chunk_size):
+    """Baseline: the interpreter with pandas, pyarrow and scipy loaded."""
+    with open(destination, "wb"):
+        pass
+
+
+def in_memory(source, destination, _chunk_size):
+    """The previous approach: load the export, encode it whole, write it."""
+    df = pd.read_csv(source, dtype=str)
+    encoder = TagEncoder(min_frequency=10, other_bucket="other")
+    encoded = encoder.fit(df).transform_frame(df)
+    df[["event_id"]].join(encoded.sparse.to_dense()).to_parquet(destination)
+
+
+def chunked(source, destination, chunk_size):
+    encoder = fit_tag_vocabulary(
+        source, chunk_size=chunk_size, min_frequency=10, other_bucket="other"
+    )
+    encode_tag_file(
+        source, destination, encoder, chunk_size=chunk_size,
+        keep_columns=("event_id",)
+    )
+
+
+def _run(func, args, results):
+    start = time.perf_counter()
+    func(*args)
+    seconds = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    results.put((seconds, peak))
+
+
+def measure(func, *args):
+    """Runs ``func`` in a fresh process; returns (seconds, peak RSS MiB)."""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_run, args=(func, args, results))
+    process.start()
+    outcome = results.get()
+    process.join()
+    return outcome
+
+
+def run_benchmark(n_rows, chunk_size):
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "export.csv")
+        measure(write_export, source, n_rows)
+        size = os.path.getsize(source) / 2 ** 20
+        print(f"{n_rows} rows, {size:.0f} MiB CSV, chunks of {chunk_size}")
+        for label, func in (
+            ("imports only", imports_only),
+            ("load all + encode", in_memory),
+            ("chunked", chunked),
+        ):
+            destination = os.path.join(directory, f"{func.__name__}.parquet")
+            seconds, peak = measure(func, source, destination, chunk_size)
+            print(
+                f"{label:>18}: {seconds:8.2f} s, peak RSS {peak:8.1f} MiB, "
+                f"output {os.path.getsize(destination) / 2 ** 20:6.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark in-memory vs chunked tag encoding of a CSV export."
+    )
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    args = parser.parse_args()
+    run_benchmark(args.rows, args.chunk_size)
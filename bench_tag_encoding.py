@@ -0,0 +1,109 @@
+import os
+import ast
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from tag_parser import TagEncoder, parse_tags
+
+REASONS = [f"reason_{i}" for i in range(40)]
+PHONE_TAGS = [f"phone_tag_{i}" for i in range(15)]
+DEVICE_TAGS = [f"device_{i}" for i in range(10)]
+
+
+def build_extract(n_rows, seed=0):
+    """Builds a ThreatMetrix-like extract with the three tag columns.
+
+    Reasons hold comma-separated dictionaries, telephone tags bare
+    ``{tag1, tag2}`` sets and device health a single ``{tag}``; about a
+    tenth of the cells are missing.
+    """
+    rng = np.random.default_rng(seed)
+
+    def cells(render, tags, most):
+        values = []
+        for count in rng.integers(1, most + 1, n_rows):
+            picks = rng.choice(len(tags), count, replace=False)
+            values.append(render([tags[i] for i in sorted(picks)]))
+        values = pd.Series(values, dtype=object)
+        values[rng.random(n_rows) < 0.1] = None
+        return values
+
+    return pd.DataFrame({
+        "Reasons": cells(
+            lambda tags: ", ".join(f"{{'{tag}': 'true'}}" for tag in tags), REASONS, 3
+        ),
+        "Account Telephone Global Trust Tags": cells(
+            lambda tags: "{" + ", ".join(tags) + "}", PHONE_TAGS, 2
+        ),
+        "Device Health Reasons": cells(
+            lambda tags: "{" + tags[0] + "}", DEVICE_TAGS, 1
+        ),
+    })
+
+
+def per_row_parse(row):
+    """The previous per-row parse: a literal, else bare braced tags."""
+    if pd.isna(row):
+        return set()
+    try:
+        parsed = ast.literal_eval(row)
+        parsed = parsed if isinstance(parsed, (list, tuple)) else [parsed]
+        return {key for item in parsed if isinstance(item, dict) for key in item}
+    except (ValueError, SyntaxError):
+        return {tag.strip() for tag in row.replace("{", "").replace("}", "").split(",")}
+
+
+def per_tag_columns(df):
+    """The previous approach: parse every row, then one apply per tag."""
+    df = df.copy()
+    for column in list(df.columns):
+        parsed = df[column].apply(per_row_parse)
+        for tag in set().union(*parsed):
+            df[f"{column}_{tag}"] = parsed.apply(lambda x: 1 if tag in x else 0)
+    return df
+
+
+def run_benchmark(n_rows):
+    df = build_extract(n_rows)
+    print(f"{n_rows} rows, 3 tag columns")
+
+    start = time.perf_counter()
+    dense = per_tag_columns(df)
+    seconds = time.perf_counter() - start
+    print(f"{'parse + apply per tag':>22}: {seconds:8.2f} s")
+
+    parse_tags.cache_clear()
+    start = time.perf_counter()
+    encoder = TagEncoder(columns=df.columns)
+    encoded = encoder.fit(df).transform_frame(df)
+    seconds = time.perf_counter() - start
+    print(
+        f"{'TagEncoder':>22}: {seconds:8.2f} s "
+        f"({encoded.shape[1]} columns, {parse_tags.cache_info().currsize} "
+        f"distinct cells parsed)"
+    )
+    assert (
+        dense[encoded.columns].to_numpy() == encoded.sparse.to_dense().to_numpy()
+    ).all()
+
+    # Scoring: load the saved vocabulary instead of rediscovering the tags
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "vocabulary.json")
+        encoder.save(path)
+        parse_tags.cache_clear()
+        start = time.perf_counter()
+        scored = TagEncoder.load(path).transform_frame(df)
+        seconds = time.perf_counter() - start
+    print(f"{'load vocab + transform':>22}: {seconds:8.2f} s")
+    assert scored.columns.equals(encoded.columns)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark per-tag apply vs memoized sparse tag encoding."
+    )
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+    run_benchmark(args.rows)
@@ -0,0 +1,114 @@
+import json
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+import aiohttp
+import pandas as pd
+from aiohttp import web
+from tm_1 import ThreatMetrixDataExtraction
+from enrichment_cache import SQLiteEnrichmentCache
+
+logging.getLogger("tm_1").setLevel(logging.WARNING)
+
+
+def build_mock_app(connections):
+    """Builds a local stand-in for the VirusTotal and Censys APIs.
+
+    Args:
+        connections (set): Set that collects the client address of every
+            TCP connection the server sees.
+
+    Returns:
+        aiohttp.web.Application: The mock API application.
+    """
+    async def handle(request):
+        connections.add(request.transport.get_extra_info("peername"))
+        return web.json_response({"ip": request.match_info["ip"]})
+
+    app = web.Application()
+    app.router.add_get("/api/v3/ip_addresses/{ip}", handle)
+    app.router.add_get("/api/v2/hosts/{ip}", handle)
+    return app
+
+
+def build_events(n_events):
+    """Builds a DataFrame of ThreatMetrix event bodies with distinct IPs."""
+    bodies = [
+        json.dumps({
+            "event_id": i,
+            "ip_address": f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"
+        })
+        for i in range(n_events)
+    ]
+    return pd.DataFrame({"body": bodies})
+
+
+async def run_per_event_sessions(extractor, events):
+    """Reproduces the previous behaviour: one new session per event."""
+    async def analyze(body):
+        async with aiohttp.ClientSession() as session:
+            return await extractor.analyze_with_threat_metrix(body, session)
+
+    return await asyncio.gather(*(analyze(body) for body in events["body"]))
+
+
+async def run_benchmark(n_events, limit_per_host):
+    """Runs both strategies against the mock server and prints events/sec."""
+    connections = set()
+    runner = web.AppRunner(build_mock_app(connections), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    with tempfile.NamedTemporaryFile("w", suffix=".json") as config_file:
+        # Quotas are lifted so the benchmark measures connection handling 
+        # rather than the rate limiter.
+        json.dump({
+            "threat_metrix": {"api_key": "bench"},
+            "virustotal": {"api_key": "bench", "requests_per_second": 1e6},
+            "censys": {"api_id": "bench", "api_secret": "bench",
+                       "requests_per_second": 1e6}
+        }, config_file)
+        config_file.flush()
+        extractor = ThreatMetrixDataExtraction(
+            config_file.name, client=object(),
+            limit_per_host=limit_per_host,
+            cache=SQLiteEnrichmentCache(":memory:")
+        )
+
+    base_url = f"http://127.0.0.1:{port}"
+    extractor.VIRUSTOTAL_URL = base_url + "/api/v3/ip_addresses/{ip}"
+    extractor.CENSYS_URL = base_url + "/api/v2/hosts/{ip}"
+    events = build_events(n_events)
+
+    strategies = [
+        ("session per event", run_per_event_sessions),
+        ("pooled session",
+         lambda tm, df: tm.process_threat_metrix_data(df)),
+    ]
+    try:
+        for label, strategy in strategies:
+            connections.clear()
+            extractor.cache = SQLiteEnrichmentCache(":memory:")
+            start = time.perf_counter()
+            results = await strategy(extractor, events)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{label:>18}: {len(results) / elapsed:10.1f} events/sec "
+                f"({len(connections)} TCP connections)"
+            )
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark pooled vs per-event enrichment sessions."
+    )
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--limit-per-host", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.events, args.limit_per_host))
@@ -0,0 +1,121 @@
+import json
+import time
+import random
+import argparse
+import tempfile
+from ua1 import UserAgentAnalysis
+from ua_fast_path import UserAgentFastPath
+from enrichment_cache import SQLiteEnrichmentCache
+
+TEMPLATES = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/{major}.0.{build}.{patch} Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 "
+    "(KHTML, like Gecko) Version/{minor}.1 Safari/605.1.15",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_{minor} like Mac OS X) "
+    "AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.{minor} "
+    "Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (Linux; Android 14; SM-S91{minor}B) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/{major}.0.{build}.{patch} Mobile "
+    "Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:{major}.0) Gecko/20100101 "
+    "Firefox/{major}.0",
+    "python-requests/2.{minor}.{patch}",
+)
+
+
+def build_user_agents(n_events, n_distinct, seed=0):
+    """Builds ``n_events`` user agents drawn from ``n_distinct`` strings.
+
+    Popularity is skewed like real traffic: a few strings account for
+    most events.
+    """
+    rng = random.Random(seed)
+    distinct = [
+        rng.choice(TEMPLATES).format(
+            major=rng.randint(90, 130), minor=rng.randint(0, 9),
+            build=rng.randint(1000, 6999), patch=rng.randint(0, 199)
+        )
+        for _ in range(n_distinct)
+    ]
+    weights = [1 / (rank + 1) for rank in range(n_distinct)]
+    return rng.choices(distinct, weights=weights, k=n_events)
+
+
+def make_analyzer(**kwargs):
+    """Builds a UserAgentAnalysis that needs no credentials or network."""
+    config = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+    json.dump({"virustotal": {"api_key": "benchmark"}}, config)
+    config.close()
+    return UserAgentAnalysis(
+        config.name, client=object(), cache=SQLiteEnrichmentCache(":memory:"),
+        **kwargs
+    )
+
+
+def time_first_parses(analyzer, user_agent_strings):
+    """Returns UAs/sec for parsing strings the analyzer has never seen."""
+    start = time.perf_counter()
+    for ua in user_agent_strings:
+        analyzer.parse_user_agent(ua)
+    return len(user_agent_strings) / (time.perf_counter() - start)
+
+
+def run_benchmark(n_events, n_distinct):
+    """Times the per-row path against the batch path and prints UAs/sec."""
+    user_agent_strings = build_user_agents(n_events, n_distinct)
+    analyzer = make_analyzer(fast_path=None)
+
+    start = time.perf_counter()
+    # The previous process_user_agents parsed every row twice.
+    for _ in range(2):
+        [analyzer.parse_user_agent(ua) for ua in user_agent_strings]
+    per_row = time.perf_counter() - start
+
+    start = time.perf_counter()
+    analyzer.parse_user_agents(user_agent_strings)
+    batch_cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    analyzer.parse_user_agents(user_agent_strings)
+    batch_warm = time.perf_counter() - start
+
+    print(f"{n_events} user agents, {n_distinct} distinct")
+    for label, seconds in (
+        ("per-row (parsed twice)", per_row),
+        ("batch, cold memo", batch_cold),
+        ("batch, warm memo", batch_warm),
+    ):
+        print(f"{label:>24}: {n_events / seconds:12.1f} UAs/sec")
+
+    # First parses of new strings are what the memo cannot help with.
+    distinct = list(dict.fromkeys(user_agent_strings))
+    print(f"first parse of {len(distinct)} distinct strings")
+    for label, kwargs in (("full parser", {"fast_path": None}),
+                          ("fast path + fallback", {})):
+        analyzer = make_analyzer(**kwargs)
+        ua_per_sec = time_first_parses(analyzer, distinct)
+        hits = analyzer.metrics.counters.get(
+            ("user_agent_fast_path", (("result", "hit"),)), 0
+        )
+        print(
+            f"{label:>24}: {ua_per_sec:12.1f} UAs/sec "
+            f"({hits / len(distinct):.0%} fast-path hits)"
+        )
+    fast_path = UserAgentFastPath()
+    matches = [ua for ua in distinct if fast_path.match(ua)]
+    start = time.perf_counter()
+    for ua in matches:
+        fast_path.match(ua)
+    ua_per_sec = len(matches) / (time.perf_counter() - start)
+    print(f"{'fast path hits only':>24}: {ua_per_sec:12.1f} UAs/sec")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark per-row vs memoized batch user agent parsing."
+    )
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--distinct", type=int, default=500)
+    args = parser.parse_args()
+    run_benchmark(args.events, args.distinct)
@@ -0,0 +1,212 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+try:
+    _bitwise_count = np.bitwise_count
+except AttributeError:  # NumPy < 2.0; count set bits byte by byte instead.
+    _BYTE_COUNTS = np.array(
+        [bin(byte).count("1") for byte in range(256)], dtype=np.uint8
+    )
+
+    def _bitwise_count(words):
+        return _BYTE_COUNTS[words.view(np.uint8)].reshape(*words.shape, 8).sum(
+            axis=-1, dtype=np.uint8
+        )
+
+
+def binary_column_names(df):
+    """Names the columns holding only 0 and 1, checked in one pass.
+
+    Equivalent to ``df.apply(lambda col: col.isin([0, 1]).all())`` but
+    checks each block of same-typed columns at once: boolean columns are
+    binary, integer columns by their minimum and maximum, other numeric
+    columns (floats, nullable or sparse) by comparing values, and any
+    other column (e.g. object columns of Python ints) with ``isin``.
+    Missing values make a column non-binary.
+
+    Args:
+        df (pd.DataFrame): The frame to screen.
+
+    Returns:
+        pd.Index: The binary columns, in frame order.
+    """
+    if df.columns.empty:
+        return df.columns
+    binary = []
+    for dtype, names in df.columns.groupby(df.dtypes).items():
+        if dtype == bool:
+            binary.extend(names)
+            continue
+        if isinstance(dtype, np.dtype) and dtype.kind in "iu":
+            values = df[names].to_numpy()
+            is_binary = (values.min(axis=0) >= 0) & (values.max(axis=0) <= 1)
+        elif pd.api.types.is_numeric_dtype(dtype):
+            values = df[names].to_numpy(dtype=np.float64, na_value=np.nan)
+            is_binary = ((values == 0) | (values == 1)).all(axis=0)
+        else:
+            is_binary = df[names].isin([0, 1]).all().to_numpy()
+        binary.extend(names[is_binary])
+    return df.columns[df.columns.isin(binary)]
+
+
+class BitMatrix:
+    """Bit-packed 0/1 feature matrix, one row of uint64 words per column.
+
+    Bit ``r % 64`` of word ``r // 64`` of a column holds its value in row
+    ``r``, so a column of n rows takes n / 8 bytes instead of 8n as
+    int64. Supports and pairwise co-occurrences are popcounts over the
+    words (``np.bitwise_count``), and ``to_bool_frame`` unpacks to the
+    boolean frame mlxtend's ``apriori``/``fpgrowth`` expect.
+
+    Args:
+        words (numpy.ndarray): uint64 array of shape (columns, words).
+        n_rows (int): Number of rows represented.
+        columns (list[str]): Column names.
+    """
+
+    def __init__(self, words, n_rows, columns):
+        self.words = words
+        self.n_rows = n_rows
+        self.columns = pd.Index(columns)
+
+    @classmethod
+    def from_frame(cls, df, columns=None):
+        """Packs 0/1 columns of a frame.
+
+        Args:
+            df (pd.DataFrame): Frame holding 0/1 (or boolean) columns.
+            columns (list[str], optional): Columns to pack (default is
+                all of them).
+
+        Returns:
+            BitMatrix: The packed columns.
+
+        Raises:
+            ValueError: If a packed column holds anything but 0 and 1.
+        """
+        columns = df.columns if columns is None else pd.Index(columns)
+        non_binary = columns.difference(
+            binary_column_names(df[columns]), sort=False
+        )
+        if len(non_binary):
+            raise ValueError(
+                f"Columns must only hold 0 and 1; non-binary: {list(non_binary)}"
+            )
+        n_words = -(-len(df) // 64)
+        words = np.zeros((len(columns), n_words), dtype="<u8")
+        packed = words.view(np.uint8)
+        for column_index, column in enumerate(columns):
+            bits = np.packbits(
+                df[column].to_numpy(dtype=bool), bitorder="little"
+            )
+            packed[column_index, :len(bits)] = bits
+        return cls(words, len(df), columns)
+
+    @classmethod
+    def from_sparse(cls, matrix, columns):
+        """Packs a sparse 0/1 matrix, e.g. ``TagEncoder.transform`` output.
+
+        Args:
+            matrix (scipy.sparse matrix): Rows by columns; stored entries
+                count as 1.
+            columns (list[str]): Column names.
+
+        Returns:
+            BitMatrix: The packed columns.
+        """
+        coo = sparse.coo_matrix(matrix)
+        n_rows, n_columns = coo.shape
+        n_words = -(-n_rows // 64)
+        words = np.zeros(n_columns * n_words, dtype="<u8")
+        rows = coo.row.astype(np.uint64)
+        word_positions = (
+            coo.col.astype(np.int64) * n_words
+            + (rows >> np.uint64(6)).astype(np.int64)
+        )
+        np.bitwise_or.at(
+            words, word_positions, np.uint64(1) << (rows & np.uint64(63))
+        )
+        return cls(words.reshape(n_columns, n_words), n_rows, columns)
+
+    @property
+    def shape(self):
+        """tuple: (rows, columns), as for the unpacked frame."""
+        return (self.n_rows, len(self.columns))
+
+    @property
+    def nbytes(self):
+        """int: Bytes used by the packed words."""
+        return self.words.nbytes
+
+    def select(self, columns):
+        """Returns a BitMatrix of some columns, sharing no words."""
+        positions = self.columns.get_indexer(columns)
+        if (positions < 0).any():
+            unknown = pd.Index(columns)[positions < 0]
+            raise KeyError(f"Unknown columns: {list(unknown)}")
+        return BitMatrix(
+            self.words[positions], self.n_rows, self.columns[positions]
+        )
+
+    def counts(self):
+        """Returns how many rows are 1, per column.
+
+        Returns:
+            pd.Series: int64 counts indexed by column.
+        """
+        return pd.Series(
+            _bitwise_count(self.words).sum(axis=1, dtype=np.int64),
+            index=self.columns,
+        )
+
+    def support(self):
+        """Returns the fraction of rows that are 1, per column."""
+        return self.counts() / self.n_rows
+
+    def co_occurrence(self):
+        """Counts the rows where each pair of columns is 1 together.
+
+        Returns:
+            pd.DataFrame: Symmetric int64 counts; the diagonal holds
+            ``counts``.
+        """
+        n_columns = len(self.columns)
+        counts = np.zeros((n_columns, n_columns), dtype=np.int64)
+        for column in range(n_columns):
+            together = _bitwise_count(
+                self.words[column] & self.words[column:]
+            ).sum(axis=1, dtype=np.int64)
+            counts[column, column:] = together
+            counts[column:, column] = together
+        return pd.DataFrame(counts, index=self.columns, columns=self.columns)
+
+    def duplicate_columns(self):
+        """Names the columns identical to an earlier column.
+
+        For 0/1 data two columns are perfectly correlated exactly when
+        they are equal, so this replaces a full correlation matrix.
+
+        Returns:
+            pd.Index: Every column equal to one before it, in order.
+        """
+        _, first = np.unique(self.words, axis=0, return_index=True)
+        duplicate = np.ones(len(self.columns), dtype=bool)
+        duplicate[first] = False
+        return self.columns[duplicate]
+
+    def to_bool_frame(self, index=None):
+        """Unpacks to a frame of boolean columns, as mlxtend expects.
+
+        Args:
+            index (pd.Index, optional): Index of the frame (default is a
+                RangeIndex).
+
+        Returns:
+            pd.DataFrame: One bool column per column.
+        """
+        unpacked = np.unpackbits(
+            self.words.view(np.uint8), axis=1, count=self.n_rows,
+            bitorder="little",
+        ).view(bool)
+        return pd.DataFrame(unpacked.T, index=index, columns=self.columns)
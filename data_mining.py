@@ -1,45 +1,38 @@
-# Select only columns that are binary (contain only 1s and 0s)
-binary_columns = filtered_df.columns[
-    filtered_df.apply(lambda col: col.isin([0, 1]).all())
-]
+from bit_matrix import BitMatrix, binary_column_names
 
-# Create a new DataFrame with only binary columns
-binary_df = filtered_df[binary_columns]
+# Select only columns that are binary (contain only 1s and 0s), checked in a
+# single vectorized pass
+binary_columns = binary_column_names(filtered_df)
+
+# Pack the binary columns into bits (64 rows per uint64 word) and unpack
+# them as a boolean DataFrame for display
+binary_bits = BitMatrix.from_frame(filtered_df, binary_columns)
+binary_df = binary_bits.to_bool_frame(index=filtered_df.index)
 
 # Display the resulting DataFrame
 print(binary_df.head())
 
 
 # Import necessary libraries
-import pandas as pd
 from mlxtend.frequent_patterns import apriori, association_rules
 
-# Step 1: Check for perfectly correlated columns
-def drop_perfectly_correlated_columns(df):
-    """
-    Identifies and drops perfectly correlated columns from the DataFrame.
-    """
-    # Compute the correlation matrix
-    corr_matrix = df.corr()
-
-    # Find columns that are perfectly correlated (correlation = 1.0)
-    to_drop = set()
-    for i in range(len(corr_matrix.columns)):
-        for j in range(i):
-            if corr_matrix.iloc[i, j] == 1.0:  # Perfect correlation
-                to_drop.add(corr_matrix.columns[i])
-    return df.drop(columns=list(to_drop))
-
-# Apply the function to remove perfectly correlated features
-filtered_df = drop_perfectly_correlated_columns(filtered_df)
-
-# Step 2: Ensure data is binary (only 1s and 0s)
+# Step 1: Ensure data is binary (only 1s and 0s)
 # Check if the DataFrame contains only 1s and 0s
-binary_check = (filtered_df.isin([0, 1])).all().all()
+binary_check = len(binary_column_names(filtered_df)) == filtered_df.shape[1]
 if not binary_check:
     raise ValueError("The DataFrame contains non-binary values. Please binarize the data first.")
 
-# Step 3: Apply Association Rule Mining
+# Step 2: Drop perfectly correlated columns
+# For 0/1 columns perfect correlation means identical bits, so duplicates are
+# found on the packed words instead of a full correlation matrix
+bits = BitMatrix.from_frame(filtered_df)
+bits = bits.select(bits.columns.difference(bits.duplicate_columns(), sort=False))
+
+# Support of each item, counted with popcounts on the packed words
+print(bits.support().sort_values(ascending=False))
+
+# Step 3: Apply Association Rule Mining on the boolean frame mlxtend expects
+filtered_df = bits.to_bool_frame(index=filtered_df.index)
 frequent_itemsets = apriori(filtered_df, min_support=0.1, use_colnames=True)
 rules = association_rules(frequent_itemsets, metric="confidence", min_threshold=0.6)
 
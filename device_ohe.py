@@ -1,35 +1,29 @@
-# Define the column name
-column_name = 'Device Health Reasons'
-
-# Step 1: Preprocess the column to extract the single value from the dictionary format
-def preprocess_single_tag(row):
-    """
-    Extracts the single tag from the dictionary-like string.
-    Args:
-        row (str): The input row string.
-    Returns:
-        str: The extracted tag or None if invalid.
-    """
-    if pd.isna(row) or not isinstance(row, str):
-        return None  # Return None for NaN or non-string values
+import logging
+import argparse
+from tag_parser import add_vocabulary_arguments, tag_encoder_for
 
-    # Remove curly braces and strip whitespace
-    tag = row.replace('{', '').replace('}', '').strip()
-    return tag
+logging.basicConfig(level=logging.INFO)
 
-# Apply preprocessing to extract the single tag
-filtered_df['extracted_tag'] = filtered_df[column_name].apply(preprocess_single_tag)
+# Define the column name
+column_name = 'Device Health Reasons'
 
-# Step 2: One-hot encode the extracted tags
-unique_tags = filtered_df['extracted_tag'].dropna().unique()  # Get unique tags excluding NaN
+# Vocabulary file and settings, e.g. `%run -i device_ohe.py --fit --vocabulary
+# vocab.json` to train and `--vocabulary vocab.json` to score with the same
+# columns; by default every tag gets its own column
+args = add_vocabulary_arguments(argparse.ArgumentParser(
+    description="One-hot encode the Device Health Reasons tags of filtered_df."
+)).parse_args()
 
-for tag in unique_tags:
-    filtered_df[f"{column_name}_{tag}"] = filtered_df['extracted_tag'].apply(
-        lambda x: 1 if x == tag else 0
-    )
+# Step 1: Learn and save the vocabulary when training, load it when scoring
+tag_encoder = tag_encoder_for(
+    filtered_df, [column_name], args.vocabulary, fit=args.fit,
+    min_frequency=args.min_frequency, other_bucket=args.other_bucket
+)
 
-# Drop the intermediate extracted_tag column if no longer needed
-filtered_df = filtered_df.drop(columns=['extracted_tag'])
+# Step 2: Parse each distinct row once and one-hot encode every tag as a
+# sparse "<column>_<tag>" column in a single join; as before, the whole cell
+# without braces is one tag (parse_single_tag), so "{a, b}" stays "a, b"
+filtered_df = filtered_df.join(tag_encoder.transform_frame(filtered_df))
 
 # Display the resulting DataFrame
 print(filtered_df.head())
@@ -1,5 +1,6 @@
 import pandas as pd
-import ast
+from tag_parser import parse_tags
+from multi_hot import MultiHotEncoder
 
 # Sample DataFrame
 data = {
@@ -15,21 +16,12 @@ data = {
 }
 df = pd.DataFrame(data)
 
-# Step 1: Parse strings to actual Python sets, handling None gracefully
-def parse_to_set(value):
-    if isinstance(value, str):
-        # Convert string like '{"data1","data2"}' to Python set
-        return set(ast.literal_eval(value.replace("”", '"').replace("“", '"')))
-    return set()
+# Step 1: Parse each distinct string once into a set, handling None and
+# curly quotes gracefully
+encoder = MultiHotEncoder(parser=parse_tags).fit(df['col_with_dicts'])
 
-df['col_with_dicts'] = df['col_with_dicts'].apply(parse_to_set)
-
-# Step 2: Get all unique strings across the dictionaries
-unique_strings = set().union(*df['col_with_dicts'])
-
-# Step 3: Generate one-hot encoded columns
-for string in unique_strings:
-    df[string] = df['col_with_dicts'].apply(lambda x: 1 if string in x else 0)
+# Step 2: Generate one-hot encoded columns for every string in the sets
+df = df.join(encoder.transform_frame(df['col_with_dicts']))
 
 # Optional: Drop the original column if no longer needed
 # df = df.drop(columns=['col_with_dicts'])
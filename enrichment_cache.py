@@ -0,0 +1,312 @@
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+
+try:
+    import redis
+except ImportError:  # Redis support is optional.
+    redis = None
+
+
+class EnrichmentCache:
+    """Base class for persistent enrichment caches.
+
+    Values are JSON-serialisable API responses stored per provider, so a
+    VirusTotal result and a Censys result for the same IP never collide.
+    Empty results (e.g. a 404 for an unknown IP) are cached as negative
+    entries with their own, usually shorter, TTL.
+
+    Subclasses implement ``_get`` and ``_set``; this class adds TTL
+    selection and the hit/miss/latency counters exposed by ``stats``.
+
+    Args:
+        ttls (dict, optional): Maps a provider name to its TTL in seconds.
+        default_ttl (int or float, optional): TTL for providers missing
+            from ``ttls`` (default is one day).
+        negative_ttl (int or float, optional): TTL for empty results
+            (default is one hour).
+    """
+
+    def __init__(self, ttls=None, default_ttl=86400, negative_ttl=3600):
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.negative_ttl = negative_ttl
+        self.counters = {
+            "hits": 0, "negative_hits": 0, "misses": 0, "sets": 0,
+            "evictions": 0
+        }
+        self._latency_total = 0.0
+        self._latency_count = 0
+
+    def get(self, provider, key):
+        """Looks up a cached result.
+
+        Args:
+            provider (str): Provider the result came from.
+            key (str): Lookup key, e.g. an IP address.
+
+        Returns:
+            dict or None: The cached result (an empty dict for a negative
+            entry), or None on a miss.
+        """
+        start = time.perf_counter()
+        return self._count_lookup(self._get(provider, str(key)), start)
+
+    async def aget(self, provider, key):
+        """Looks up a cached result without blocking the event loop.
+
+        Same as ``get``, but the backend lookup (a SQLite query or a
+        Redis round trip) runs in a worker thread. Counters are updated
+        on the calling thread.
+        """
+        start = time.perf_counter()
+        value = await asyncio.to_thread(self._get, provider, str(key))
+        return self._count_lookup(value, start)
+
+    def _count_lookup(self, value, start):
+        self._latency_total += time.perf_counter() - start
+        self._latency_count += 1
+        if value is None:
+            self.counters["misses"] += 1
+        elif value:
+            self.counters["hits"] += 1
+        else:
+            self.counters["negative_hits"] += 1
+        return value
+
+    def set(self, provider, key, value):
+        """Stores a result, using the negative TTL when it is empty.
+
+        Args:
+            provider (str): Provider the result came from.
+            key (str): Lookup key, e.g. an IP address.
+            value (dict): The API result to store.
+        """
+        self._set(provider, str(key), value or {}, self._ttl(provider, value))
+        self.counters["sets"] += 1
+
+    async def aset(self, provider, key, value):
+        """Stores a result without blocking the event loop.
+
+        Same as ``set``, but the backend write runs in a worker thread.
+        """
+        await asyncio.to_thread(
+            self._set, provider, str(key), value or {}, self._ttl(provider, value)
+        )
+        self.counters["sets"] += 1
+
+    def _ttl(self, provider, value):
+        if not value:
+            return self.negative_ttl
+        return self.ttls.get(provider, self.default_ttl)
+
+    def stats(self):
+        """Returns the cache counters and the mean lookup latency.
+
+        Returns:
+            dict: Hit, negative hit, miss, set and eviction counts, the
+            hit rate and the mean ``get`` latency in milliseconds.
+        """
+        lookups = self._latency_count
+        hits = self.counters["hits"] + self.counters["negative_hits"]
+        return {
+            **self.counters,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "mean_get_latency_ms": (
+                1000 * self._latency_total / lookups if lookups else 0.0
+            )
+        }
+
+    def _get(self, provider, key):
+        raise NotImplementedError
+
+    def _set(self, provider, key, value, ttl):
+        raise NotImplementedError
+
+
+class SQLiteEnrichmentCache(EnrichmentCache):
+    """Enrichment cache stored in a local SQLite file.
+
+    Expired entries are dropped when they are read, and the table is
+    kept below ``max_entries`` by evicting the least recently used
+    entries whenever it grows past the bound.
+
+    Args:
+        path (str, optional): SQLite database path. ``":memory:"`` keeps
+            the cache in process (default is "enrichment_cache.sqlite").
+        max_entries (int, optional): Maximum number of cached results
+            (default is 1,000,000).
+        **kwargs: TTL settings passed to ``EnrichmentCache``.
+    """
+
+    def __init__(self, path="enrichment_cache.sqlite", max_entries=1_000_000,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS enrichment_cache ("
+            " provider TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (provider, key))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS enrichment_cache_accessed "
+            "ON enrichment_cache (accessed_at)"
+        )
+        self._conn.commit()
+        self._size = self._conn.execute(
+            "SELECT COUNT(*) FROM enrichment_cache"
+        ).fetchone()[0]
+
+    def _get(self, provider, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM enrichment_cache "
+                "WHERE provider = ? AND key = ?", (provider, key)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute(
+                    "DELETE FROM enrichment_cache "
+                    "WHERE provider = ? AND key = ?", (provider, key)
+                )
+                self._conn.commit()
+                self._size -= 1
+                return None
+            self._conn.execute(
+                "UPDATE enrichment_cache SET accessed_at = ? "
+                "WHERE provider = ? AND key = ?", (now, provider, key)
+            )
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def _set(self, provider, key, value, ttl):
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO enrichment_cache "
+                "VALUES (?, ?, ?, ?, ?)",
+                (provider, key, json.dumps(value), now + ttl, now)
+            )
+            if cursor.rowcount:
+                self._size += 1
+            else:
+                self._conn.execute(
+                    "UPDATE enrichment_cache "
+                    "SET value = ?, expires_at = ?, accessed_at = ? "
+                    "WHERE provider = ? AND key = ?",
+                    (json.dumps(value), now + ttl, now, provider, key)
+                )
+            if self._size > self.max_entries:
+                self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        # Drop expired rows first, then the least recently used ones,
+        # freeing 10% headroom so eviction does not run on every insert.
+        removed = self._conn.execute(
+            "DELETE FROM enrichment_cache WHERE expires_at <= ?", (now,)
+        ).rowcount
+        target = int(self.max_entries * 0.9)
+        excess = self._size - removed - target
+        if excess > 0:
+            removed += self._conn.execute(
+                "DELETE FROM enrichment_cache WHERE rowid IN ("
+                " SELECT rowid FROM enrichment_cache"
+                " ORDER BY accessed_at LIMIT ?)", (excess,)
+            ).rowcount
+        self._size -= removed
+        self.counters["evictions"] += removed
+
+    def close(self):
+        """Closes the underlying SQLite connection."""
+        self._conn.close()
+
+
+class RedisEnrichmentCache(EnrichmentCache):
+    """Enrichment cache stored in Redis (or any Redis-protocol server).
+
+    Expiry is delegated to Redis key TTLs and size bounds to the server's
+    ``maxmemory`` eviction policy.
+
+    Args:
+        client (redis.Redis, optional): Client to use. Any object with
+            redis-py style ``get`` and ``set(name, value, ex=...)``
+            methods works, which allows a local stand-in in tests.
+        url (str, optional): Redis URL used when ``client`` is omitted.
+        prefix (str, optional): Key namespace (default is "enrichment").
+        **kwargs: TTL settings passed to ``EnrichmentCache``.
+
+    Raises:
+        ImportError: If no client is given and redis-py is not installed.
+    """
+
+    def __init__(self, client=None, url="redis://localhost:6379/0",
+                 prefix="enrichment", **kwargs):
+        super().__init__(**kwargs)
+        if client is None:
+            if redis is None:
+                raise ImportError(
+                    "The redis package is required for RedisEnrichmentCache"
+                )
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, provider, key):
+        return f"{self.prefix}:{provider}:{key}"
+
+    def _get(self, provider, key):
+        value = self.client.get(self._key(provider, key))
+        return None if value is None else json.loads(value)
+
+    def _set(self, provider, key, value, ttl):
+        # Redis rejects a zero expiry and would round sub-second TTLs down
+        # to it, so expire in milliseconds and skip entries already stale.
+        if ttl <= 0:
+            return
+        self.client.set(
+            self._key(provider, key), json.dumps(value),
+            px=max(1, int(ttl * 1000))
+        )
+
+
+def cache_from_config(config):
+    """Builds the enrichment cache described by a configuration section.
+
+    Args:
+        config (dict): The "cache" section of config.json. Recognised
+            keys are "backend" ("sqlite" or "redis"), "path", "url",
+            "max_entries", "ttl" (per-provider TTLs), "default_ttl" and
+            "negative_ttl". Missing keys fall back to the defaults of the
+            cache classes.
+
+    Returns:
+        EnrichmentCache: The configured cache.
+    """
+    config = dict(config or {})
+    ttl_settings = {
+        name: config[name] for name in ("default_ttl", "negative_ttl")
+        if name in config
+    }
+    ttl_settings["ttls"] = config.get("ttl")
+    if config.get("backend", "sqlite") == "redis":
+        return RedisEnrichmentCache(
+            url=config.get("url", "redis://localhost:6379/0"), **ttl_settings
+        )
+    return SQLiteEnrichmentCache(
+        config.get("path", "enrichment_cache.sqlite"),
+        max_entries=config.get("max_entries", 1_000_000), **ttl_settings
+    )
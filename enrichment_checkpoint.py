@@ -0,0 +1,120 @@
+import os
+import glob
+import json
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from atomic_write import atomic_write
+
+# Parquet key-value metadata listing the columns stored as JSON text.
+_JSON_COLUMNS_KEY = b"cycad.json_columns"
+
+
+class EnrichmentCheckpoint:
+    """Local Parquet checkpoint of enriched events, keyed by event_id.
+
+    Each ``write`` adds one Parquet part to ``directory``, so progress is
+    kept as soon as a chunk is enriched and a failed run resumes from the
+    last completed chunk. Parts are written with ``atomic_write``. Nested
+    columns (dicts and lists, e.g. API responses) are stored as JSON
+    text and decoded again by ``load``.
+
+    Args:
+        directory (str): Directory holding the Parquet parts. Created if
+            it does not exist.
+        key (str, optional): Column identifying an event (default is
+            "event_id").
+    """
+
+    def __init__(self, directory, key="event_id"):
+        self.directory = directory
+        self.key = key
+        os.makedirs(directory, exist_ok=True)
+        self._parts = sorted(
+            glob.glob(os.path.join(directory, "part-*.parquet"))
+        )
+        self.completed_ids = set()
+        for path in self._parts:
+            ids = pq.read_table(path, columns=[key]).column(key).to_pylist()
+            self.completed_ids.update(ids)
+
+    def pending(self, events):
+        """Returns the events not yet present in the checkpoint.
+
+        Args:
+            events (pandas.DataFrame): Events with a ``key`` column.
+
+        Returns:
+            pandas.DataFrame: Rows of ``events`` whose key is missing or
+            not yet checkpointed.
+        """
+        if not self.completed_ids:
+            return events
+        done = events[self.key].isin(self.completed_ids).to_numpy(
+            dtype=bool, na_value=False
+        )
+        return events[~done]
+
+    def write(self, enriched):
+        """Stores a chunk of enriched events as a new Parquet part.
+
+        Rows without a key cannot be recognised on resume and are
+        skipped.
+
+        Args:
+            enriched (pandas.DataFrame): Enriched events to store.
+
+        Returns:
+            int: The number of rows written.
+        """
+        enriched = enriched[enriched[self.key].notna()]
+        if enriched.empty:
+            return 0
+        json_columns = [
+            column for column in enriched.columns
+            if enriched[column].dtype == object
+        ]
+        encoded = enriched.assign(**{
+            column: [
+                None if value is None else json.dumps(value, default=str)
+                for value in enriched[column]
+            ]
+            for column in json_columns
+        })
+        table = pa.Table.from_pandas(encoded, preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            _JSON_COLUMNS_KEY: json.dumps(json_columns).encode()
+        })
+        path = os.path.join(
+            self.directory, f"part-{len(self._parts):06d}.parquet"
+        )
+        with atomic_write(path) as tmp_path:
+            pq.write_table(table, tmp_path)
+        self._parts.append(path)
+        self.completed_ids.update(enriched[self.key])
+        return len(enriched)
+
+    def load(self):
+        """Reads every checkpointed event back into one frame.
+
+        Returns:
+            pandas.DataFrame: All checkpointed events, with nested columns
+            decoded from JSON.
+        """
+        frames = []
+        for path in self._parts:
+            table = pq.read_table(path)
+            json_columns = json.loads(
+                (table.schema.metadata or {}).get(_JSON_COLUMNS_KEY, b"[]")
+            )
+            frame = table.to_pandas()
+            for column in json_columns:
+                frame[column] = [
+                    None if value is None else json.loads(value)
+                    for value in frame[column]
+                ]
+            frames.append(frame)
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
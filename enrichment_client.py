@@ -0,0 +1,182 @@
+import time
+import logging
+import aiohttp
+import asyncio
+from enrichment_scheduler import EnrichmentScheduler, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+
+class EnrichmentClient:
+    """Cached, rate-limited JSON lookups shared by the enrichment modules.
+
+    ``ThreatMetrixDataExtraction`` and ``UserAgentAnalysis`` both query
+    the enrichment APIs through ``_fetch_json``, so status handling,
+    caching, retries and ``Retry-After`` pauses are the same for every
+    lookup. Subclasses set ``self.cache`` (an ``EnrichmentCache``),
+    ``self.scheduler`` (an ``EnrichmentScheduler``), ``self.metrics``,
+    ``self.sampled_logger`` and the connection pool settings used by
+    ``create_session``, and name their providers in ``PROVIDER_NAMES``.
+    Modules calling the same API should share one scheduler, so that
+    together they stay within the API key's quota.
+    """
+
+    # Requests per second allowed by each provider when config.json does
+    # not set "requests_per_second" for it.
+    DEFAULT_QUOTAS = {"virustotal": 4, "censys": 1}
+    # Display name of each provider queried, used in log messages.
+    PROVIDER_NAMES = {}
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    # Responses cached as negative results, e.g. IPs the provider has no
+    # record of.
+    NEGATIVE_STATUSES = (404,)
+
+    def scheduler_from_config(self, config, max_in_flight):
+        """Builds the scheduler for the providers in ``PROVIDER_NAMES``.
+
+        Args:
+            config (dict): Parsed config.json; each provider section may
+                set "requests_per_second".
+            max_in_flight (int): Global cap on concurrent requests.
+
+        Returns:
+            EnrichmentScheduler: The scheduler, reporting to
+            ``self.metrics``.
+        """
+        quotas = {
+            provider: config[provider].get(
+                "requests_per_second", self.DEFAULT_QUOTAS[provider]
+            )
+            for provider in self.PROVIDER_NAMES
+        }
+        return EnrichmentScheduler(quotas, max_in_flight, metrics=self.metrics)
+
+    def create_session(self):
+        """Creates the pooled HTTP session shared by the enrichment calls.
+
+        The session keeps connections to the API hosts alive between
+        requests, so a run pays for the TCP and TLS handshakes once per
+        pooled connection instead of once per lookup.
+
+        Returns:
+            aiohttp.ClientSession: A session backed by a connector
+            limited to ``connection_limit`` connections overall and
+            ``limit_per_host`` connections per API host.
+        """
+        connector = aiohttp.TCPConnector(
+            limit=self.connection_limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=300
+        )
+        return aiohttp.ClientSession(connector=connector)
+
+    async def _fetch_json(self, session, provider, url, key, retries,
+                          backoff_factor, cache_provider=None,
+                          **request_kwargs):
+        """Performs a cached, rate-limited GET request with retries and
+        backoff.
+
+        Results are looked up in ``self.cache`` by provider and key
+        first. Successful responses are stored there, and responses with
+        a status in ``NEGATIVE_STATUSES`` are stored as negative entries,
+        so warm runs skip the network. Transient failures are not cached.
+
+        Every attempt waits for a request slot from ``self.scheduler``,
+        so the provider quota and the global in-flight cap are respected.
+        Backoff sleeps happen outside the slot. When the provider answers
+        429 with a ``Retry-After`` header, the whole provider is paused
+        for that long instead of only this request.
+
+        Args:
+            session (aiohttp.ClientSession): The session used for the
+                request.
+            provider (str): Provider key, e.g. 'virustotal' or 'censys',
+                whose quota is charged.
+            url (str): The URL to request.
+            key (str): The value being enriched (e.g. an IP address),
+                used as the cache key.
+            retries (int): The number of attempts before giving up.
+            backoff_factor (int or float): The multiplier for the
+                exponential backoff between attempts.
+            cache_provider (str, optional): Cache namespace and metrics
+                label when they differ from ``provider``, e.g. for a
+                second kind of lookup against the same API (default is
+                ``provider``).
+            **request_kwargs: Extra arguments for ``session.get`` such as
+                headers or auth.
+
+        Returns:
+            dict: The decoded JSON response, or an empty dictionary if the
+            request fails after all retries.
+        """
+        name = self.PROVIDER_NAMES[provider]
+        label = cache_provider or provider
+        metrics = self.metrics
+        cached_data = await self.cache.aget(label, key)
+        metrics.increment(
+            "cache_lookups", provider=label,
+            result="miss" if cached_data is None else "hit"
+        )
+        if cached_data is not None:
+            return cached_data
+
+        for attempt in range(retries):
+            delay = backoff_factor * (2 ** attempt)
+            if attempt:
+                metrics.increment("retries", provider=label)
+            try:
+                async with self.scheduler.slot(provider):
+                    metrics.increment("requests", provider=label)
+                    request_start = time.perf_counter()
+                    async with session.get(url, **request_kwargs) as response:
+                        metrics.observe(
+                            f"{label}_request",
+                            time.perf_counter() - request_start
+                        )
+                        metrics.increment(
+                            "http_responses", provider=label,
+                            status=response.status
+                        )
+                        if response.status == 200:
+                            self.sampled_logger.log(
+                                f"{label}_success",
+                                lambda: f"Successfully fetched data from "
+                                        f"{name} for: {key}"
+                            )
+                            data = await response.json()
+                            await self.cache.aset(label, key, data)
+                            return data
+                        elif response.status in self.NEGATIVE_STATUSES:
+                            await self.cache.aset(label, key, {})
+                            return {}
+                        elif response.status in self.RETRY_STATUSES:
+                            retry_after = parse_retry_after(
+                                response.headers.get("Retry-After")
+                            )
+                            if retry_after is not None:
+                                delay = retry_after
+                                if response.status == 429:
+                                    self.scheduler.pause(provider, delay)
+                            logger.warning(
+                                f"Attempt {attempt+1}: Error "
+                                f"{response.status}, retrying after "
+                                f"{delay:.1f}s for: {key}"
+                            )
+                        else:
+                            logger.error(
+                                f"Error {response.status}: Failed to fetch "
+                                f"data from {name} for: {key}"
+                            )
+                            return {}
+            except aiohttp.ClientError as e:
+                metrics.increment("client_errors", provider=label)
+                logger.error(f"Error fetching {name} data for: {key}: {e}")
+            with metrics.timer("backoff_sleep"):
+                await asyncio.sleep(delay)
+
+        logger.error(
+            f"Failed to fetch data from {name} for: {key} after "
+            f"{retries} attempts."
+            )
+        return {}
@@ -0,0 +1,207 @@
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+
+def parse_retry_after(value):
+    """Parses an HTTP ``Retry-After`` header value into seconds.
+
+    Args:
+        value (str or None): The header value, either a number of seconds
+            or an HTTP date.
+
+    Returns:
+        float or None: Seconds to wait before retrying, or None if the
+        header is missing or cannot be parsed.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """Async token bucket that spaces requests to a provider quota.
+
+    Tokens are reserved synchronously, so concurrent callers never race
+    for the same token: a caller that finds the bucket empty takes a
+    token on credit and sleeps until that token has been refilled.
+    ``pause`` sets a deadline that every caller checks before returning,
+    including those already sleeping on credit.
+
+    Args:
+        rate (float): Tokens added per second.
+        capacity (float, optional): Maximum burst size. Defaults to one
+            second worth of tokens (at least one).
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    async def acquire(self):
+        """Waits for a token and the end of any pause, and consumes it."""
+        self._refill()
+        self._tokens -= 1
+        wait = max(
+            -self._tokens / self.rate, self.paused_until - time.monotonic()
+        )
+        while wait > 0:
+            await asyncio.sleep(wait)
+            # A pause may have started, or been extended, while sleeping.
+            wait = self.paused_until - time.monotonic()
+
+    def pause(self, seconds):
+        """Withholds tokens for ``seconds``, e.g. after a 429 response.
+
+        Callers already waiting for a token also wait for the pause to
+        end, and the tokens of the paused period are not granted as a
+        burst afterwards.
+
+        Args:
+            seconds (float): Time during which no token is granted.
+        """
+        self._refill()
+        self.paused_until = max(
+            self.paused_until, time.monotonic() + seconds
+        )
+        self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+class EnrichmentScheduler:
+    """Bounds concurrency and request rate for the enrichment APIs.
+
+    Each provider gets its own token bucket, and a global cap limits the
+    number of requests in flight across all providers. The in-flight
+    semaphore is bound to the running event loop, so one scheduler can
+    be reused across separate ``asyncio.run`` calls.
+
+    Args:
+        quotas (dict): Maps a provider name to its allowed requests per
+            second, or to a ``(rate, burst)`` tuple.
+        max_in_flight (int, optional): Maximum number of concurrent
+            requests across all providers (default is 50).
+        metrics (PipelineMetrics, optional): Receives the time spent
+            waiting for tokens per provider and the in-flight and pending
+            queue depths.
+    """
+
+    def __init__(self, quotas, max_in_flight=50, metrics=None):
+        self.max_in_flight = max_in_flight
+        self.metrics = metrics
+        self.buckets = {}
+        for provider, quota in quotas.items():
+            rate, burst = quota if isinstance(quota, tuple) else (quota, None)
+            self.buckets[provider] = TokenBucket(rate, burst)
+        self._semaphore = None
+        self._loop = None
+
+    def _in_flight(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._semaphore
+
+    @asynccontextmanager
+    async def slot(self, provider):
+        """Holds a rate-limited, concurrency-limited request slot.
+
+        The in-flight slot is taken before the token, so callers queued
+        behind the global cap have not spent tokens yet and cannot fire
+        in a burst above the provider rate once slots free up.
+
+        Args:
+            provider (str): Provider whose token bucket is charged.
+                Unknown providers are only subject to the global cap.
+        """
+        bucket = self.buckets.get(provider)
+        async with self._in_flight():
+            if bucket is not None:
+                if self.metrics is None:
+                    await bucket.acquire()
+                else:
+                    with self.metrics.timer(f"{provider}_rate_limit_wait"):
+                        await bucket.acquire()
+            if self.metrics is None:
+                yield
+                return
+            self.metrics.adjust_gauge("in_flight_requests", 1)
+            try:
+                yield
+            finally:
+                self.metrics.adjust_gauge("in_flight_requests", -1)
+
+    def pause(self, provider, seconds):
+        """Pauses a provider after it signalled rate limiting.
+
+        Args:
+            provider (str): Provider to pause.
+            seconds (float): Duration of the pause, usually taken from
+                the ``Retry-After`` header.
+        """
+        bucket = self.buckets.get(provider)
+        if bucket is not None:
+            bucket.pause(seconds)
+
+    async def stream(self, items, worker, max_pending=None):
+        """Runs ``worker`` over ``items`` and yields results as they finish.
+
+        At most ``max_pending`` tasks exist at any time and ``items`` is
+        consumed lazily, so memory stays flat regardless of input size.
+
+        Args:
+            items (iterable): Inputs passed one at a time to ``worker``.
+            worker (callable): Coroutine function applied to each item.
+            max_pending (int, optional): Maximum number of scheduled
+                tasks. Defaults to twice ``max_in_flight``.
+
+        Yields:
+            object: Worker results in completion order.
+        """
+        max_pending = max_pending or 2 * self.max_in_flight
+        items = iter(items)
+        pending = set()
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < max_pending:
+                    try:
+                        item = next(items)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.add(asyncio.ensure_future(worker(item)))
+                if self.metrics is not None:
+                    self.metrics.set_gauge("pending_tasks", len(pending))
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
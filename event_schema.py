@@ -0,0 +1,246 @@
+import json
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # Fall back to the standard library parser.
+    _loads = json.loads
+
+EventField = namedtuple("EventField", ["name", "path", "dtype"])
+EventField.__doc__ = """A column of the flattened ThreatMetrix event frame.
+
+Args:
+    name (str): Column name in the flattened frame.
+    path (str): Dotted path of the value inside the event body.
+    dtype (str): Target type: 'string', 'category', 'float', 'boolean',
+        'datetime' or 'object' for nested values kept as-is.
+"""
+
+THREAT_METRIX_SCHEMA = (
+    EventField('event_id', 'event_id', 'string'),
+    EventField('ip_address', 'ip_address', 'string'),
+    EventField('user_agent', 'user_agent', 'string'),
+    EventField('device_id', 'device_id', 'string'),
+    EventField('location', 'location', 'object'),
+    EventField('event_time', 'event_time', 'datetime'),
+    EventField('risk_score', 'risk_score', 'float'),
+    EventField('account_id', 'account_id', 'string'),
+    EventField('login_attempt', 'login_attempt', 'object'),
+    EventField('session_id', 'session_id', 'string'),
+    EventField('transaction_id', 'transaction_id', 'string'),
+    EventField('device_os', 'device_os', 'category'),
+    EventField('device_model', 'device_model', 'category'),
+    EventField('device_type', 'device_type', 'category'),
+    EventField('country', 'country', 'category'),
+    EventField('region', 'region', 'category'),
+    EventField('city', 'city', 'category'),
+    EventField('zip_code', 'zip_code', 'string'),
+    EventField('latitude', 'latitude', 'float'),
+    EventField('longitude', 'longitude', 'float'),
+    EventField('confidence_score', 'confidence_score', 'float'),
+    EventField('fraud_type', 'fraud_type', 'category'),
+    EventField('identity_score', 'identity_score', 'float'),
+    EventField('email_domain', 'email_domain', 'category'),
+    EventField('phone_number', 'phone_number', 'string'),
+    EventField('payment_method', 'payment_method', 'category'),
+    EventField('proxy', 'proxy', 'boolean'),
+    EventField('vpn', 'vpn', 'boolean'),
+    EventField('tor', 'tor', 'boolean'),
+    EventField('bot', 'bot', 'boolean'),
+    EventField('malware', 'malware', 'boolean'),
+    EventField('phishevent', 'phishevent', 'boolean'),
+    EventField('account_creation', 'account_creation', 'boolean'),
+    EventField('account_takeover', 'account_takeover', 'boolean'),
+    EventField('account_funding', 'account_funding', 'boolean'),
+    EventField('device_change', 'device_change', 'boolean'),
+    EventField('password_reset', 'password_reset', 'boolean'),
+    EventField('profile_change', 'profile_change', 'boolean'),
+    EventField('withdrawal', 'withdrawal', 'object'),
+    EventField('deposit', 'deposit', 'object'),
+    EventField('purchase', 'purchase', 'object'),
+    EventField('transfer', 'transfer', 'object'),
+    EventField('refund', 'refund', 'object'),
+    EventField('login_success', 'login_success', 'boolean'),
+    EventField('login_failure', 'login_failure', 'boolean'),
+    EventField('multi_factor_auth', 'multi_factor_auth', 'boolean'),
+    EventField('sms_verification', 'sms_verification', 'boolean'),
+    EventField('email_verification', 'email_verification', 'boolean'),
+    EventField('phone_verification', 'phone_verification', 'boolean'),
+    EventField('ip_reputation', 'ip_reputation', 'category'),
+    EventField('blacklist_status', 'blacklist_status', 'category'),
+    EventField('device_reputation', 'device_reputation', 'category'),
+    EventField('behavioral_biometrics', 'behavioral_biometrics', 'object'),
+    EventField('network_attributes', 'network_attributes', 'object'),
+    EventField('geolocation', 'geolocation', 'object'),
+    EventField('risk_rules_triggered', 'risk_rules_triggered', 'object'),
+    EventField('custom_attributes', 'custom_attributes', 'object'),
+    EventField('screen_resolution', 'screen_resolution', 'category'),
+    EventField('charging_status', 'charging_status', 'category'),
+)
+
+_BOOLEAN_VALUES = {
+    True: True, False: False, 1: True, 0: False,
+    'true': True, 'false': False, 'True': True, 'False': False,
+    'yes': True, 'no': False, '1': True, '0': False
+}
+
+
+def get_path(data, path):
+    """Returns the value at a dotted ``path`` of a nested dict, or None."""
+    for key in path.split('.'):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def flatten_event(data, schema=THREAT_METRIX_SCHEMA):
+    """Selects the schema fields of a single decoded event.
+
+    Args:
+        data (dict): The decoded ThreatMetrix event body.
+        schema (sequence of EventField, optional): Fields to extract.
+
+    Returns:
+        dict: Field name to raw value, without type conversion.
+    """
+    return {field.name: get_path(data, field.path) for field in schema}
+
+
+def _is_null(value):
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def _to_boolean(values):
+    return pd.array(
+        [
+            _BOOLEAN_VALUES.get(value) if isinstance(value, (bool, int, str))
+            else None
+            for value in values
+        ],
+        dtype='boolean'
+    )
+
+
+def _convert(values, dtype):
+    if dtype == 'string':
+        return pd.array(
+            [None if _is_null(value) else str(value) for value in values],
+            dtype='string'
+        )
+    if dtype == 'category':
+        try:
+            return pd.Categorical(values)
+        except TypeError:  # Unhashable values such as nested dicts.
+            dtype = 'object'
+    if dtype == 'float':
+        return pd.to_numeric(
+            pd.Series(values, dtype=object), errors='coerce'
+        ).astype('Float64').array
+    if dtype == 'boolean':
+        return _to_boolean(values)
+    if dtype == 'datetime':
+        return pd.to_datetime(
+            pd.Series(values, dtype=object), errors='coerce', utc=True
+        ).array
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def flatten_events(bodies, schema=THREAT_METRIX_SCHEMA):
+    """Parses a batch of JSON event bodies into a typed columnar frame.
+
+    Every body is decoded once with the fastest available JSON parser
+    (orjson when installed), and each schema field is then gathered into
+    one typed column, so no per-event dictionaries are built. Repetitive
+    text fields become categoricals.
+
+    Args:
+        bodies (iterable of str or bytes): Raw event bodies.
+        schema (sequence of EventField, optional): Fields to extract.
+
+    Returns:
+        pandas.DataFrame: One row per event and one column per field.
+    """
+    records = [_loads(body) for body in bodies]
+    columns = {}
+    for field in schema:
+        if '.' in field.path:
+            values = [get_path(record, field.path) for record in records]
+        else:
+            values = [record.get(field.path) for record in records]
+        columns[field.name] = _convert(values, field.dtype)
+    return pd.DataFrame(columns, index=pd.RangeIndex(len(records)))
+
+
+def frame_from_projection(projected, schema=THREAT_METRIX_SCHEMA):
+    """Types a batch whose fields were already extracted by the database.
+
+    This is the counterpart of ``flatten_events`` for queries built with
+    ``projection_sql``: scalar fields arrive as text columns and nested
+    fields as JSON text. Schema fields missing from ``projected`` are
+    filled with nulls.
+
+    Args:
+        projected (pandas.DataFrame or pyarrow.RecordBatch): Batch with
+            one column per projected field.
+        schema (sequence of EventField, optional): Fields of the frame.
+
+    Returns:
+        pandas.DataFrame: Frame with the same layout as ``flatten_events``.
+    """
+    n_rows = len(projected)
+    available = set(
+        projected.schema.names if hasattr(projected, 'schema')
+        else projected.columns
+    )
+    columns = {}
+    for field in schema:
+        if field.name not in available:
+            values = [None] * n_rows
+        else:
+            values = projected[field.name]
+            values = (
+                values.to_pylist() if hasattr(values, 'to_pylist')
+                else values.tolist()
+            )
+            if field.dtype == 'object':
+                values = [
+                    None if _is_null(value) else _loads(value)
+                    for value in values
+                ]
+        columns[field.name] = _convert(values, field.dtype)
+    return pd.DataFrame(columns, index=pd.RangeIndex(n_rows))
+
+
+def projection_sql(fields, schema=THREAT_METRIX_SCHEMA, column='body'):
+    """Builds BigQuery select expressions extracting fields from JSON.
+
+    Scalar fields use ``JSON_VALUE`` and nested ('object') fields use
+    ``JSON_QUERY``, so only the requested values leave BigQuery.
+
+    Args:
+        fields (iterable of str): Schema field names to project.
+        schema (sequence of EventField, optional): Schema the names refer
+            to.
+        column (str, optional): Column holding the JSON event body.
+
+    Returns:
+        list[str]: One ``<expression> AS <name>`` entry per field.
+
+    Raises:
+        KeyError: If a name is not part of ``schema``.
+    """
+    by_name = {field.name: field for field in schema}
+    expressions = []
+    for name in fields:
+        field = by_name[name]
+        function = 'JSON_QUERY' if field.dtype == 'object' else 'JSON_VALUE'
+        expressions.append(
+            f"{function}({column}, '$.{field.path}') AS {field.name}"
+        )
+    return expressions
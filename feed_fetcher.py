@@ -0,0 +1,241 @@
+import os
+import shutil
+import tempfile
+import subprocess
+from collections import namedtuple
+from pipeline_metrics import PipelineMetrics
+
+FeedResult = namedtuple(
+    "FeedResult",
+    ["url", "content", "status", "latency", "error", "etag", "last_modified"]
+)
+FeedResult.__doc__ = """Outcome of fetching one feed.
+
+Args:
+    url (str): The feed URL.
+    content (str or None): The response body, or None on failure and
+        when the server answered 304 Not Modified.
+    status (int): HTTP status code, 0 when no response was received.
+    latency (float): Seconds the transfer took.
+    error (str or None): curl's error message or the HTTP failure.
+    etag (str or None): The response's ETag header.
+    last_modified (str or None): The response's Last-Modified header.
+"""
+
+# Columns curl writes for each finished transfer, tab separated. The
+# escapes are expanded by curl; the error message goes last as it may
+# contain anything.
+_WRITE_OUT = (
+    "%{urlnum}\\t%{http_code}\\t%{time_total}\\t%{exitcode}\\t"
+    "%header{etag}\\t%header{last-modified}\\t%{errormsg}\\n"
+)
+_N_FIELDS = 7
+
+
+def _quote(value):
+    """Quotes a value for a curl config file."""
+    escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+class CurlFeedFetcher:
+    """Fetches many feeds concurrently through one curl process.
+
+    All feeds of a run are handed to a single ``curl --parallel``
+    process, which keeps up to ``max_workers`` transfers in flight and
+    reuses its connections to the proxy. An NTLM-authenticated proxy
+    connection is therefore negotiated once per pooled connection
+    instead of once per feed, which the one-curl-per-feed approach
+    cannot do. Results are yielded as transfers finish, so callers can
+    parse a feed while the others are still downloading. curl
+    block-buffers its output into a pipe, so it is run under
+    ``stdbuf -oL`` (when available) to get each result line as soon as
+    its transfer completes.
+
+    Credentials are passed to curl on stdin as a config file, never on
+    the command line.
+
+    Feeds can be fetched conditionally: given the ETag and Last-Modified
+    of a previous response, curl sends If-None-Match/If-Modified-Since
+    and an unchanged feed comes back as a bodiless 304.
+
+    Args:
+        proxy (str, optional): Proxy URL, e.g. "http://proxy:85". Feeds
+            are fetched directly when omitted.
+        username (str, optional): Proxy user name.
+        password (str, optional): Proxy password.
+        ntlm (bool, optional): Authenticate to the proxy with NTLM
+            (default is True).
+        max_workers (int, optional): Maximum number of concurrent
+            transfers (default is 8).
+        timeout (int or float, optional): Maximum seconds per feed
+            (default is 30).
+        metrics (PipelineMetrics, optional): Receives per-feed latencies
+            and success/failure counters. A new collector is created
+            when omitted.
+        curl (str, optional): curl executable (default is "curl").
+    """
+
+    def __init__(self, proxy=None, username=None, password=None, ntlm=True,
+                 max_workers=8, timeout=30, metrics=None, curl="curl"):
+        self.proxy = proxy
+        self.username = username
+        self.password = password
+        self.ntlm = ntlm
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.metrics = metrics if metrics is not None else PipelineMetrics()
+        self.curl = curl
+        self.feed_stats = []
+
+    def _command(self):
+        """Returns the curl command line, line-buffered when possible."""
+        command = [
+            self.curl, "--parallel", "--parallel-immediate",
+            "--parallel-max", str(self.max_workers), "--config", "-"
+        ]
+        stdbuf = shutil.which("stdbuf")
+        if stdbuf:
+            # Without it, results only reach the pipe when curl exits.
+            command = [stdbuf, "-oL"] + command
+        return command
+
+    def _config(self, feed_urls, output_dir, validators=None):
+        validators = validators or {}
+        options = [
+            "silent",
+            "location",
+            "compressed",
+            f"max-time = {self.timeout}",
+            f"connect-timeout = {min(self.timeout, 10)}",
+            f'write-out = "{_WRITE_OUT}"',
+        ]
+        if self.proxy:
+            options.append(f"proxy = {_quote(self.proxy)}")
+            if self.username:
+                credentials = f"{self.username}:{self.password or ''}"
+                options.append(f"proxy-user = {_quote(credentials)}")
+            if self.ntlm:
+                options.append("proxy-ntlm")
+        # Each feed is its own group of options, separated by "next", so
+        # conditional headers apply to their feed only. curl numbers the
+        # groups in order, which is the urlnum reported back.
+        blocks = []
+        for index, feed_url in enumerate(feed_urls):
+            lines = list(options)
+            etag, last_modified = validators.get(feed_url, (None, None))
+            if etag:
+                header = f"If-None-Match: {etag}"
+                lines.append(f"header = {_quote(header)}")
+            if last_modified:
+                header = f"If-Modified-Since: {last_modified}"
+                lines.append(f"header = {_quote(header)}")
+            lines.append(f"url = {_quote(feed_url)}")
+            lines.append(
+                f"output = {_quote(os.path.join(output_dir, str(index)))}"
+            )
+            blocks.append("\n".join(lines))
+        return "\nnext\n".join(blocks) + "\n"
+
+    def fetch(self, feed_urls, validators=None):
+        """Fetches feeds and yields each result as soon as it is ready.
+
+        Args:
+            feed_urls (list[str]): Feed URLs to fetch.
+            validators (dict, optional): ``(etag, last_modified)`` of the
+                previous response per feed URL, either of which may be
+                None. Feeds listed here are requested conditionally.
+
+        Yields:
+            FeedResult: One result per feed, in completion order. Failed
+            feeds (network errors, timeouts or HTTP errors) have no
+            content and describe the failure in ``error``; unchanged
+            feeds have status 304, no content and no error.
+        """
+        feed_urls = list(feed_urls)
+        if not feed_urls:
+            return
+        output_dir = tempfile.mkdtemp(prefix="feeds-")
+        process = subprocess.Popen(
+            self._command(),
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, text=True
+        )
+        reported = set()
+        try:
+            process.stdin.write(
+                self._config(feed_urls, output_dir, validators)
+            )
+            process.stdin.close()
+            for line in process.stdout:
+                fields = line.rstrip("\n").split("\t", _N_FIELDS - 1)
+                if len(fields) != _N_FIELDS or not fields[0].isdigit():
+                    continue
+                index = int(fields[0])
+                reported.add(index)
+                yield self._result(
+                    feed_urls[index], os.path.join(output_dir, str(index)),
+                    int(fields[1] or 0), float(fields[2] or 0.0),
+                    int(fields[3] or 0), fields[6],
+                    fields[4] or None, fields[5] or None
+                )
+            process.wait()
+            for index, feed_url in enumerate(feed_urls):
+                if index not in reported:
+                    yield self._result(
+                        feed_url, None, 0, 0.0, -1, "no result from curl"
+                    )
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+    def _result(self, feed_url, path, status, latency, exit_code, message,
+                etag=None, last_modified=None):
+        """Builds, records and returns the result of one transfer."""
+        content, error = None, None
+        if exit_code:
+            error = message or f"curl exit code {exit_code}"
+        elif 200 <= status < 300:
+            with open(path, "r", encoding="utf-8", errors="replace") as body:
+                content = body.read()
+        elif status != 304:
+            error = f"HTTP {status}"
+        if path and os.path.exists(path):
+            os.remove(path)
+
+        self.metrics.observe("feed_fetch", latency)
+        self.metrics.increment(
+            "feed_fetches",
+            result="failed" if error else
+            "not_modified" if status == 304 else "ok"
+        )
+        if status:
+            self.metrics.increment("feed_http_responses", status=status)
+        self.feed_stats.append({
+            "url": feed_url, "status": status, "latency": latency,
+            "error": error
+        })
+        return FeedResult(
+            feed_url, content, status, latency, error, etag, last_modified
+        )
+
+    def stats(self):
+        """Returns per-feed results and the latency/failure summary.
+
+        Returns:
+            dict: 'feeds' with one entry per fetched feed, 'failed' and
+            'not_modified' with the number of failures and 304 answers,
+            and 'latency' with the p50/p95/p99 figures of the
+            'feed_fetch' stage.
+        """
+        return {
+            "feeds": list(self.feed_stats),
+            "failed": sum(1 for feed in self.feed_stats if feed["error"]),
+            "not_modified": sum(
+                1 for feed in self.feed_stats if feed["status"] == 304
+            ),
+            "latency": self.metrics.stages().get("feed_fetch", {}),
+        }
+
@@ -0,0 +1,89 @@
+import os
+import json
+import hashlib
+from atomic_write import atomic_write
+
+
+def content_hash(content):
+    """Returns the SHA-256 hex digest of a feed body."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class FeedState:
+    """Remembers, per feed, what the last successful fetch returned.
+
+    For every feed URL the ETag and Last-Modified validators of the last
+    response are kept, so the next run can request the feed
+    conditionally, along with a hash of the body, so feeds that answer
+    200 with identical content (servers without validators) are also
+    recognised as unchanged. State is loaded once and written back with
+    ``save``.
+
+    Args:
+        path (str, optional): Path of the JSON state file (default is
+            "feed_state.json").
+    """
+
+    def __init__(self, path="feed_state.json"):
+        self.path = path
+        self.feeds = {}
+        if os.path.exists(path):
+            with open(path, "r") as state_file:
+                self.feeds = json.load(state_file)
+
+    def validators(self, feed_urls):
+        """Returns the conditional request validators of known feeds.
+
+        Args:
+            feed_urls (list[str]): Feed URLs about to be fetched.
+
+        Returns:
+            dict: ``(etag, last_modified)`` per feed URL that has either.
+        """
+        validators = {}
+        for feed_url in feed_urls:
+            state = self.feeds.get(feed_url, {})
+            if state.get("etag") or state.get("last_modified"):
+                validators[feed_url] = (
+                    state.get("etag"), state.get("last_modified")
+                )
+        return validators
+
+    def is_unchanged(self, feed_url, content):
+        """Checks whether a body matches the one seen last time.
+
+        Args:
+            feed_url (str): The feed URL.
+            content (str): The body just fetched.
+
+        Returns:
+            bool: True when the stored hash equals the body's hash.
+        """
+        stored = self.feeds.get(feed_url, {}).get("content_hash")
+        return stored is not None and stored == content_hash(content)
+
+    def update(self, feed_url, etag=None, last_modified=None, content=None):
+        """Records the outcome of a successful fetch.
+
+        Validators the server did not send are kept from the previous
+        response, as a 304 may omit them.
+
+        Args:
+            feed_url (str): The feed URL.
+            etag (str, optional): ETag of the response.
+            last_modified (str, optional): Last-Modified of the response.
+            content (str, optional): The body, when one was received.
+        """
+        state = self.feeds.setdefault(feed_url, {})
+        if etag:
+            state["etag"] = etag
+        if last_modified:
+            state["last_modified"] = last_modified
+        if content is not None:
+            state["content_hash"] = content_hash(content)
+
+    def save(self):
+        """Writes the state file with ``atomic_write``."""
+        with atomic_write(self.path) as tmp_path:
+            with open(tmp_path, "w") as state_file:
+                json.dump(self.feeds, state_file, indent=4)
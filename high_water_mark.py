@@ -0,0 +1,63 @@
+import os
+import json
+from atomic_write import atomic_write
+
+
+class HighWaterMark:
+    """Persists the end of the last successfully processed time window.
+
+    Marks are kept per source in a small JSON file, written with
+    ``atomic_write``.
+
+    Args:
+        path (str, optional): Path of the JSON state file (default is
+            "high_water_marks.json").
+    """
+
+    def __init__(self, path="high_water_marks.json"):
+        self.path = path
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "r") as state_file:
+            return json.load(state_file)
+
+    def get(self, source):
+        """Returns the stored mark for ``source``, or None if none exists.
+
+        Args:
+            source (str): Name of the data source, e.g. "threat_metrix".
+
+        Returns:
+            str or None: The end of the last successful window.
+        """
+        return self._load().get(source)
+
+    def set(self, source, value):
+        """Stores a new mark for ``source``.
+
+        Args:
+            source (str): Name of the data source.
+            value (str): End of the window that was just processed.
+        """
+        state = self._load()
+        state[source] = value
+        with atomic_write(self.path) as tmp_path:
+            with open(tmp_path, "w") as state_file:
+                json.dump(state, state_file, indent=4)
+
+    def window_start(self, source, default_start):
+        """Returns where the next window for ``source`` should begin.
+
+        Args:
+            source (str): Name of the data source.
+            default_start (str): Start used when no mark exists or the
+                mark is older than this value. Timestamps must share the
+                'YYYY-MM-DD HH:MM:SS' format so they compare as strings.
+
+        Returns:
+            str: The later of the stored mark and ``default_start``.
+        """
+        mark = self.get(source)
+        return max(mark, default_start) if mark else default_start
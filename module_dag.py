@@ -0,0 +1,149 @@
+import time
+import asyncio
+import inspect
+import logging
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+Module = namedtuple("Module", ["name", "func", "depends_on"])
+Module.__doc__ = """A step of a ``ModuleDAG``.
+
+Args:
+    name (str): Unique module name; its result is passed to dependents
+        under this name.
+    func (callable): Coroutine function or plain function called with the
+        results of ``depends_on`` as keyword arguments.
+    depends_on (tuple[str]): Names of the modules whose results ``func``
+        needs.
+"""
+
+
+class ModuleDAG:
+    """Runs analysis modules as a dependency graph on one event loop.
+
+    Each module starts as soon as all of its dependencies have finished,
+    so independent modules run concurrently and the wall time of a run
+    is that of its critical path rather than the sum of all modules.
+    Coroutine functions run on the shared event loop; plain functions
+    run in a shared thread pool so blocking work (e.g. a BigQuery fetch)
+    does not stall the loop. Results are handed to dependents by
+    reference, never copied, so dependents must not modify their inputs
+    in place.
+
+    Args:
+        max_workers (int, optional): Size of the thread pool used for
+            plain functions (default is None, the executor's default).
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers
+        self.modules = {}
+        self.timings = {}
+
+    def add(self, name, func, depends_on=()):
+        """Declares a module.
+
+        Args:
+            name (str): Unique module name.
+            func (callable): Coroutine function or plain function called
+                with the results of ``depends_on`` as keyword arguments.
+            depends_on (iterable of str, optional): Modules that must
+                finish before this one starts.
+
+        Returns:
+            ModuleDAG: This graph, so declarations can be chained.
+
+        Raises:
+            ValueError: If ``name`` is already declared.
+        """
+        if name in self.modules:
+            raise ValueError(f"Module '{name}' is already declared")
+        self.modules[name] = Module(name, func, tuple(depends_on))
+        return self
+
+    def _check(self):
+        """Raises ValueError on unknown dependencies or cycles."""
+        state = {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                cycle = " -> ".join(path + (name,))
+                raise ValueError(f"Module dependencies form a cycle: {cycle}")
+            state[name] = "visiting"
+            for dependency in self.modules[name].depends_on:
+                if dependency not in self.modules:
+                    raise ValueError(
+                        f"Module '{name}' depends on unknown module "
+                        f"'{dependency}'"
+                    )
+                visit(dependency, path + (name,))
+            state[name] = "done"
+
+        for name in self.modules:
+            visit(name, ())
+
+    async def run_async(self):
+        """Runs every module on the running event loop.
+
+        Returns:
+            dict: Module name to result. Per-module wall times in seconds
+            are stored in ``self.timings``, together with the total under
+            'total'.
+
+        Raises:
+            ValueError: If the graph has unknown dependencies or a cycle.
+            Exception: The first exception raised by a module; modules
+            still running are cancelled.
+        """
+        self._check()
+        loop = asyncio.get_running_loop()
+        self.timings = {}
+        tasks = {}
+        run_start = time.perf_counter()
+
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            async def run_module(module):
+                inputs = {
+                    dependency: await tasks[dependency]
+                    for dependency in module.depends_on
+                }
+                start = time.perf_counter()
+                if inspect.iscoroutinefunction(module.func):
+                    result = await module.func(**inputs)
+                else:
+                    result = await loop.run_in_executor(
+                        executor, lambda: module.func(**inputs)
+                    )
+                self.timings[module.name] = time.perf_counter() - start
+                logger.info(
+                    f"Module '{module.name}' finished in "
+                    f"{self.timings[module.name]:.2f}s"
+                )
+                return result
+
+            for module in self.modules.values():
+                tasks[module.name] = asyncio.ensure_future(
+                    run_module(module)
+                )
+            try:
+                results = await asyncio.gather(*tasks.values())
+            except BaseException:
+                for task in tasks.values():
+                    task.cancel()
+                await asyncio.gather(*tasks.values(), return_exceptions=True)
+                raise
+
+        self.timings["total"] = time.perf_counter() - run_start
+        return dict(zip(tasks, results))
+
+    def run(self):
+        """Runs ``run_async`` in a new event loop.
+
+        Returns:
+            dict: Module name to result.
+        """
+        return asyncio.run(self.run_async())
@@ -0,0 +1,234 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+class MultiHotEncoder:
+    """Multi-hot encodes delimited multi-value columns such as ``action``.
+
+    A cell like ``"OTP prompt|OTP initiated"`` holds several tokens; each
+    distinct token becomes one 0/1 column. Cells are factorized first and
+    only the distinct cell strings are split, so the Python work grows
+    with the (small) number of distinct combinations rather than with
+    the rows. The indicator rows of the distinct cells are then gathered
+    for every row in one sparse row selection. Fitting and transforming
+    are separate, so scoring data gets exactly the columns seen in
+    training. Tokens outside the vocabulary are ignored, or collected in
+    an "other" bucket column when ``other_bucket`` is set; rare training
+    tokens (below ``min_frequency``) can be folded into that bucket too,
+    which keeps the column layout small and stable. ``to_dict`` and
+    ``from_dict`` persist the fitted vocabulary.
+
+    Args:
+        separator (str, optional): Token separator (default is "|").
+        prefix (str, optional): Prefix of the column names produced by
+            ``transform_frame`` (default is "").
+        parser (callable, optional): Function returning the tokens of one
+            non-missing cell string, used instead of splitting on
+            ``separator`` (e.g. ``tag_parser.parse_tags``).
+        min_frequency (int, optional): Cells a token must appear in during
+            ``fit`` to get its own column (default is 1).
+        other_bucket (str, optional): Name of the column collecting rare
+            and unseen tokens; it must not be a token of the data. Without
+            it they are dropped (default).
+    """
+
+    def __init__(self, separator="|", prefix="", parser=None,
+                 min_frequency=1, other_bucket=None):
+        self.separator = separator
+        self.prefix = prefix
+        self.parser = parser
+        self.min_frequency = min_frequency
+        self.other_bucket = other_bucket
+        self.tokens_ = None
+        self.counts_ = None
+        # Cells seen by fit/partial_fit, per distinct token set.
+        self._token_set_counts = {}
+
+    def _factorize(self, values):
+        """Splits each distinct cell once.
+
+        Returns:
+            tuple: (distinct-cell code of each row, list of the token
+            sets of the distinct cells). Missing cells have no tokens.
+        """
+        cells = pd.Series(values, copy=False).fillna("").astype(str)
+        codes, uniques = pd.factorize(cells)
+        if self.parser is not None:
+            token_sets = [
+                set(self.parser(cell)) if cell else set() for cell in uniques
+            ]
+        else:
+            token_sets = [
+                {token.strip() for token in cell.split(self.separator)} - {""}
+                for cell in uniques
+            ]
+        return codes, token_sets
+
+    def fit(self, values):
+        """Learns the token vocabulary and how many cells hold each token.
+
+        The count of the ``other_bucket`` column is the number of cells
+        holding at least one rare token.
+
+        Args:
+            values (pd.Series or list): Delimited cells; missing values
+                are allowed.
+
+        Returns:
+            MultiHotEncoder: self.
+
+        Raises:
+            ValueError: See ``partial_fit``.
+        """
+        self._token_set_counts = {}
+        return self.partial_fit(values)
+
+    def partial_fit(self, values):
+        """Adds cells to the vocabulary learnt so far.
+
+        Lets a vocabulary be learnt over data read in chunks; fitting all
+        chunks with ``partial_fit`` gives the same result as one ``fit``
+        over the concatenated cells.
+
+        Args:
+            values (pd.Series or list): Delimited cells; missing values
+                are allowed.
+
+        Returns:
+            MultiHotEncoder: self.
+
+        Raises:
+            ValueError: If a cell holds a token named like ``other_bucket``,
+                whose column would then mix it with the rare tokens.
+        """
+        codes, token_sets = self._factorize(values)
+        if any(self.other_bucket in token_set for token_set in token_sets):
+            raise ValueError(
+                f"other_bucket {self.other_bucket!r} is also a token of the "
+                f"data; choose a name no cell holds"
+            )
+        cells_per_unique = np.bincount(codes, minlength=len(token_sets))
+        for token_set, n_cells in zip(token_sets, cells_per_unique):
+            token_set = frozenset(token_set)
+            self._token_set_counts[token_set] = (
+                self._token_set_counts.get(token_set, 0) + int(n_cells)
+            )
+        counts = {}
+        for token_set, n_cells in self._token_set_counts.items():
+            for token in token_set:
+                counts[token] = counts.get(token, 0) + n_cells
+        tokens = sorted(
+            token for token, count in counts.items()
+            if count >= self.min_frequency
+        )
+        token_counts = [counts[token] for token in tokens]
+        if self.other_bucket is not None:
+            kept = set(tokens)
+            tokens.append(self.other_bucket)
+            token_counts.append(sum(
+                n_cells for token_set, n_cells in self._token_set_counts.items()
+                if not token_set <= kept
+            ))
+        self.tokens_ = pd.Index(tokens, dtype=object)
+        self.counts_ = np.array(token_counts, dtype=np.int64)
+        return self
+
+    def to_dict(self):
+        """Returns the settings and fitted vocabulary as plain JSON types.
+
+        The parser is not included; pass it again to ``from_dict``.
+        """
+        if self.tokens_ is None:
+            raise ValueError("MultiHotEncoder is not fitted; call fit first.")
+        return {
+            "separator": self.separator,
+            "prefix": self.prefix,
+            "min_frequency": self.min_frequency,
+            "other_bucket": self.other_bucket,
+            "vocabulary": self.vocabulary_,
+            "counts": dict(zip(self.tokens_, self.counts_.tolist())),
+        }
+
+    @classmethod
+    def from_dict(cls, state, parser=None):
+        """Rebuilds a fitted encoder from ``to_dict`` output.
+
+        Args:
+            state (dict): Output of ``to_dict``.
+            parser (callable, optional): The cell parser the encoder was
+                fitted with.
+
+        Returns:
+            MultiHotEncoder: The fitted encoder.
+        """
+        encoder = cls(
+            separator=state["separator"], prefix=state["prefix"],
+            parser=parser, min_frequency=state["min_frequency"],
+            other_bucket=state["other_bucket"],
+        )
+        tokens = sorted(state["vocabulary"], key=state["vocabulary"].get)
+        encoder.tokens_ = pd.Index(tokens, dtype=object)
+        encoder.counts_ = np.array(
+            [state["counts"][token] for token in tokens], dtype=np.int64
+        )
+        return encoder
+
+    @property
+    def vocabulary_(self):
+        """dict: Column index of each token."""
+        return {token: code for code, token in enumerate(self.tokens_)}
+
+    def transform(self, values):
+        """Encodes cells with the fitted vocabulary.
+
+        Args:
+            values (pd.Series or list): Delimited cells.
+
+        Returns:
+            scipy.sparse.csr_matrix: uint8 matrix with one row per cell
+            and one column per vocabulary token.
+        """
+        if self.tokens_ is None:
+            raise ValueError("MultiHotEncoder is not fitted; call fit first.")
+        codes, token_sets = self._factorize(values)
+        vocabulary = self.vocabulary_
+        other = vocabulary.get(self.other_bucket)
+        columns = [
+            sorted({vocabulary.get(token, other) for token in token_set} - {None})
+            for token_set in token_sets
+        ]
+        indptr = np.cumsum([0] + [len(row) for row in columns])
+        distinct = sparse.csr_matrix(
+            (
+                np.ones(indptr[-1], dtype=np.uint8),
+                np.fromiter(
+                    (column for row in columns for column in row),
+                    dtype=np.int32, count=indptr[-1]
+                ),
+                indptr,
+            ),
+            shape=(len(token_sets), len(self.tokens_)),
+        )
+        return distinct[codes]
+
+    def fit_transform(self, values):
+        """Fits the vocabulary and encodes the same cells."""
+        return self.fit(values).transform(values)
+
+    def transform_frame(self, values):
+        """Encodes cells into a DataFrame of sparse uint8 columns.
+
+        Args:
+            values (pd.Series or list): Delimited cells. A Series keeps
+                its index.
+
+        Returns:
+            pd.DataFrame: One ``Sparse[uint8, 0]`` column per token, named
+            ``prefix + token``.
+        """
+        index = values.index if isinstance(values, pd.Series) else None
+        return pd.DataFrame.sparse.from_spmatrix(
+            self.transform(values), index=index,
+            columns=[f"{self.prefix}{token}" for token in self.tokens_],
+        )
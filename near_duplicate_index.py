@@ -0,0 +1,266 @@
+import re
+import zlib
+from collections import defaultdict, namedtuple
+import numpy as np
+
+try:
+    _trapezoid = np.trapezoid
+except AttributeError:  # NumPy < 2.0; the same rule is named trapz there.
+    _trapezoid = np.trapz
+
+DuplicateMatch = namedtuple("DuplicateMatch", ["key", "similarity"])
+DuplicateMatch.__doc__ = """An indexed document similar to a queried one.
+
+Args:
+    key (str): Key the similar document was added under.
+    similarity (float): Estimated Jaccard similarity of their shingle
+        sets, between 0 and 1.
+"""
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+# Candidates are verified against the full signature, so a missed
+# near-duplicate costs more than an extra comparison.
+FALSE_NEGATIVE_WEIGHT = 0.8
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_SHINGLE_MULTIPLIER = np.uint64(0x100000001B3)
+
+
+def shingle_hashes(text, shingle_size=3):
+    """Hashes the word shingles of a text.
+
+    Text is lower-cased and reduced to alphanumeric words, so markup,
+    punctuation and whitespace differences between two copies of a
+    report do not matter. Each word is hashed once and the hashes of
+    consecutive words are combined with NumPy, rather than building and
+    hashing every shingle string.
+
+    Args:
+        text (str): The document text.
+        shingle_size (int, optional): Words per shingle (default is 3).
+
+    Returns:
+        numpy.ndarray: Distinct 32-bit shingle hashes (uint64). Texts
+        shorter than one shingle hash as a single shingle.
+    """
+    words = _TOKEN.findall((text or "").lower())
+    word_hashes = np.fromiter(
+        (zlib.crc32(word.encode()) for word in words),
+        dtype=np.uint64, count=len(words)
+    )
+    n_shingles = max(len(words) - shingle_size + 1, 1)
+    combined = np.zeros(n_shingles, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for offset in range(min(shingle_size, len(words))):
+            combined = (
+                combined * _SHINGLE_MULTIPLIER
+                ^ word_hashes[offset:offset + n_shingles]
+            )
+    return np.unique((combined ^ (combined >> np.uint64(32))) & _MAX_HASH)
+
+
+def _collision_probability(similarity, bands, rows):
+    return 1 - (1 - similarity ** rows) ** bands
+
+
+def lsh_bands(threshold, num_perm):
+    """Chooses the LSH banding for a similarity threshold.
+
+    Picks the number of bands and rows per band (using at most
+    ``num_perm`` values) that minimises the weighted false positive and
+    false negative areas under the S-curve of the probability that two
+    documents share at least one band. False negatives are weighted by
+    ``FALSE_NEGATIVE_WEIGHT``.
+
+    Args:
+        threshold (float): Jaccard similarity from which documents count
+            as near-duplicates.
+        num_perm (int): Number of MinHash permutations.
+
+    Returns:
+        tuple: (bands, rows) with ``bands * rows <= num_perm``.
+    """
+    below = np.linspace(0, threshold, 200)
+    above = np.linspace(threshold, 1, 200)
+    best, best_error = None, np.inf
+    for rows in range(1, num_perm + 1):
+        for bands in range(1, num_perm // rows + 1):
+            false_positive = _trapezoid(
+                _collision_probability(below, bands, rows), below
+            )
+            false_negative = _trapezoid(
+                1 - _collision_probability(above, bands, rows), above
+            )
+            error = (
+                (1 - FALSE_NEGATIVE_WEIGHT) * false_positive
+                + FALSE_NEGATIVE_WEIGHT * false_negative
+            )
+            if error < best_error:
+                best, best_error = (bands, rows), error
+    return best
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index flagging near-duplicate documents on the CPU.
+
+    Each document is reduced to ``num_perm`` MinHash values of its word
+    shingles; the fraction of equal values estimates the Jaccard
+    similarity of two documents. The signature is cut into bands and a
+    document is only compared with documents sharing at least one whole
+    band, so a query costs a few dictionary lookups instead of a scan of
+    the index. This is the similarity check of new_arch.txt in front of
+    the downstream classifier: reports that are copies, reposts or light
+    edits of an indexed report can reuse its classification.
+
+    Args:
+        threshold (float, optional): Estimated Jaccard similarity from
+            which a document is a near-duplicate (default is 0.8).
+        num_perm (int, optional): MinHash permutations (default is 128).
+        shingle_size (int, optional): Words per shingle (default is 3).
+        seed (int, optional): Seed of the hash permutations. Indexes are
+            only comparable when built with the same seed (default is 1).
+    """
+
+    def __init__(self, threshold=0.8, num_perm=128, shingle_size=3, seed=1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        self.bands, self.rows = lsh_bands(threshold, num_perm)
+        # Multiply-shift hashing: (a * x + b) >> 32 over uint64, wrapping.
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 63, num_perm, dtype=np.uint64) | 1
+        self._b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+        self.keys = []
+        # Grown by doubling, so adding a document is amortised O(1).
+        self._signatures = np.empty((1024, num_perm), dtype=np.uint32)
+        self._buckets = [defaultdict(list) for _ in range(self.bands)]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def signature(self, text):
+        """Returns the MinHash signature of a text.
+
+        Args:
+            text (str): The document text.
+
+        Returns:
+            numpy.ndarray: ``num_perm`` uint32 MinHash values.
+        """
+        hashes = shingle_hashes(text, self.shingle_size)[:, None]
+        with np.errstate(over="ignore"):
+            permuted = (hashes * self._a + self._b) >> np.uint64(32)
+        return (permuted & _MAX_HASH).min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, signature):
+        return [
+            signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    def add(self, key, text=None, signature=None):
+        """Adds a document to the index.
+
+        Args:
+            key (str): Identifier returned by queries, e.g. the article
+                URL or STIX id.
+            text (str, optional): The document text.
+            signature (numpy.ndarray, optional): A precomputed signature,
+                used instead of ``text``.
+        """
+        if signature is None:
+            signature = self.signature(text)
+        position = len(self.keys)
+        if position == len(self._signatures):
+            self._signatures = np.concatenate(
+                [self._signatures, np.empty_like(self._signatures)]
+            )
+        self._signatures[position] = signature
+        self.keys.append(key)
+        for band, band_key in enumerate(self._band_keys(signature)):
+            self._buckets[band][band_key].append(position)
+
+    def query(self, text=None, signature=None):
+        """Finds indexed documents similar to a text.
+
+        Args:
+            text (str, optional): The document text.
+            signature (numpy.ndarray, optional): A precomputed signature,
+                used instead of ``text``.
+
+        Returns:
+            list[DuplicateMatch]: Documents whose estimated similarity
+            reaches ``threshold``, most similar first.
+        """
+        if signature is None:
+            signature = self.signature(text)
+        candidates = set()
+        for band, band_key in enumerate(self._band_keys(signature)):
+            candidates.update(self._buckets[band].get(band_key, ()))
+        if not candidates:
+            return []
+        positions = np.fromiter(candidates, dtype=np.int64)
+        similarity = (
+            self._signatures[positions] == signature
+        ).mean(axis=1)
+        keep = similarity >= self.threshold
+        order = np.argsort(-similarity[keep], kind="stable")
+        return [
+            DuplicateMatch(self.keys[position], float(score))
+            for position, score in zip(
+                positions[keep][order], similarity[keep][order]
+            )
+        ]
+
+    def check(self, key, text):
+        """Flags a document as a near-duplicate or adds it to the index.
+
+        Args:
+            key (str): Identifier of the document.
+            text (str): The document text.
+
+        Returns:
+            DuplicateMatch or None: The most similar indexed document when
+            the text is a near-duplicate (the text is then not indexed),
+            or None when it is new and has been added.
+        """
+        signature = self.signature(text)
+        matches = self.query(signature=signature)
+        if matches:
+            return matches[0]
+        self.add(key, signature=signature)
+        return None
+
+    def save(self, path):
+        """Writes the keys and signatures to a NumPy .npz file.
+
+        Args:
+            path (str): Destination file.
+        """
+        np.savez_compressed(
+            path, keys=np.array(self.keys, dtype=str),
+            signatures=self._signatures[:len(self.keys)],
+            settings=np.array([
+                self.threshold, self.num_perm, self.shingle_size, self.seed
+            ])
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Rebuilds an index written by ``save``.
+
+        Args:
+            path (str): File written by ``save``.
+
+        Returns:
+            NearDuplicateIndex: The index, with its buckets rebuilt.
+        """
+        with np.load(path) as data:
+            threshold, num_perm, shingle_size, seed = data["settings"]
+            index = cls(
+                threshold=float(threshold), num_perm=int(num_perm),
+                shingle_size=int(shingle_size), seed=int(seed)
+            )
+            for key, signature in zip(data["keys"], data["signatures"]):
+                index.add(str(key), signature=signature)
+        return index
@@ -1,50 +1,28 @@
-# Define the column name
-column_name = 'Account Telephone Global Trust Tags'
-
-# Step 1: Preprocess the column to extract individual tags
-def preprocess_tags(row):
-    """
-    Parses and extracts unique tags from the row.
-    Args:
-        row (str): The input row string.
-    Returns:
-        list: A list of extracted tags or an empty list if invalid.
-    """
-    if pd.isna(row) or not isinstance(row, str):
-        return []  # Return empty list for NaN or non-string values
-
-    # Remove curly braces and split by commas
-    tags = row.replace('{', '').replace('}', '').split(',')
-    # Strip whitespace from each tag
-    return [tag.strip() for tag in tags]
+import logging
+import argparse
+from tag_parser import add_vocabulary_arguments, tag_encoder_for
 
-# Apply preprocessing to extract tags
-filtered_df['parsed_tags'] = filtered_df[column_name].apply(preprocess_tags)
+logging.basicConfig(level=logging.INFO)
 
-# Step 2: Extract all unique tags
-def extract_unique_tags(column):
-    """
-    Extracts all unique tags from the preprocessed column.
-    Args:
-        column (pd.Series): The column containing lists of tags.
-    Returns:
-        set: A set of unique tags.
-    """
-    unique_tags = set()
-    for row in column.dropna():
-        unique_tags.update(row)
-    return unique_tags
-
-unique_tags = extract_unique_tags(filtered_df['parsed_tags'])
-
-# Step 3: Create one-hot encoded columns for each tag
-for tag in unique_tags:
-    filtered_df[f"{column_name}_{tag}"] = filtered_df['parsed_tags'].apply(
-        lambda x: 1 if tag in x else 0
-    )
+# Define the column name
+column_name = 'Account Telephone Global Trust Tags'
 
-# Drop the intermediate parsed column if no longer needed
-filtered_df = filtered_df.drop(columns=['parsed_tags'])
+# Vocabulary file and settings, e.g. `%run -i new_tele_ohe.py --fit --vocabulary
+# vocab.json` to train and `--vocabulary vocab.json` to score with the same
+# columns; by default every tag gets its own column
+args = add_vocabulary_arguments(argparse.ArgumentParser(
+    description="One-hot encode the Account Telephone Global Trust Tags tags of filtered_df."
+)).parse_args()
+
+# Step 1: Learn and save the vocabulary when training, load it when scoring
+tag_encoder = tag_encoder_for(
+    filtered_df, [column_name], args.vocabulary, fit=args.fit,
+    min_frequency=args.min_frequency, other_bucket=args.other_bucket
+)
+
+# Step 2: Parse each distinct row once and one-hot encode every tag as a
+# sparse "<column>_<tag>" column in a single join
+filtered_df = filtered_df.join(tag_encoder.transform_frame(filtered_df))
 
 # Display the resulting DataFrame
 print(filtered_df.head())
@@ -1,24 +1,123 @@
-from threat_metrix import ThreatMetrixDataExtraction
+from tm_1 import ThreatMetrixDataExtraction
+from ua1 import UserAgentAnalysis
+from module_dag import ModuleDAG
+from high_water_mark import HighWaterMark
 from datetime import datetime, timedelta
 
-def orchestrate_all_modules(api_key):
+def build_module_dag(threatmetrix_extractor, user_agent_analyzer, start_time,
+                     end_time):
+    """Declares the analysis modules of one orchestration window.
+
+    The raw ThreatMetrix window is fetched and flattened once; the
+    enrichment and user agent modules both depend only on the flattened
+    events, so they run concurrently.
+
+    Args:
+        threatmetrix_extractor (ThreatMetrixDataExtraction): Extractor
+            used for the fetch and the IP enrichment.
+        user_agent_analyzer (UserAgentAnalysis): User agent module.
+        start_time (str): Inclusive start of the window.
+        end_time (str): Exclusive end of the window.
+
+    Returns:
+        ModuleDAG: The declared, not yet run, module graph.
+    """
+    async def enrich_events(threat_metrix_events):
+        return await threatmetrix_extractor.enrich_events(
+            threat_metrix_events
+        )
+
+    async def analyze_user_agents(threat_metrix_events):
+        user_agents = threat_metrix_events['user_agent'].dropna().unique()
+        return await user_agent_analyzer.process_user_agents(
+            user_agents.tolist()
+        )
+
+    dag = ModuleDAG()
+    dag.add(
+        'threat_metrix_data',
+        lambda: threatmetrix_extractor.fetch_threat_metrix_data(
+            start_time, end_time
+        )
+    )
+    dag.add(
+        'threat_metrix_events',
+        lambda threat_metrix_data: threatmetrix_extractor.to_event_frame(
+            threat_metrix_data
+        ),
+        depends_on=['threat_metrix_data']
+    )
+    dag.add(
+        'threat_metrix_enrichment', enrich_events,
+        depends_on=['threat_metrix_events']
+    )
+    dag.add(
+        'user_agent_analysis', analyze_user_agents,
+        depends_on=['threat_metrix_events']
+    )
+    return dag
+
+def enrichment_complete(enrichment):
+    """Checks whether a window's enrichment fully succeeded.
+
+    ``enrich_events`` returns a bare empty DataFrame when the batch failed
+    and flags events whose IP lookup failed in 'enrichment_failed'; in
+    either case the window must be fetched again.
+
+    Args:
+        enrichment (pandas.DataFrame): Result of ``enrich_events``.
+
+    Returns:
+        bool: True when every event of the window was enriched (also for
+        a window without events).
+    """
+    return (
+        'enrichment_failed' in enrichment.columns
+        and not enrichment['enrichment_failed'].any()
+    )
+
+def orchestrate_all_modules(config_path="config.json",
+                            state_path="high_water_marks.json"):
     # Get the current system date and define a time window of 1 day
     current_time = datetime.now()
-    start_time = (current_time - timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S')
+    window_start = (current_time - timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S')
     end_time = current_time.strftime('%Y-%m-%d %H:%M:%S')
 
-    # Extract data from ThreatMetrix for the time window
-    threatmetrix_extractor = ThreatMetrixDataExtraction(api_key)
-    threatmetrix_data = threatmetrix_extractor.fetch_threatmetrix_data(start_time, end_time)
+    # Only fetch events newer than the last successful run
+    high_water_mark = HighWaterMark(state_path)
+    start_time = high_water_mark.window_start("threat_metrix", window_start)
+
+    # Modules share one BigQuery client, enrichment cache and metrics, and
+    # one scheduler, so their VirusTotal lookups share the key's quota
+    threatmetrix_extractor = ThreatMetrixDataExtraction(config_path)
+    user_agent_analyzer = UserAgentAnalysis(
+        config_path, client=threatmetrix_extractor.client,
+        cache=threatmetrix_extractor.cache,
+        metrics=threatmetrix_extractor.metrics,
+        scheduler=threatmetrix_extractor.scheduler
+    )
+
+    # Run independent modules concurrently on one event loop
+    dag = build_module_dag(
+        threatmetrix_extractor, user_agent_analyzer, start_time, end_time
+    )
+    module_results = dag.run()
 
+    # Advance the high-water mark only when the whole window was enriched,
+    # so failed or partial windows are fetched again by the next run
+    if enrichment_complete(module_results['threat_metrix_enrichment']):
+        high_water_mark.set("threat_metrix", end_time)
 
     # Combine and return all results in a single dictionary
     return {
         'start_time': start_time,
-        'end_time': end_time
+        'end_time': end_time,
+        'threat_metrix': module_results['threat_metrix_enrichment'],
+        'user_agents': module_results['user_agent_analysis'],
+        'module_timings': dag.timings,
+        'metrics': threatmetrix_extractor.metrics.summary()
     }
 
 if __name__ == "__main__":
-    api_key = "your_api_key_here"
-    final_results = orchestrate_all_modules(api_key)
+    final_results = orchestrate_all_modules("config.json")
     print(final_results)
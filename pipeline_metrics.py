@@ -0,0 +1,235 @@
+import json
+import time
+import random
+import logging
+from contextlib import contextmanager
+import numpy as np
+from atomic_write import atomic_write
+
+
+class PipelineMetrics:
+    """Collects per-stage latencies, counters and queue depths of a run.
+
+    Recording is cheap enough for hot paths: a latency sample is an
+    append to a list, a counter update is a dict increment. Latencies
+    are kept in a bounded reservoir per stage, so memory stays flat on
+    long runs while percentiles stay representative.
+
+    Args:
+        reservoir_size (int, optional): Maximum number of latency samples
+            kept per stage (default is 10,000).
+    """
+
+    def __init__(self, reservoir_size=10_000):
+        self.reservoir_size = reservoir_size
+        self.reset()
+
+    def reset(self):
+        """Discards everything recorded so far."""
+        self._samples = {}
+        self._stage_counts = {}
+        self._stage_totals = {}
+        self._stage_max = {}
+        self.counters = {}
+        self.gauges = {}
+        self.gauge_max = {}
+
+    def observe(self, stage, seconds):
+        """Records one latency sample for ``stage``.
+
+        Args:
+            stage (str): Stage name, e.g. 'virustotal_request'.
+            seconds (float): Duration of the sample.
+        """
+        count = self._stage_counts.get(stage, 0) + 1
+        self._stage_counts[stage] = count
+        total = self._stage_totals.get(stage, 0.0) + seconds
+        self._stage_totals[stage] = total
+        if seconds > self._stage_max.get(stage, 0.0):
+            self._stage_max[stage] = seconds
+        samples = self._samples.setdefault(stage, [])
+        if len(samples) < self.reservoir_size:
+            samples.append(seconds)
+        else:
+            # Reservoir sampling keeps a uniform sample of all durations.
+            slot = random.randrange(count)
+            if slot < self.reservoir_size:
+                samples[slot] = seconds
+
+    @contextmanager
+    def timer(self, stage):
+        """Times the enclosed block as one sample of ``stage``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def increment(self, name, value=1, **labels):
+        """Adds ``value`` to a counter.
+
+        Args:
+            name (str): Counter name, e.g. 'http_responses'.
+            value (int, optional): Amount to add (default is 1).
+            **labels: Label values distinguishing series of the counter,
+                e.g. ``provider='censys', status=429``.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value):
+        """Sets a gauge such as a queue depth and tracks its maximum."""
+        self.gauges[name] = value
+        self.gauge_max[name] = max(value, self.gauge_max.get(name, value))
+
+    def adjust_gauge(self, name, delta):
+        """Moves a gauge by ``delta``, e.g. +1/-1 around a request."""
+        self.set_gauge(name, self.gauges.get(name, 0) + delta)
+
+    def stages(self):
+        """Returns the latency summary of every stage.
+
+        Returns:
+            dict: Stage name to count, total, mean, p50, p95, p99 and max,
+            all durations in seconds.
+        """
+        summary = {}
+        for stage, samples in self._samples.items():
+            count = self._stage_counts[stage]
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            summary[stage] = {
+                'count': count,
+                'total': self._stage_totals[stage],
+                'mean': self._stage_totals[stage] / count,
+                'p50': float(p50),
+                'p95': float(p95),
+                'p99': float(p99),
+                'max': self._stage_max[stage]
+            }
+        return summary
+
+    def summary(self):
+        """Returns every recorded figure as a JSON-serialisable dict."""
+        return {
+            'stages': self.stages(),
+            'counters': [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self.counters.items(),
+                                                   key=str)
+            ],
+            'gauges': {
+                name: {'value': value, 'max': self.gauge_max[name]}
+                for name, value in self.gauges.items()
+            }
+        }
+
+    def to_json(self, **kwargs):
+        """Returns ``summary`` as a JSON string."""
+        return json.dumps(self.summary(), **kwargs)
+
+    def to_prometheus(self, prefix="cycad"):
+        """Renders the metrics in the Prometheus text exposition format.
+
+        Stage latencies become summaries with 0.5, 0.95 and 0.99
+        quantiles, counters become counters and gauges become gauges.
+
+        Args:
+            prefix (str, optional): Prefix of every metric name (default
+                is "cycad").
+
+        Returns:
+            str: The exposition text, ending with a newline.
+        """
+        def format_labels(labels):
+            if not labels:
+                return ""
+            pairs = ",".join(
+                f'{key}="{str(value)}"' for key, value in labels
+            )
+            return f"{{{pairs}}}"
+
+        lines = []
+        stage_metric = f"{prefix}_stage_duration_seconds"
+        lines.append(f"# TYPE {stage_metric} summary")
+        for stage, figures in self.stages().items():
+            for quantile in ('p50', 'p95', 'p99'):
+                labels = format_labels((
+                    ('stage', stage),
+                    ('quantile', f"0.{quantile[1:]}")
+                ))
+                lines.append(f"{stage_metric}{labels} {figures[quantile]}")
+            labels = format_labels((('stage', stage),))
+            lines.append(f"{stage_metric}_sum{labels} {figures['total']}")
+            lines.append(f"{stage_metric}_count{labels} {figures['count']}")
+
+        seen = set()
+        for (name, labels), value in sorted(self.counters.items(), key=str):
+            metric = f"{prefix}_{name}_total"
+            if metric not in seen:
+                lines.append(f"# TYPE {metric} counter")
+                seen.add(metric)
+            lines.append(f"{metric}{format_labels(labels)} {value}")
+
+        for name, value in self.gauges.items():
+            metric = f"{prefix}_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, logger, prometheus_path=None):
+        """Logs the JSON summary of a run and optionally writes Prometheus.
+
+        Args:
+            logger (logging.Logger): Logger receiving the JSON summary.
+            prometheus_path (str, optional): File to write the Prometheus
+                text to, e.g. for the node exporter's textfile collector.
+                The file is replaced with ``atomic_write``.
+
+        Returns:
+            dict: The summary that was logged.
+        """
+        summary = self.summary()
+        logger.info(f"Run metrics: {json.dumps(summary)}")
+        if prometheus_path:
+            with atomic_write(prometheus_path) as tmp_path:
+                with open(tmp_path, "w") as prometheus_file:
+                    prometheus_file.write(self.to_prometheus())
+        return summary
+
+
+class SampledLogger:
+    """Logs only every ``every``-th message of each kind.
+
+    Repeated per-event messages (one per successful request) cost real
+    time on large runs; this keeps the first message of each kind and
+    then one in ``every``, with the number of suppressed messages.
+
+    Args:
+        logger (logging.Logger): Logger to write to.
+        every (int, optional): Sampling interval (default is 1,000).
+    """
+
+    def __init__(self, logger, every=1000):
+        self.logger = logger
+        self.every = every
+        self._counts = {}
+
+    def log(self, key, message, level=logging.INFO):
+        """Counts a message of kind ``key`` and logs it if sampled.
+
+        Args:
+            key (str): Kind of message, e.g. 'virustotal_success'.
+            message (str or callable): The message, or a callable building
+                it, so unsampled messages are never formatted.
+            level (int, optional): Log level (default is INFO).
+        """
+        count = self._counts.get(key, 0) + 1
+        self._counts[key] = count
+        if (count - 1) % self.every:
+            return
+        if not self.logger.isEnabledFor(level):
+            return
+        text = message() if callable(message) else message
+        if count > 1:
+            text = f"{text} ({count} so far)"
+        self.logger.log(level, text)
@@ -1,35 +1,25 @@
-import json
-from datetime import datetime
 import pandas as pd
+from sampler3 import top_recent_articles
 
 
 def load_and_sort_articles(json_file):
     """
-    Load articles from a JSON file, sort by published date, and return the 100 most recent articles.
+    Stream articles from JSON metadata files and return the 100 most recent articles by published date.
+
+    Articles are read incrementally and ranked with a bounded heap, so memory stays constant however
+    large the files are. Articles whose date cannot be parsed are skipped.
 
     Args:
-        json_file (str): Path to the JSON file containing metadata.
+        json_file (str or list): Path to the JSON file containing metadata, a directory of them, or a list of either.
 
     Returns:
         pd.DataFrame: A DataFrame containing the 100 most recent articles with title, URL, and published date.
     """
     try:
-        # Load metadata from the JSON file
-        with open(json_file, "r") as f:
-            metadata = json.load(f)
-
-        # Extract articles
-        articles = metadata.get("articles", [])
-
-        # Parse and sort articles by published date
-        sorted_articles = sorted(
-            articles,
-            key=lambda x: datetime.strptime(x["published_date"], "%Y-%m-%dT%H:%M:%SZ"),
-            reverse=True,
-        )
-
-        # Select the 100 most recent articles
-        most_recent_articles = sorted_articles[:100]
+        # Select the 100 most recent articles, most recent first
+        most_recent_articles = [
+            article for _, article in top_recent_articles(json_file, top_n=100)
+        ]
 
         # Format the result as a pandas DataFrame
         formatted_table = pd.DataFrame(
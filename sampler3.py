@@ -1,72 +1,170 @@
+import os
+import glob
 import json
-from datetime import datetime, timezone
+import heapq
+import itertools
+import numpy as np
 import pandas as pd
+from article_store import ArticleStore
+# Re-exported: the date parsers used to be defined in this module.
+from date_normalizer import DateNormalizer, parse_date, parse_dates
 
+try:
+    import ijson
+except ImportError:  # Streaming is optional; without it files are loaded whole.
+    ijson = None
 
-def parse_date(date_str):
+
+def metadata_files(paths):
+    """
+    List the JSON metadata files under the given paths.
+
+    Args:
+        paths (str or list): A metadata file, a directory of them (e.g. rss_metadata), or a list of either.
+
+    Returns:
+        list: File paths, with each directory's *.json files in name (i.e. run timestamp) order.
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.json"))))
+        else:
+            files.append(path)
+    return files
+
+
+def iter_article_batches(json_file, batch_size=10_000):
+    """
+    Read the articles array of a metadata file incrementally, in batches.
+
+    With ijson installed only one batch is held in memory at a time; otherwise the file is loaded whole.
+
+    Args:
+        json_file (str): Path to the JSON file containing RSS feed metadata.
+        batch_size (int): Number of articles per batch.
+
+    Yields:
+        list: Article dicts with title, url and published_date keys.
+    """
+    with open(json_file, "rb") as f:
+        if ijson is None:
+            articles = json.load(f).get("articles", [])
+            for start in range(0, len(articles), batch_size):
+                yield articles[start:start + batch_size]
+            return
+        batch = []
+        for article in ijson.items(f, "articles.item"):
+            batch.append(article)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def _unique_url_candidates(batch, candidates, stamps, urls_in_heap):
+    """
+    Drop candidates whose URL is already in the heap or repeats within the batch.
+
+    A repeated URL keeps its newest (then first) occurrence. This runs before the per-batch top-N
+    preselection, so duplicates cannot take the slots of distinct articles. Articles without a URL
+    are all kept.
+    """
+    unique, newest = [], {}
+    for i in candidates:
+        url = batch[i].get("url")
+        if not url or url == "No URL":
+            unique.append(i)
+        elif url not in urls_in_heap and (url not in newest or stamps[i] > stamps[newest[url]]):
+            newest[url] = i
+    return np.sort(np.array(unique + list(newest.values()), dtype=np.int64))
+
+
+def top_recent_articles(paths, top_n=100, batch_size=10_000):
     """
-    Parse a date string into a timezone-aware datetime object, handling multiple formats.
+    Select the most recent articles across metadata files with a bounded heap.
+
+    Articles are streamed batch by batch; each batch's dates are parsed in one pass and only articles
+    newer than the current N-th most recent reach the heap, so memory stays O(top_n + batch_size)
+    however large the archive is. An article URL seen in several runs is kept once.
 
     Args:
-        date_str (str): The date string to parse.
+        paths (str or list): A metadata file, a directory of them, or a list of either.
+        top_n (int): Number of most recent articles to retrieve.
+        batch_size (int): Number of articles parsed at a time.
 
     Returns:
-        datetime: A timezone-aware datetime object if parsing is successful; None otherwise.
+        list: (published timestamp in UTC, article dict) pairs, most recent first. Articles without
+            a parseable date are skipped.
     """
-    date_formats = [
-        "%Y-%m-%dT%H:%M:%SZ",  # ISO 8601 format
-        "%a, %d %b %Y %H:%M:%S %z",  # RSS format
+    heap = []  # (published ns, -arrival, article); the oldest kept article is heap[0]
+    urls_in_heap = set()
+    arrival = itertools.count()
+    for json_file in metadata_files(paths):
+        for batch in iter_article_batches(json_file, batch_size):
+            published = parse_dates([article.get("published_date") for article in batch])
+            stamps = published.to_numpy(dtype="datetime64[ns]").view("int64")
+            keep = published.notna().to_numpy(dtype=bool, copy=True)
+            if len(heap) == top_n:
+                keep &= stamps >= heap[0][0]
+            candidates = _unique_url_candidates(batch, keep.nonzero()[0], stamps, urls_in_heap)
+            if len(candidates) > top_n:
+                # Only the batch's own top N can enter the heap.
+                newest = np.argpartition(-stamps[candidates], top_n - 1)[:top_n]
+                candidates = np.sort(candidates[newest])
+            for i in candidates:
+                article = batch[i]
+                url = article.get("url")
+                if url in urls_in_heap:
+                    continue
+                entry = (int(stamps[i]), -next(arrival), article)
+                if len(heap) < top_n:
+                    heapq.heappush(heap, entry)
+                elif entry[:2] > heap[0][:2]:
+                    urls_in_heap.discard(heapq.heapreplace(heap, entry)[2].get("url"))
+                else:
+                    continue
+                if url and url != "No URL":
+                    urls_in_heap.add(url)
+    return [
+        (pd.Timestamp(stamp, unit="ns", tz="UTC"), article)
+        for stamp, _, article in sorted(heap, key=lambda entry: entry[:2], reverse=True)
     ]
-    for date_format in date_formats:
-        try:
-            parsed_date = datetime.strptime(date_str, date_format)
-            if parsed_date.tzinfo is None:
-                # If the parsed date is naive, set it to UTC
-                parsed_date = parsed_date.replace(tzinfo=timezone.utc)
-            return parsed_date
-        except ValueError:
-            continue
-    return None  # Return None if no formats match
 
 
 def get_recent_articles(json_file, top_n=100):
     """
-    Extract the most recent articles from a JSON metadata file and organize them into a table.
+    Extract the most recent articles from JSON metadata files and organize them into a table.
+
+    Articles are streamed and ranked with a bounded heap (see top_recent_articles), so memory does
+    not grow with the size of the files.
 
     Args:
-        json_file (str): Path to the JSON file containing RSS feed metadata.
+        json_file (str or list): Path to a JSON file containing RSS feed metadata, a directory of
+            them (e.g. rss_metadata), or a list of either.
         top_n (int): Number of most recent articles to retrieve.
 
     Returns:
         pd.DataFrame: A DataFrame containing the title, URL, and published date of the most recent articles.
     """
     try:
-        # Load the JSON file
-        with open(json_file, "r") as f:
-            metadata = json.load(f)
-
-        # Extract articles and their publication dates
-        articles = []
-        for article in metadata.get("articles", []):
-            title = article.get("title", "No Title")
-            url = article.get("url", "No URL")
-            published_date_str = article.get("published_date", "No Date")
-            published_date = parse_date(published_date_str)
-            if published_date:
-                articles.append({"title": title, "url": url, "published_date": published_date})
-
-        if not articles:
+        recent = top_recent_articles(json_file, top_n)
+
+        if not recent:
             print("No articles found or all dates were invalid.")
             return None
 
-        # Sort articles by published_date in descending order
-        articles.sort(key=lambda x: x["published_date"], reverse=True)
-
-        # Take the top N articles
-        recent_articles = articles[:top_n]
-
-        # Convert to a DataFrame for display
-        df = pd.DataFrame(recent_articles)
+        df = pd.DataFrame([
+            {
+                "title": article.get("title") or "No Title",
+                "url": article.get("url") or "No URL",
+                "published_date": published_date,
+            }
+            for published_date, article in recent
+        ])
         df["published_date"] = df["published_date"].dt.strftime("%Y-%m-%d %H:%M:%S %Z")
         return df
 
@@ -75,12 +173,36 @@ def get_recent_articles(json_file, top_n=100):
         return None
 
 
+def get_recent_stored_articles(store_path="rss_metadata/articles.sqlite", top_n=100):
+    """
+    Retrieve the most recent articles across all collection runs from the article store.
+
+    Args:
+        store_path (str): Path to the SQLite article store written by process_feeds.
+        top_n (int): Number of most recent articles to retrieve.
+
+    Returns:
+        pd.DataFrame: A DataFrame containing the title, URL, and published date of the most recent articles.
+    """
+    store = ArticleStore(store_path)
+    try:
+        df = store.recent(top_n)
+    finally:
+        store.close()
+    if df.empty:
+        print("No articles found or all dates were invalid.")
+        return None
+    df["published_date"] = df["published_date"].dt.strftime("%Y-%m-%d %H:%M:%S %Z")
+    return df
+
+
 # Example usage:
-json_file = "rss_metadata/2024-11-30T20:41:23Z.json"  # Replace with the actual path to your JSON file
-top_n = 100  # Number of most recent articles to retrieve
-
-recent_articles_df = get_recent_articles(json_file, top_n)
-if recent_articles_df is not None:
-    print(recent_articles_df)
-else:
-    print("No articles found or an error occurred.")
+if __name__ == "__main__":
+    store_path = "rss_metadata/articles.sqlite"  # Replace with the actual path to your article store
+    top_n = 100  # Number of most recent articles to retrieve
+
+    recent_articles_df = get_recent_stored_articles(store_path, top_n)
+    if recent_articles_df is not None:
+        print(recent_articles_df)
+    else:
+        print("No articles found or an error occurred.")
@@ -1,4 +1,12 @@
+import os
 import re
+import glob
+import pandas as pd
+
+try:
+    import ijson
+except ImportError:  # Streaming is optional; without it bundles are loaded whole.
+    ijson = None
 
 def extract_urls_from_description(description):
     """
@@ -43,16 +51,171 @@ def extract_urls_from_stix(stix_json):
 
     return url_mapping
 
+
+# Every indicator type in one alternation, so a text is scanned once. The word boundary is
+# factored out of the branches, so positions inside words are rejected with a single check, and
+# labels are matched possessively so failed domain candidates do not backtrack. URLs come first so
+# the domains and IPs inside them are not reported separately. Hashes are told apart by length.
+INDICATOR_PATTERN = re.compile(
+    r"\b(?=\w)(?:"
+    r"(?P<url>(?:[hH][tT][tT][pP][sS]?|[fF][tT][pP])://[^\s'\"<>\[\]{}|\\^`]+)"
+    r"|(?P<cve>[cC][vV][eE]-\d{4}-\d{4,7}\b)"
+    r"|(?P<ipv4>(?:(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\.){3}(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\b)"
+    r"|(?P<hash>[a-fA-F0-9]{32}(?:[a-fA-F0-9]{8}(?:[a-fA-F0-9]{24})?)?\b)"
+    r"|(?P<domain>(?:[a-zA-Z0-9-]{1,63}+\.)+[a-zA-Z]{2,63}\b)"
+    r")"
+)
+_HASH_TYPES = {32: "md5", 40: "sha1", 64: "sha256"}
+
+# Defanged forms analysts use in reports, e.g. hxxp://evil[.]com.
+_REFANG = [("hxxps://", "https://"), ("hxxp://", "http://"), ("[.]", "."), ("(.)", "."), ("[:]", ":")]
+
+# Extensions that look like top-level domains in file names ("payload.exe").
+FILE_EXTENSIONS = frozenset({
+    "exe", "dll", "sys", "bat", "cmd", "ps1", "vbs", "js", "jar", "zip", "rar", "7z", "gz", "tar",
+    "doc", "docx", "docm", "xls", "xlsx", "xlsm", "ppt", "pptx", "pdf", "rtf", "txt", "log", "ini",
+    "dat", "tmp", "bin", "lnk", "hta", "msi", "iso", "img", "png", "jpg", "gif", "php", "asp",
+    "aspx", "jsp", "html", "htm", "py", "sh", "so", "elf", "apk", "json", "xml", "csv", "yaml",
+})
+
+# Fields that never hold indicators: identifiers, references and timestamps.
+_SKIPPED_FIELDS = frozenset({"id", "type", "spec_version", "created", "modified", "created_by_ref",
+                             "object_marking_refs", "valid_from", "valid_until", "first_seen",
+                             "last_seen", "lang"})
+
+
+def extract_indicators(text):
+    """
+    Extract URLs, domains, IPv4 addresses, file hashes and CVE IDs from text in one regex pass.
+
+    Args:
+        text (str): Free text, e.g. STIX descriptions and patterns. Defanged indicators are refanged.
+
+    Returns:
+        list: (indicator type, value) tuples in order of appearance. Domains, hashes and CVE IDs are
+            normalised to lower case (CVE IDs to upper case).
+    """
+    if not text:
+        return []
+    for defanged, refanged in _REFANG:
+        if defanged in text:
+            text = text.replace(defanged, refanged)
+    indicators = []
+    for match in INDICATOR_PATTERN.finditer(text):
+        kind = match.lastgroup
+        value = match.group()
+        if kind == "url":
+            value = value.rstrip(".,;:!?)")
+        elif kind == "cve":
+            value = value.upper()
+        elif kind == "hash":
+            kind = _HASH_TYPES[len(value)]
+            value = value.lower()
+        else:
+            value = value.lower()
+            if value.rsplit(".", 1)[1] in FILE_EXTENSIONS or "-." in value or ".-" in value:
+                continue
+        indicators.append((kind, value))
+    return indicators
+
+
+def _object_text(value):
+    """Collect every string inside a STIX object, skipping identifier and timestamp fields."""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        return [
+            text for key, item in value.items()
+            if key not in _SKIPPED_FIELDS and not key.endswith(("_ref", "_refs"))
+            for text in _object_text(item)
+        ]
+    if isinstance(value, list):
+        return [text for item in value for text in _object_text(item)]
+    return []
+
+
+def stix_files(paths):
+    """
+    List the STIX bundle files under the given paths.
+
+    Args:
+        paths (str or list): A bundle file, a directory of them (searched recursively for *.json), or a list of either.
+
+    Returns:
+        list: File paths in name order.
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "**", "*.json"), recursive=True)))
+        else:
+            files.append(path)
+    return files
+
+
+def iter_stix_objects(paths):
+    """
+    Stream the objects of STIX bundles (or TAXII envelopes) one at a time.
+
+    With ijson installed only one object is held in memory at a time; otherwise each file is loaded whole.
+
+    Args:
+        paths (str or list): A bundle file, a directory of them, or a list of either.
+
+    Yields:
+        dict: STIX objects of every type.
+    """
+    for stix_file in stix_files(paths):
+        with open(stix_file, "rb") as f:
+            if ijson is None:
+                yield from json.load(f).get("objects", [])
+            else:
+                yield from ijson.items(f, "objects.item", use_float=True)
+
+
+def extract_indicators_from_stix(paths, object_types=None):
+    """
+    Extract indicators from every object of many STIX bundles into a deduplicated table.
+
+    All text of an object (descriptions, names, patterns, external references, custom fields) is
+    joined and scanned once with INDICATOR_PATTERN. Each (STIX id, indicator type, value) is kept
+    once, however many bundles or fields it appears in.
+
+    Args:
+        paths (str or list): A bundle file, a directory of them (e.g. a TAXII dump), or a list of either.
+        object_types (set, optional): Only scan objects of these types; all types by default.
+
+    Returns:
+        pd.DataFrame: One row per indicator with 'stix_id', 'stix_type', 'indicator_type' and 'value'.
+    """
+    seen = set()
+    rows = []
+    for obj in iter_stix_objects(paths):
+        stix_type = obj.get("type")
+        if object_types is not None and stix_type not in object_types:
+            continue
+        stix_id = obj.get("id")
+        for kind, value in extract_indicators("\n".join(_object_text(obj))):
+            key = (stix_id, kind, value)
+            if key not in seen:
+                seen.add(key)
+                rows.append((stix_id, stix_type, kind, value))
+    return pd.DataFrame(rows, columns=["stix_id", "stix_type", "indicator_type", "value"])
+
+
 # Example usage
-stix_json = '...'  # Replace with your STIX JSON string
-url_mapping = extract_urls_from_stix(stix_json)
-
-# Print the results
-for intrusion_id, urls in url_mapping.items():
-    print(f"Intrusion Set ID: {intrusion_id}")
-    for url in urls:
-        print(f" - {url}")
-
-# Save to a file
-with open("extracted_urls.json", "w") as f:
-    json.dump(url_mapping, f, indent=4)
+if __name__ == "__main__":
+    stix_json = '...'  # Replace with your STIX JSON string
+    url_mapping = extract_urls_from_stix(stix_json)
+
+    # Print the results
+    for intrusion_id, urls in url_mapping.items():
+        print(f"Intrusion Set ID: {intrusion_id}")
+        for url in urls:
+            print(f" - {url}")
+
+    # Save to a file
+    with open("extracted_urls.json", "w") as f:
+        json.dump(url_mapping, f, indent=4)
@@ -0,0 +1,201 @@
+import json
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from scipy import sparse
+from tag_parser import TMX_TAG_COLUMNS, TagEncoder, add_vocabulary_arguments
+from atomic_write import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Parquet key-value metadata describing the encoded tag column.
+_FEATURES_KEY = b"cycad.tag_features"
+_LAYOUT_KEY = b"cycad.tag_layout"
+LAYOUTS = ("indices", "bits")
+
+
+def iter_chunks(path, chunk_size=100_000, columns=None):
+    """Reads a CSV or Parquet file in chunks of rows.
+
+    Args:
+        path (str): A ``.parquet`` file, or a CSV file otherwise.
+        chunk_size (int, optional): Rows per chunk (default is 100,000).
+        columns (list[str], optional): Columns to read (default is all).
+
+    Yields:
+        pd.DataFrame: Consecutive chunks of at most ``chunk_size`` rows.
+    """
+    if path.endswith(".parquet"):
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(
+            path, chunksize=chunk_size, usecols=columns, dtype=str
+        )
+
+
+def fit_tag_vocabulary(path, columns=TMX_TAG_COLUMNS, chunk_size=100_000,
+                       min_frequency=1, other_bucket=None):
+    """Learns the tag vocabulary of a file without loading it whole.
+
+    Args:
+        path (str): CSV or Parquet source.
+        columns (tuple[str], optional): Tag columns (default is
+            ``TMX_TAG_COLUMNS``).
+        chunk_size (int, optional): Rows per chunk (default is 100,000).
+        min_frequency (int, optional): See ``TagEncoder``.
+        other_bucket (str, optional): See ``TagEncoder``.
+
+    Returns:
+        TagEncoder: The fitted encoder, e.g. to ``save`` for scoring.
+    """
+    encoder = TagEncoder(
+        columns=columns, min_frequency=min_frequency, other_bucket=other_bucket
+    )
+    for chunk in iter_chunks(path, chunk_size, columns=list(columns)):
+        encoder.partial_fit(chunk)
+    return encoder
+
+
+def _tag_array(matrix, layout):
+    """Converts a chunk's indicator matrix to one Arrow column."""
+    if layout == "indices":
+        return pa.ListArray.from_arrays(
+            pa.array(matrix.indptr.astype(np.int32)),
+            pa.array(matrix.indices.astype(np.int32)),
+        )
+    packed = np.packbits(matrix.toarray(), axis=1, bitorder="little")
+    return pa.Array.from_buffers(
+        pa.binary(packed.shape[1]), packed.shape[0],
+        [None, pa.py_buffer(np.ascontiguousarray(packed).tobytes())],
+    )
+
+
+def encode_tag_file(source, destination, encoder, chunk_size=100_000,
+                    keep_columns=(), layout="indices"):
+    """Encodes the tag columns of a large file chunk by chunk to Parquet.
+
+    Only one chunk of rows is held in memory at a time. The tags of each
+    row are written as a single ``tags`` column next to ``keep_columns``:
+
+    * ``"indices"``: a list of the row's feature indices (sparse).
+    * ``"bits"``: the row's indicators packed into a fixed-size binary
+      value, bit ``i % 8`` of byte ``i // 8`` for feature ``i``.
+
+    The feature names are stored in the file metadata; ``read_tag_matrix``
+    decodes either layout. The file is written with ``atomic_write``, so
+    a failed run leaves neither a partial file nor a stale temporary one.
+
+    Args:
+        source (str): CSV or Parquet file to encode.
+        destination (str): Parquet file to write.
+        encoder (TagEncoder): Fitted encoder, e.g. ``TagEncoder.load`` of
+            the training vocabulary, so every chunk gets the same layout.
+        chunk_size (int, optional): Rows per chunk (default is 100,000).
+        keep_columns (tuple[str], optional): Source columns copied as is,
+            e.g. an event id.
+        layout (str, optional): "indices" (default) or "bits".
+
+    Returns:
+        int: Number of rows written.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"layout must be one of {LAYOUTS}, got {layout!r}")
+    if encoder.encoders_ is None:
+        raise ValueError("TagEncoder is not fitted; call fit first.")
+    metadata = {
+        _FEATURES_KEY: json.dumps(encoder.feature_names_).encode(),
+        _LAYOUT_KEY: layout.encode(),
+    }
+    columns = list(keep_columns) + [
+        column for column in encoder.columns if column not in keep_columns
+    ]
+    writer = None
+    n_rows = 0
+    with atomic_write(destination) as tmp_path:
+        try:
+            for chunk in iter_chunks(source, chunk_size, columns=columns):
+                table = pa.Table.from_arrays(
+                    [pa.array(chunk[column], from_pandas=True) for column in keep_columns]
+                    + [_tag_array(encoder.transform(chunk), layout)],
+                    names=list(keep_columns) + ["tags"],
+                )
+                if writer is None:
+                    schema = table.schema.with_metadata(metadata)
+                    writer = pq.ParquetWriter(tmp_path, schema)
+                writer.write_table(table.cast(schema))
+                n_rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            raise ValueError(f"{source} has no rows to encode")
+    return n_rows
+
+
+def read_tag_matrix(path, columns=()):
+    """Reads a file written by ``encode_tag_file`` back into memory.
+
+    Args:
+        path (str): The encoded Parquet file.
+        columns (tuple[str], optional): Kept columns to return as well.
+
+    Returns:
+        tuple: (scipy.sparse.csr_matrix of uint8 indicators, list of
+        feature names, pd.DataFrame of ``columns``).
+    """
+    table = pq.read_table(path, columns=list(columns) + ["tags"])
+    metadata = table.schema.metadata
+    features = json.loads(metadata[_FEATURES_KEY])
+    tags = table.column("tags").combine_chunks()
+    if metadata[_LAYOUT_KEY] == b"indices":
+        offsets = tags.offsets.to_numpy()
+        indices = tags.flatten().to_numpy()
+        matrix = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.uint8), indices, offsets - offsets[0]),
+            shape=(len(tags), len(features)),
+        )
+    else:
+        packed = np.frombuffer(
+            tags.buffers()[1], dtype=np.uint8,
+            count=len(tags) * tags.type.byte_width,
+            offset=tags.offset * tags.type.byte_width,
+        ).reshape(len(tags), tags.type.byte_width)
+        matrix = sparse.csr_matrix(np.unpackbits(
+            packed, axis=1, count=len(features), bitorder="little"
+        ))
+    return matrix, features, table.drop_columns(["tags"]).to_pandas()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Encode the tag columns of a large TMX export to Parquet in chunks."
+    )
+    parser.add_argument("source", help="CSV or Parquet export")
+    parser.add_argument("destination", help="Parquet file to write")
+    add_vocabulary_arguments(parser)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--layout", choices=LAYOUTS, default="indices")
+    parser.add_argument("--keep", nargs="*", default=[], help="Columns copied as is")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.fit:
+        tag_encoder = fit_tag_vocabulary(
+            args.source, chunk_size=args.chunk_size,
+            min_frequency=args.min_frequency, other_bucket=args.other_bucket,
+        )
+        tag_encoder.save(args.vocabulary)
+        logger.info(f"Saved the tag vocabulary to {args.vocabulary}")
+    else:
+        tag_encoder = TagEncoder.load(args.vocabulary)
+        logger.info(f"Loaded the tag vocabulary from {args.vocabulary}")
+    rows = encode_tag_file(
+        args.source, args.destination, tag_encoder, chunk_size=args.chunk_size,
+        keep_columns=args.keep, layout=args.layout,
+    )
+    print(f"Encoded {rows} rows into {len(tag_encoder.feature_names_)} tag features")
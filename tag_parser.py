@@ -0,0 +1,347 @@
+import ast
+import json
+import logging
+from functools import lru_cache
+import pandas as pd
+from scipy import sparse
+from multi_hot import MultiHotEncoder
+from atomic_write import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# ThreatMetrix columns holding tag collections.
+TMX_TAG_COLUMNS = (
+    "Reasons",
+    "Account Telephone Global Trust Tags",
+    "Device Health Reasons",
+)
+# Curly quotes pasted from spreadsheets, replaced before the second parse.
+_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+_LITERAL_ERRORS = (ValueError, SyntaxError, TypeError, MemoryError, RecursionError)
+
+
+def _literal_tags(value):
+    """Returns the tags of a parsed Python literal.
+
+    Dictionaries contribute their keys, sets, lists and tuples their
+    members (the keys of member dictionaries), anything else itself.
+    """
+    if isinstance(value, dict):
+        return [str(key) for key in value]
+    if isinstance(value, (set, frozenset, list, tuple)):
+        tags = []
+        for member in value:
+            tags.extend(
+                _literal_tags(member) if isinstance(member, dict) else [str(member)]
+            )
+        return tags
+    return [str(value)]
+
+
+@lru_cache(maxsize=65_536)
+def parse_tags(raw):
+    """Parses one raw tag cell into its set of tags.
+
+    Recognises the formats found in the ThreatMetrix tag columns, trying
+    them in order:
+
+    1. A Python literal: a dictionary (``"{'tag': 'value'}"``), several
+       comma-separated dictionaries, a set (``'{"tag1","tag2"}'``) or a
+       list. Tags are dictionary keys or collection members.
+    2. The same literal with curly quotes straightened.
+    3. Bare tags: braces removed and the rest split on commas
+       (``"{tag1, tag2}"`` or a single ``"{tag}"``).
+
+    Raw cells repeat heavily, so results are memoized and each distinct
+    string is only parsed once per process.
+
+    Args:
+        raw (str): The cell string.
+
+    Returns:
+        frozenset: The tags, without empty ones.
+    """
+    for text in (raw, raw.translate(_QUOTES)):
+        try:
+            tags = _literal_tags(ast.literal_eval(text.strip()))
+            break
+        except _LITERAL_ERRORS:
+            continue
+    else:
+        tags = raw.replace("{", "").replace("}", "").split(",")
+    return frozenset(tag.strip() for tag in tags) - {""}
+
+
+def parse_single_tag(raw):
+    """Parses a cell holding one tag in braces, e.g. ``"{tag}"``.
+
+    The whole cell without braces is the tag, commas and quotes included,
+    as the Device Health Reasons features have always been named.
+
+    Args:
+        raw (str): The cell string.
+
+    Returns:
+        frozenset: The tag, or nothing for an empty cell.
+    """
+    return frozenset({raw.replace("{", "").replace("}", "").strip()}) - {""}
+
+
+# Cell parsers a saved vocabulary can refer to by name.
+_PARSERS = {parser.__name__: parser for parser in (parse_tags, parse_single_tag)}
+# Columns not parsed with ``parse_tags``.
+COLUMN_PARSERS = {"Device Health Reasons": parse_single_tag}
+
+
+class TagEncoder:
+    """One-hot encodes several tag columns of a frame in one pass.
+
+    Each column gets a ``MultiHotEncoder`` with its cell parser, so every
+    distinct raw cell is parsed once and the rows are encoded as sparse
+    indicator rows. The per-column matrices are stacked side by side and
+    returned as a single frame, instead of inserting one dense column per
+    tag into the source frame.
+
+    The fitted vocabulary (per column: tag to column index, and the
+    number of training cells holding each tag) is saved with ``save``.
+    Scoring loads it with ``load`` and skips tag discovery, so batches
+    always get the model's exact columns; rare and unseen tags go to a
+    ``"<column>_<other_bucket>"`` column when a bucket is configured.
+
+    Cells are parsed with ``parse_tags`` unless ``parsers`` (by default
+    ``COLUMN_PARSERS``) names another parser for the column; Device
+    Health Reasons keeps its one-tag-per-cell layout.
+
+    Args:
+        columns (tuple[str], optional): Tag columns to encode (default is
+            ``TMX_TAG_COLUMNS``).
+        min_frequency (int, optional): Training cells a tag must appear in
+            to get its own column (default is 1).
+        other_bucket (str, optional): Tag name of the per-column column
+            collecting rare and unseen tags, e.g. "other". Without it
+            they are dropped (default).
+        parsers (dict, optional): Cell parser per column, overriding
+            ``COLUMN_PARSERS``. Only ``parse_tags`` and
+            ``parse_single_tag`` can be saved.
+    """
+
+    def __init__(self, columns=TMX_TAG_COLUMNS, min_frequency=1,
+                 other_bucket=None, parsers=None):
+        self.columns = list(columns)
+        self.min_frequency = min_frequency
+        self.other_bucket = other_bucket
+        self.parsers = {**COLUMN_PARSERS, **(parsers or {})}
+        self.encoders_ = None
+
+    def fit(self, df):
+        """Learns the tags of every column.
+
+        Args:
+            df (pd.DataFrame): Frame holding ``columns``.
+
+        Returns:
+            TagEncoder: self.
+        """
+        self.encoders_ = None
+        return self.partial_fit(df)
+
+    def partial_fit(self, df):
+        """Adds the tags of one chunk of rows to the vocabulary.
+
+        Args:
+            df (pd.DataFrame): Chunk holding ``columns``.
+
+        Returns:
+            TagEncoder: self.
+        """
+        if self.encoders_ is None:
+            self.encoders_ = {
+                column: MultiHotEncoder(
+                    prefix=f"{column}_",
+                    parser=self.parsers.get(column, parse_tags),
+                    min_frequency=self.min_frequency,
+                    other_bucket=self.other_bucket,
+                )
+                for column in self.columns
+            }
+        for column, encoder in self.encoders_.items():
+            encoder.partial_fit(df[column])
+        return self
+
+    def save(self, path):
+        """Writes the fitted vocabulary to a JSON file with ``atomic_write``.
+
+        Args:
+            path (str): Destination file.
+        """
+        if self.encoders_ is None:
+            raise ValueError("TagEncoder is not fitted; call fit first.")
+        for column, encoder in self.encoders_.items():
+            if _PARSERS.get(encoder.parser.__name__) is not encoder.parser:
+                raise ValueError(f"The parser of {column!r} cannot be saved")
+        vocabulary = {
+            "min_frequency": self.min_frequency,
+            "other_bucket": self.other_bucket,
+            "columns": {
+                column: {**encoder.to_dict(), "parser": encoder.parser.__name__}
+                for column, encoder in self.encoders_.items()
+            },
+        }
+        with atomic_write(path) as tmp_path:
+            with open(tmp_path, "w") as vocabulary_file:
+                json.dump(vocabulary, vocabulary_file, indent=4)
+
+    @classmethod
+    def load(cls, path):
+        """Rebuilds a fitted encoder from a file written by ``save``.
+
+        Args:
+            path (str): File written by ``save``.
+
+        Returns:
+            TagEncoder: The fitted encoder.
+        """
+        with open(path, "r") as vocabulary_file:
+            vocabulary = json.load(vocabulary_file)
+        parsers = {
+            column: _PARSERS[state["parser"]]
+            for column, state in vocabulary["columns"].items()
+            if "parser" in state
+        }
+        encoder = cls(
+            columns=list(vocabulary["columns"]),
+            min_frequency=vocabulary["min_frequency"],
+            other_bucket=vocabulary["other_bucket"],
+            parsers=parsers,
+        )
+        encoder.encoders_ = {
+            column: MultiHotEncoder.from_dict(
+                state, parser=encoder.parsers.get(column, parse_tags)
+            )
+            for column, state in vocabulary["columns"].items()
+        }
+        return encoder
+
+    @property
+    def feature_names_(self):
+        """list[str]: Output column names, ``"<column>_<tag>"``."""
+        return [
+            f"{encoder.prefix}{token}"
+            for encoder in self.encoders_.values()
+            for token in encoder.tokens_
+        ]
+
+    def transform(self, df):
+        """Encodes the tag columns with the fitted tags.
+
+        Args:
+            df (pd.DataFrame): Frame holding ``columns``.
+
+        Returns:
+            scipy.sparse.csr_matrix: uint8 indicators, one column per
+            entry of ``feature_names_``.
+        """
+        if self.encoders_ is None:
+            raise ValueError("TagEncoder is not fitted; call fit first.")
+        return sparse.hstack(
+            [encoder.transform(df[column]) for column, encoder in self.encoders_.items()],
+            format="csr", dtype="uint8",
+        )
+
+    def fit_transform(self, df):
+        """Fits the tags and encodes the same frame."""
+        return self.fit(df).transform(df)
+
+    def transform_frame(self, df):
+        """Encodes the tag columns into a frame of sparse uint8 columns.
+
+        Args:
+            df (pd.DataFrame): Frame holding ``columns``.
+
+        Returns:
+            pd.DataFrame: Sparse indicator columns with the index of
+            ``df``, ready to ``join`` onto it.
+        """
+        return pd.DataFrame.sparse.from_spmatrix(
+            self.transform(df), index=df.index, columns=self.feature_names_
+        )
+
+
+def add_vocabulary_arguments(parser):
+    """Adds the tag vocabulary options of the encoding scripts.
+
+    ``--vocabulary`` names the vocabulary file, ``--fit`` learns it from
+    the data and overwrites the file (training) instead of loading it
+    (scoring), and ``--min-frequency``/``--other-bucket`` set the
+    ``TagEncoder`` settings used when fitting. The defaults give every
+    tag its own column.
+
+    Args:
+        parser (argparse.ArgumentParser): Parser to extend.
+
+    Returns:
+        argparse.ArgumentParser: The same parser.
+    """
+    parser.add_argument(
+        "--vocabulary", required=True,
+        help="Tag vocabulary JSON: written with --fit, read otherwise",
+    )
+    parser.add_argument(
+        "--fit", action="store_true",
+        help="Learn the vocabulary from the data and save it",
+    )
+    parser.add_argument(
+        "--min-frequency", type=int, default=1,
+        help="Rows a tag must appear in to get its own column when fitting",
+    )
+    parser.add_argument(
+        "--other-bucket", default=None,
+        help="Column collecting rare and unseen tags, e.g. 'other'",
+    )
+    return parser
+
+
+def tag_encoder_for(df, columns, vocabulary_path, fit=False, min_frequency=1,
+                    other_bucket=None):
+    """Fits and saves, or loads, the tag vocabulary of a run.
+
+    Training runs learn the vocabulary from ``df`` and overwrite
+    ``vocabulary_path``; scoring runs load it, so the encoded columns
+    match the model's. The file used is logged either way.
+
+    Args:
+        df (pd.DataFrame): Frame holding ``columns``; only read to fit.
+        columns (list[str]): Tag columns to encode.
+        vocabulary_path (str): Vocabulary file to write or read.
+        fit (bool, optional): Whether to fit and save (default is to
+            load).
+        min_frequency (int, optional): See ``TagEncoder``; only used to
+            fit (default is 1).
+        other_bucket (str, optional): See ``TagEncoder``; only used to
+            fit (default is None).
+
+    Returns:
+        TagEncoder: The fitted encoder.
+
+    Raises:
+        ValueError: If a loaded vocabulary encodes other columns, e.g.
+            a file left by another script.
+    """
+    if fit:
+        encoder = TagEncoder(
+            columns=columns, min_frequency=min_frequency,
+            other_bucket=other_bucket,
+        ).fit(df)
+        encoder.save(vocabulary_path)
+        logger.info(
+            f"Saved the tag vocabulary of {columns} to {vocabulary_path}"
+        )
+        return encoder
+    encoder = TagEncoder.load(vocabulary_path)
+    if encoder.columns != list(columns):
+        raise ValueError(
+            f"{vocabulary_path} encodes the columns {encoder.columns}, "
+            f"not {list(columns)}"
+        )
+    logger.info(f"Loaded the tag vocabulary of {columns} from {vocabulary_path}")
+    return encoder
@@ -0,0 +1,44 @@
+from article_store import ArticleStore
+
+
+def articles(*items):
+    return [
+        {"title": f"Article {url}", "url": url, "published_date": date}
+        for url, date in items
+    ]
+
+
+def test_add_appends_only_new_articles(tmp_path):
+    store = ArticleStore(str(tmp_path / "articles.sqlite"))
+    first = articles(
+        ("https://a/1", "Mon, 02 Dec 2024 10:00:00 +0000"),
+        ("https://a/2", "2024-12-01T09:00:00Z"),
+        ("https://a/2", "2024-12-01T09:00:00Z"),
+    )
+
+    assert store.add(first, feed_url="https://a/rss") == first[:2]
+    second = articles(
+        ("https://a/2", "2024-12-01T09:00:00Z"),
+        ("https://a/3", "No Date"),
+    )
+    assert store.add(second) == second[1:]
+    assert store.add([{"title": "x", "url": "No URL"}]) == []
+    assert len(store) == 3
+    store.close()
+
+    assert len(ArticleStore(str(tmp_path / "articles.sqlite"))) == 3
+
+
+def test_recent_orders_by_published_date():
+    store = ArticleStore(":memory:")
+    store.add(articles(
+        ("https://a/old", "2024-11-01T00:00:00Z"),
+        ("https://a/new", "Tue, 03 Dec 2024 08:00:00 +0100"),
+        ("https://a/mid", "2024-12-02T00:00:00Z"),
+        ("https://a/undated", "No Date"),
+    ))
+
+    recent = store.recent(top_n=2)
+
+    assert list(recent["url"]) == ["https://a/new", "https://a/mid"]
+    assert str(recent["published_date"].iloc[0]) == "2024-12-03 07:00:00+00:00"
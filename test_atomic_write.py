@@ -0,0 +1,29 @@
+import pytest
+from atomic_write import atomic_write
+
+
+def test_replaces_the_file_when_the_block_completes(tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text("old")
+
+    with atomic_write(str(path)) as tmp:
+        with open(tmp, "w") as state_file:
+            state_file.write("new")
+        assert path.read_text() == "old"
+
+    assert path.read_text() == "new"
+    assert not (tmp_path / "state.json.tmp").exists()
+
+
+def test_failed_block_keeps_the_previous_file(tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text("old")
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(path)) as tmp:
+            with open(tmp, "w") as state_file:
+                state_file.write("partial")
+            raise RuntimeError("crash")
+
+    assert path.read_text() == "old"
+    assert not (tmp_path / "state.json.tmp").exists()
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+from bit_matrix import BitMatrix, binary_column_names
+
+
+@pytest.fixture
+def features():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        (rng.random((130, 4)) < 0.3).astype(np.int64), columns=["a", "b", "c", "d"]
+    )
+    df["a_copy"] = df["a"]
+    return df
+
+
+def test_binary_screen_matches_isin():
+    df = pd.DataFrame({
+        "ints": [0, 1, 1], "bools": [True, False, True], "floats": [0.0, 1.0, 0.0],
+        "twos": [0, 2, 1], "missing": [0.0, np.nan, 1.0], "text": ["0", "1", "0"],
+        "nullable": pd.array([0, 1, None], dtype="Int64"),
+        "objects": pd.Series([0, 1, 1], dtype=object),
+        "object_twos": pd.Series([0, 2, 1], dtype=object),
+        "categories": pd.Categorical([1, 0, 1]),
+    })
+
+    expected = df.columns[df.apply(lambda col: col.isin([0, 1]).all())]
+
+    assert binary_column_names(df).tolist() == expected.tolist() == [
+        "ints", "bools", "floats", "objects", "categories"
+    ]
+
+
+def test_packed_counts_match_the_frame(features):
+    bits = BitMatrix.from_frame(features)
+    values = features.to_numpy()
+
+    assert bits.shape == (130, 5)
+    assert bits.words.shape == (5, 3)
+    assert bits.counts().tolist() == values.sum(axis=0).tolist()
+    assert np.allclose(bits.support(), features.mean())
+    assert (bits.co_occurrence().to_numpy() == values.T @ values).all()
+    assert bits.duplicate_columns().tolist() == ["a_copy"]
+    assert bits.to_bool_frame().equals(features.astype(bool))
+    assert bits.select(["d", "b"]).to_bool_frame().equals(
+        features[["d", "b"]].astype(bool)
+    )
+
+
+def test_from_sparse_matches_from_frame(features):
+    packed = BitMatrix.from_sparse(
+        sparse.csr_matrix(features.to_numpy()), features.columns
+    )
+    assert (packed.words == BitMatrix.from_frame(features).words).all()
+
+
+def test_non_binary_columns_are_rejected():
+    with pytest.raises(ValueError, match="count"):
+        BitMatrix.from_frame(pd.DataFrame({"flag": [0, 1], "count": [3, 1]}))
@@ -0,0 +1,75 @@
+import random
+import numpy as np
+import pandas as pd
+from date_normalizer import DateNormalizer, _fast_parse
+
+
+def test_parse_handles_mixed_formats_and_leftovers():
+    normalizer = DateNormalizer()
+
+    parsed = normalizer.parse([
+        "2024-12-01T09:00:00Z",
+        "Mon, 02 Dec 2024 10:00:00 +0100",
+        "Mon, 2 Dec 2024 10:00:00 GMT",
+        "2024-12-01T09:00:00.500+02:00",
+        "Monday, 02-Dec-24 10:00:00 GMT",
+        None,
+        "No Date",
+    ])
+
+    assert [str(value) for value in parsed] == [
+        "2024-12-01 09:00:00+00:00",
+        "2024-12-02 09:00:00+00:00",
+        "2024-12-02 10:00:00+00:00",
+        "2024-12-01 07:00:00.500000+00:00",
+        "2024-12-02 10:00:00+00:00",
+        "NaT",
+        "NaT",
+    ]
+
+
+def test_parse_learns_format_per_source():
+    normalizer = DateNormalizer()
+    normalizer.parse(
+        ["2024-12-01T09:00:00+02:00", "Mon, 2 Dec 2024 10:00:00 +0000",
+         "Tue, 3 Dec 2024 10:00:00 +0000", "Tue, 03 Dec 2024 10:00:00 +0000"],
+        ["https://a/rss", "https://b/rss", "https://b/rss", "https://c/rss"]
+    )
+
+    # Fixed-width shapes take the NumPy fast path and teach nothing.
+    assert normalizer.formats_by_source == {
+        "https://a/rss": "ISO8601",
+        "https://b/rss": "%a, %d %b %Y %H:%M:%S %z",
+    }
+    # The learned format is tried first and leftovers still parse.
+    parsed = normalizer.parse(
+        pd.Series(["Wed, 4 Dec 2024 10:00:00 +0000", "2024-12-04"]),
+        "https://b/rss"
+    )
+    assert parsed.notna().all()
+
+
+def test_fast_path_matches_pandas():
+
+    rng = random.Random(0)
+    strings = []
+    for _ in range(500):
+        moment = pd.Timestamp("2000-01-01", tz="UTC") + pd.Timedelta(
+            seconds=rng.randint(0, 10 ** 9)
+        )
+        offset = rng.choice(["+0000", "-0530", "+0100", "GMT"])
+        local = moment if offset == "GMT" else moment.tz_convert(
+            f"{offset[:3]}:{offset[3:]}"
+        )
+        strings.append(rng.choice([
+            moment.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            local.strftime(f"%a, %d %b %Y %H:%M:%S {offset}"),
+        ]))
+    strings += ["2024-02-30T00:00:00Z", "Mon, 02 Foo 2024 10:00:00 +0000",
+                "2024-12-01 09:00:00Z", "Mon, 02 Dec 2024 10:00:00 EST"]
+
+    stamps, parsed = _fast_parse(np.array(strings, dtype=object))
+
+    assert parsed[:500].all() and not parsed[500:].any()
+    expected = pd.to_datetime(pd.Series(strings[:500]), format="mixed", utc=True)
+    assert (stamps[:500] == expected.to_numpy(dtype="datetime64[ns]").view("int64")).all()
@@ -0,0 +1,132 @@
+import time
+import asyncio
+import threading
+from enrichment_cache import (
+    RedisEnrichmentCache, SQLiteEnrichmentCache, cache_from_config
+)
+
+
+class FakeRedis:
+    """Local stand-in for a Redis client with key expiry."""
+
+    def __init__(self):
+        self.store = {}
+
+    def get(self, name):
+        value, expires_at = self.store.get(name, (None, None))
+        if value is None or expires_at <= time.time():
+            return None
+        return value.encode()
+
+    def set(self, name, value, ex=None, px=None):
+        if ex is not None and ex <= 0 or px is not None and px <= 0:
+            raise ValueError("invalid expire time in 'set' command")
+        ttl = ex if ex is not None else px / 1000
+        self.store[name] = (value, time.time() + ttl)
+
+
+def test_sqlite_cache_persists_across_instances(tmp_path):
+    """A warm run reads what a previous run stored."""
+    path = str(tmp_path / "cache.sqlite")
+    cache = SQLiteEnrichmentCache(path)
+    cache.set("virustotal", "8.8.8.8", {"reputation": 5})
+    cache.close()
+
+    warm_cache = SQLiteEnrichmentCache(path)
+    assert warm_cache.get("virustotal", "8.8.8.8") == {"reputation": 5}
+    assert warm_cache.get("censys", "8.8.8.8") is None
+    stats = warm_cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_sqlite_cache_negative_entries_use_negative_ttl():
+    """Empty results are cached with the shorter negative TTL."""
+    cache = SQLiteEnrichmentCache(":memory:", negative_ttl=0)
+    cache.set("censys", "10.0.0.1", {})
+    assert cache.get("censys", "10.0.0.1") is None
+
+    cache = SQLiteEnrichmentCache(":memory:", negative_ttl=60)
+    cache.set("censys", "10.0.0.1", {})
+    assert cache.get("censys", "10.0.0.1") == {}
+    assert cache.stats()["negative_hits"] == 1
+
+
+def test_sqlite_cache_per_provider_ttl():
+    cache = SQLiteEnrichmentCache(":memory:", ttls={"censys": 0})
+    cache.set("censys", "1.1.1.1", {"a": 1})
+    cache.set("virustotal", "1.1.1.1", {"a": 1})
+    assert cache.get("censys", "1.1.1.1") is None
+    assert cache.get("virustotal", "1.1.1.1") == {"a": 1}
+
+
+def test_sqlite_cache_evicts_least_recently_used():
+    cache = SQLiteEnrichmentCache(":memory:", max_entries=10)
+    for i in range(10):
+        cache.set("virustotal", f"ip-{i}", {"i": i})
+    cache.get("virustotal", "ip-0")
+    cache.set("virustotal", "ip-10", {"i": 10})
+
+    assert cache.get("virustotal", "ip-0") == {"i": 0}
+    assert cache.get("virustotal", "ip-1") is None
+    assert cache.stats()["evictions"] == 2
+
+
+def test_redis_cache_against_stand_in():
+    cache = RedisEnrichmentCache(client=FakeRedis(), negative_ttl=60)
+    cache.set("virustotal", "8.8.8.8", {"reputation": 5})
+    cache.set("virustotal", "10.0.0.1", {})
+
+    assert cache.get("virustotal", "8.8.8.8") == {"reputation": 5}
+    assert cache.get("virustotal", "10.0.0.1") == {}
+    assert cache.get("censys", "8.8.8.8") is None
+
+
+def test_redis_cache_sub_second_and_zero_ttls():
+    """Sub-second TTLs are kept in milliseconds; zero TTLs are not stored."""
+    client = FakeRedis()
+    cache = RedisEnrichmentCache(
+        client=client, ttls={"virustotal": 0.5, "censys": 0}
+    )
+    cache.set("virustotal", "8.8.8.8", {"reputation": 5})
+    cache.set("censys", "8.8.8.8", {"ports": [443]})
+
+    assert cache.get("virustotal", "8.8.8.8") == {"reputation": 5}
+    assert cache.get("censys", "8.8.8.8") is None
+    assert list(client.store) == ["enrichment:virustotal:8.8.8.8"]
+
+
+def test_async_access_runs_off_the_event_loop_thread():
+    """aget/aset run the backend in a worker thread and keep the counters."""
+    cache = SQLiteEnrichmentCache(":memory:")
+    backend_threads = []
+    backend_get = cache._get
+
+    def recording_get(provider, key):
+        backend_threads.append(threading.get_ident())
+        return backend_get(provider, key)
+
+    cache._get = recording_get
+
+    async def run():
+        await cache.aset("virustotal", "8.8.8.8", {"reputation": 5})
+        return (
+            await cache.aget("virustotal", "8.8.8.8"),
+            await cache.aget("censys", "8.8.8.8"),
+        )
+
+    assert asyncio.run(run()) == ({"reputation": 5}, None)
+    assert threading.get_ident() not in backend_threads
+    stats = cache.stats()
+    assert (stats["sets"], stats["hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_cache_from_config_builds_sqlite_cache(tmp_path):
+    cache = cache_from_config({
+        "path": str(tmp_path / "cache.sqlite"),
+        "ttl": {"censys": 60},
+        "negative_ttl": 5
+    })
+    assert isinstance(cache, SQLiteEnrichmentCache)
+    assert cache.ttls == {"censys": 60}
+    assert cache.negative_ttl == 5
@@ -0,0 +1,33 @@
+import pandas as pd
+from enrichment_checkpoint import EnrichmentCheckpoint
+
+
+def make_enriched(event_ids):
+    return pd.DataFrame({
+        "event_id": pd.array(event_ids, dtype="string"),
+        "risk_score": pd.array([0.5] * len(event_ids), dtype="Float64"),
+        "virustotal": [{"data": {"id": i}} for i in range(len(event_ids))],
+        "location": [None] * len(event_ids)
+    })
+
+
+def test_round_trip_and_resume(tmp_path):
+    checkpoint = EnrichmentCheckpoint(str(tmp_path))
+    assert checkpoint.write(make_enriched(["a", "b"])) == 2
+    assert checkpoint.write(make_enriched(["c", None])) == 1
+
+    resumed = EnrichmentCheckpoint(str(tmp_path))
+    assert resumed.completed_ids == {"a", "b", "c"}
+    loaded = resumed.load()
+    assert list(loaded["event_id"]) == ["a", "b", "c"]
+    assert loaded.loc[1, "virustotal"] == {"data": {"id": 1}}
+    assert loaded.loc[0, "location"] is None
+
+    pending = resumed.pending(make_enriched(["b", "d", None]))
+    assert list(pending["event_id"].fillna("<NA>")) == ["d", "<NA>"]
+
+
+def test_empty_checkpoint(tmp_path):
+    checkpoint = EnrichmentCheckpoint(str(tmp_path / "new"))
+    assert checkpoint.load().empty
+    assert len(checkpoint.pending(make_enriched(["a"]))) == 1
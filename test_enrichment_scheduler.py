@@ -0,0 +1,80 @@
+import time
+import asyncio
+import pytest
+from enrichment_scheduler import (
+    EnrichmentScheduler, TokenBucket, parse_retry_after
+)
+
+
+def test_parse_retry_after_seconds_and_dates():
+    """Retry-After accepts delta-seconds and HTTP dates."""
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("not a date") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_spaces_requests():
+    """A bucket refilling 20 tokens/sec admits ~20 extra calls per second."""
+    bucket = TokenBucket(rate=20, capacity=1)
+    start = time.monotonic()
+    for _ in range(5):
+        await bucket.acquire()
+    assert time.monotonic() - start >= 4 / 20 * 0.9
+
+
+@pytest.mark.asyncio
+async def test_scheduler_caps_in_flight_and_streams_all_results():
+    """No more than max_in_flight workers run at once."""
+    scheduler = EnrichmentScheduler({"virustotal": 1000}, max_in_flight=3)
+    active = 0
+    peak = 0
+
+    async def worker(item):
+        nonlocal active, peak
+        async with scheduler.slot("virustotal"):
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+        return item
+
+    results = [r async for r in scheduler.stream(range(20), worker)]
+
+    assert sorted(results) == list(range(20))
+    assert peak <= 3
+
+
+@pytest.mark.asyncio
+async def test_pause_delays_next_request():
+    """Pausing a provider holds back its next token."""
+    scheduler = EnrichmentScheduler({"censys": 1000})
+    scheduler.pause("censys", 0.1)
+    start = time.monotonic()
+    async with scheduler.slot("censys"):
+        pass
+    assert time.monotonic() - start >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_requests_queued_on_the_in_flight_cap_keep_the_rate():
+    """Freed slots do not release a burst of tokens taken while queued."""
+    rate, burst = 20, 4
+    scheduler = EnrichmentScheduler({"virustotal": (rate, burst)},
+                                    max_in_flight=2)
+    start_times = []
+
+    async def worker(item):
+        async with scheduler.slot("virustotal"):
+            start_times.append(time.monotonic())
+            # The first requests are slow, so the rest queue on the cap.
+            await asyncio.sleep(0.5 if item < 2 else 0.001)
+
+    await asyncio.gather(*(worker(item) for item in range(20)))
+
+    start_times.sort()
+    for first in range(len(start_times)):
+        for last in range(first + 1, len(start_times)):
+            elapsed = start_times[last] - start_times[first]
+            assert last - first + 1 <= burst + rate * elapsed + 1
@@ -0,0 +1,42 @@
+import json
+from event_schema import (
+    EventField, THREAT_METRIX_SCHEMA, flatten_event, flatten_events
+)
+
+
+def test_flatten_events_builds_typed_columns():
+    bodies = [
+        json.dumps({
+            "event_id": 1, "ip_address": "1.1.1.1", "country": "US",
+            "risk_score": "42.5", "vpn": "true",
+            "event_time": "2024-01-01T10:00:00Z",
+            "geolocation": {"lat": 1.0}
+        }),
+        json.dumps({"event_id": 2, "country": "US", "vpn": 0}),
+    ]
+
+    frame = flatten_events(bodies)
+
+    assert list(frame.columns) == [f.name for f in THREAT_METRIX_SCHEMA]
+    assert frame["country"].dtype == "category"
+    assert frame["risk_score"].dtype == "Float64"
+    assert frame["risk_score"][0] == 42.5
+    assert list(frame["vpn"]) == [True, False]
+    assert frame["ip_address"].isna().tolist() == [False, True]
+    assert frame["event_time"][0].year == 2024
+    assert frame["geolocation"][0] == {"lat": 1.0}
+
+
+def test_flatten_events_follows_dotted_paths():
+    schema = (EventField("lat", "geolocation.lat", "float"),)
+    frame = flatten_events(
+        [json.dumps({"geolocation": {"lat": 3.5}}), json.dumps({})], schema
+    )
+    assert frame["lat"].tolist()[0] == 3.5
+    assert frame["lat"].isna().tolist() == [False, True]
+
+
+def test_flatten_event_matches_schema_order():
+    event = flatten_event({"ip_address": "8.8.8.8", "extra": 1})
+    assert list(event) == [f.name for f in THREAT_METRIX_SCHEMA]
+    assert event["ip_address"] == "8.8.8.8"
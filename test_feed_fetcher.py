@@ -0,0 +1,130 @@
+import time
+import shutil
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from feed_fetcher import CurlFeedFetcher
+
+pytestmark = pytest.mark.skipif(
+    shutil.which("curl") is None, reason="curl is not installed"
+)
+
+
+class StubFeedHandler(BaseHTTPRequestHandler):
+    """Serves /feed, /missing (404) and /slow (sleeps 2s).
+
+    Feeds carry ETag "v1" and answer 304 to a matching If-None-Match.
+    """
+
+    def do_GET(self):
+        if self.path == "/slow":
+            time.sleep(2)
+        if self.path == "/missing":
+            self.send_response(404)
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+            return
+        body = b"<rss><channel><title>stub</title></channel></rss>"
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Last-Modified", "Wed, 21 Oct 2026 07:28:00 GMT")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubFeedHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_reports_content_and_failures(stub_server):
+    fetcher = CurlFeedFetcher(max_workers=4, timeout=1)
+    urls = [
+        f"{stub_server}/feed", f"{stub_server}/missing", f"{stub_server}/slow"
+    ]
+
+    results = {result.url: result for result in fetcher.fetch(urls)}
+
+    assert set(results) == set(urls)
+    ok = results[f"{stub_server}/feed"]
+    assert ok.status == 200 and ok.error is None
+    assert ok.content.startswith("<rss>")
+    missing = results[f"{stub_server}/missing"]
+    assert missing.content is None and missing.error == "HTTP 404"
+    slow = results[f"{stub_server}/slow"]
+    assert slow.content is None and slow.error
+
+    stats = fetcher.stats()
+    assert stats["failed"] == 2
+    assert stats["latency"]["count"] == 3
+    assert fetcher.metrics.counters[
+        ("feed_fetches", (("result", "ok"),))
+    ] == 1
+
+
+def test_fetch_runs_feeds_concurrently(stub_server):
+    fetcher = CurlFeedFetcher(max_workers=5, timeout=5)
+
+    start = time.perf_counter()
+    results = list(fetcher.fetch([f"{stub_server}/slow"] * 5))
+    elapsed = time.perf_counter() - start
+
+    assert [result.status for result in results] == [200] * 5
+    assert elapsed < 6
+
+
+@pytest.mark.skipif(shutil.which("stdbuf") is None, reason="stdbuf is not installed")
+def test_fast_feeds_are_yielded_before_slow_ones_finish(stub_server):
+    fetcher = CurlFeedFetcher(max_workers=2, timeout=5)
+    start = time.perf_counter()
+
+    arrivals = {
+        result.url: time.perf_counter() - start
+        for result in fetcher.fetch([f"{stub_server}/slow", f"{stub_server}/feed"])
+    }
+
+    assert arrivals[f"{stub_server}/feed"] < 1
+    assert arrivals[f"{stub_server}/slow"] >= 2
+
+
+def test_conditional_fetch_returns_not_modified(stub_server):
+    fetcher = CurlFeedFetcher(max_workers=2, timeout=5)
+    first, second = f"{stub_server}/feed", f"{stub_server}/feed?other"
+
+    results = {
+        result.url: result
+        for result in fetcher.fetch([first, second], {first: ('"v1"', None)})
+    }
+
+    assert results[first].status == 304
+    assert results[first].content is None and results[first].error is None
+    assert results[second].status == 200
+    assert results[second].etag == '"v1"'
+    assert results[second].last_modified == "Wed, 21 Oct 2026 07:28:00 GMT"
+    assert fetcher.stats()["not_modified"] == 1
+
+
+def test_config_passes_proxy_credentials():
+    fetcher = CurlFeedFetcher(
+        "http://proxy:85", "user", 'pa"ss', max_workers=2
+    )
+
+    config = fetcher._config(["https://example.com/feed"], "/tmp/out")
+
+    assert 'proxy = "http://proxy:85"' in config
+    assert 'proxy-user = "user:pa\\"ss"' in config
+    assert "proxy-ntlm" in config
+    assert 'url = "https://example.com/feed"' in config
@@ -0,0 +1,31 @@
+from feed_state import FeedState
+
+
+def test_state_round_trip_and_change_detection(tmp_path):
+    path = str(tmp_path / "feed_state.json")
+    state = FeedState(path)
+    state.update("https://a/rss", '"v1"', None, "<rss>one</rss>")
+    state.update("https://b/rss", content="<rss>two</rss>")
+    state.save()
+
+    reloaded = FeedState(path)
+
+    assert reloaded.validators(["https://a/rss", "https://b/rss"]) == {
+        "https://a/rss": ('"v1"', None)
+    }
+    assert reloaded.is_unchanged("https://b/rss", "<rss>two</rss>")
+    assert not reloaded.is_unchanged("https://b/rss", "<rss>new</rss>")
+    assert not reloaded.is_unchanged("https://c/rss", "<rss>two</rss>")
+
+
+def test_not_modified_keeps_previous_validators(tmp_path):
+    state = FeedState(str(tmp_path / "feed_state.json"))
+    state.update("https://a/rss", '"v1"', "Wed, 21 Oct 2026 07:28:00 GMT",
+                 "<rss/>")
+
+    state.update("https://a/rss", None, None)
+
+    assert state.validators(["https://a/rss"]) == {
+        "https://a/rss": ('"v1"', "Wed, 21 Oct 2026 07:28:00 GMT")
+    }
+    assert state.is_unchanged("https://a/rss", "<rss/>")
@@ -0,0 +1,71 @@
+import time
+import asyncio
+import pytest
+from module_dag import ModuleDAG
+
+
+def test_independent_modules_run_concurrently():
+    frame = {"events": [1, 2, 3]}
+
+    async def enrich(source):
+        await asyncio.sleep(0.2)
+        return source
+
+    def analyze(source):
+        time.sleep(0.2)
+        return source
+
+    dag = ModuleDAG()
+    dag.add("enrich", enrich, depends_on=["source"])
+    dag.add("analyze", analyze, depends_on=["source"])
+    dag.add("source", lambda: frame)
+
+    start = time.perf_counter()
+    results = dag.run()
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.35
+    assert results["enrich"] is frame
+    assert results["analyze"] is frame
+    assert set(dag.timings) == {"source", "enrich", "analyze", "total"}
+    assert dag.timings["enrich"] >= 0.2
+
+
+def test_dependencies_receive_results_by_name():
+    dag = ModuleDAG()
+    dag.add("a", lambda: 2)
+    dag.add("b", lambda a: a * 3, depends_on=["a"])
+    dag.add("c", lambda a, b: a + b, depends_on=["a", "b"])
+
+    assert dag.run() == {"a": 2, "b": 6, "c": 8}
+
+
+def test_cycles_and_unknown_dependencies_are_rejected():
+    dag = ModuleDAG()
+    dag.add("a", lambda b: b, depends_on=["b"])
+    dag.add("b", lambda a: a, depends_on=["a"])
+    with pytest.raises(ValueError, match="cycle"):
+        dag.run()
+
+    dag = ModuleDAG().add("a", lambda missing: missing, depends_on=["missing"])
+    with pytest.raises(ValueError, match="unknown module"):
+        dag.run()
+
+
+def test_failure_cancels_running_modules():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    def fail():
+        raise RuntimeError("boom")
+
+    dag = ModuleDAG().add("slow", slow).add("fail", fail)
+    with pytest.raises(RuntimeError, match="boom"):
+        dag.run()
+    assert cancelled == [True]
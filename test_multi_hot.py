@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+from multi_hot import MultiHotEncoder
+
+
+def test_fit_transform_matches_per_action_membership():
+    actions = pd.Series(
+        ["OTP prompt|OTP initiated", None, " Biometric login | OTP prompt ",
+         "OTP prompt|OTP prompt", ""],
+        index=[10, 11, 12, 13, 14],
+    )
+    encoder = MultiHotEncoder(prefix="action_")
+
+    frame = encoder.fit(actions).transform_frame(actions)
+
+    assert encoder.tokens_.tolist() == ["Biometric login", "OTP initiated", "OTP prompt"]
+    assert encoder.counts_.tolist() == [1, 1, 3]
+    assert frame.columns.tolist() == [
+        "action_Biometric login", "action_OTP initiated", "action_OTP prompt"
+    ]
+    assert frame.index.tolist() == [10, 11, 12, 13, 14]
+    assert all(str(dtype) == "Sparse[uint8, 0]" for dtype in frame.dtypes)
+    assert frame.sparse.to_dense().values.tolist() == [
+        [0, 1, 1], [0, 0, 0], [1, 0, 1], [0, 0, 1], [0, 0, 0]
+    ]
+
+
+def test_transform_keeps_the_fitted_columns():
+    encoder = MultiHotEncoder().fit(["a|b", "c"])
+
+    matrix = encoder.transform(["d|a", "c|unseen"])
+
+    assert matrix.dtype == np.uint8
+    assert matrix.toarray().tolist() == [[1, 0, 0], [0, 0, 1]]
+    assert encoder.transform([]).shape == (0, 3)
+
+
+def test_transform_requires_fit():
+    with pytest.raises(ValueError):
+        MultiHotEncoder().transform(["a"])
+
+
+def test_rare_and_unseen_tokens_share_the_other_bucket():
+    encoder = MultiHotEncoder(min_frequency=2, other_bucket="other").fit(
+        ["a|b", "a|c", "a|b", "d"]
+    )
+
+    assert encoder.tokens_.tolist() == ["a", "b", "other"]
+    assert encoder.counts_.tolist() == [3, 2, 2]
+    assert encoder.transform(["c|d", "b|new", "a"]).toarray().tolist() == [
+        [0, 0, 1], [0, 1, 1], [1, 0, 0]
+    ]
+
+    restored = MultiHotEncoder.from_dict(encoder.to_dict())
+    assert restored.tokens_.equals(encoder.tokens_)
+    assert restored.transform(["c|d"]).toarray().tolist() == [[0, 0, 1]]
+
+
+def test_other_bucket_must_not_collide_with_a_token():
+    encoder = MultiHotEncoder(min_frequency=2, other_bucket="other")
+    with pytest.raises(ValueError, match="other_bucket"):
+        encoder.fit(["a|b", "a|other", "a|b"])
+
+    encoder.partial_fit(["a|b"])
+    with pytest.raises(ValueError, match="other_bucket"):
+        encoder.partial_fit(["other"])
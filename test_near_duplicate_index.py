@@ -0,0 +1,57 @@
+import random
+from near_duplicate_index import NearDuplicateIndex, lsh_bands, shingle_hashes
+
+
+def make_report(rng, n_words=200):
+    return " ".join(f"w{rng.randrange(5_000)}" for _ in range(n_words))
+
+
+def test_shingles_ignore_case_punctuation_and_whitespace():
+    assert (
+        shingle_hashes("Dropper contacts C2, then exfiltrates.")
+        == shingle_hashes("dropper  contacts c2 then\nexfiltrates")
+    ).all()
+    assert len(shingle_hashes("one two")) == 1
+    assert len(shingle_hashes("")) == 1
+
+
+def test_banding_fits_the_signature():
+    bands, rows = lsh_bands(0.8, 128)
+    assert bands * rows <= 128
+
+
+def test_check_flags_light_edits_but_not_unrelated_reports():
+    rng = random.Random(0)
+    index = NearDuplicateIndex()
+    reports = [make_report(rng) for _ in range(200)]
+    for i, report in enumerate(reports):
+        assert index.check(f"report-{i}", report) is None
+    assert len(index) == 200
+
+    found = 0
+    for i, report in enumerate(reports):
+        words = report.split()
+        for position in rng.sample(range(len(words)), 4):
+            words[position] = "edited"
+        match = index.check(f"copy-{i}", "Reposted: " + " ".join(words))
+        found += match is not None and match.key == f"report-{i}"
+    assert found >= 190
+    # Flagged copies are not added to the index
+    assert len(index) == 200 + (200 - found)
+
+    assert not any(index.query(make_report(rng)) for _ in range(200))
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = NearDuplicateIndex(threshold=0.7, seed=3)
+    rng = random.Random(1)
+    reports = [make_report(rng) for _ in range(20)]
+    for i, report in enumerate(reports):
+        index.add(f"report-{i}", report)
+    index.save(str(tmp_path / "index.npz"))
+
+    loaded = NearDuplicateIndex.load(str(tmp_path / "index.npz"))
+
+    assert (loaded.threshold, loaded.seed, len(loaded)) == (0.7, 3, 20)
+    assert loaded.query(reports[5]) == index.query(reports[5])
+    assert loaded.query(reports[5])[0] == ("report-5", 1.0)
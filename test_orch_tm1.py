@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+import orch_tm1
+from high_water_mark import HighWaterMark
+
+EVENTS = pd.DataFrame({"ip_address": ["1.1.1.1"], "user_agent": ["ua"]})
+
+
+def run_with_enrichment(monkeypatch, tmp_path, enrichment):
+    extractor = MagicMock()
+    extractor.fetch_threat_metrix_data.return_value = [{}]
+    extractor.to_event_frame.return_value = EVENTS
+    extractor.enrich_events = AsyncMock(return_value=enrichment)
+    analyzer = MagicMock()
+    analyzer.process_user_agents = AsyncMock(return_value=pd.DataFrame())
+    analyzer_class = MagicMock(return_value=analyzer)
+    monkeypatch.setattr(orch_tm1, "ThreatMetrixDataExtraction", lambda path: extractor)
+    monkeypatch.setattr(orch_tm1, "UserAgentAnalysis", analyzer_class)
+    state_path = str(tmp_path / "marks.json")
+    results = orch_tm1.orchestrate_all_modules("config.json", state_path)
+    assert analyzer_class.call_args.kwargs["scheduler"] is extractor.scheduler
+    return results, HighWaterMark(state_path).get("threat_metrix")
+
+
+@pytest.mark.parametrize("enrichment", [
+    pd.DataFrame(),  # enrich_events caught an exception
+    EVENTS.assign(enrichment_failed=[True]),  # an IP lookup failed
+])
+def test_failed_enrichment_keeps_the_high_water_mark(monkeypatch, tmp_path, enrichment):
+    _, mark = run_with_enrichment(monkeypatch, tmp_path, enrichment)
+    assert mark is None
+
+
+def test_complete_enrichment_advances_the_high_water_mark(monkeypatch, tmp_path):
+    results, mark = run_with_enrichment(
+        monkeypatch, tmp_path, EVENTS.assign(enrichment_failed=[False])
+    )
+    assert mark == results["end_time"]
@@ -0,0 +1,72 @@
+import json
+import logging
+from pipeline_metrics import PipelineMetrics, SampledLogger
+
+
+def test_stage_percentiles_and_counters():
+    metrics = PipelineMetrics()
+    for ms in range(1, 101):
+        metrics.observe("virustotal_request", ms / 1000)
+    metrics.increment("http_responses", provider="censys", status=429)
+    metrics.increment("http_responses", provider="censys", status=429)
+    metrics.adjust_gauge("in_flight_requests", 3)
+    metrics.adjust_gauge("in_flight_requests", -2)
+
+    summary = json.loads(metrics.to_json())
+
+    stage = summary["stages"]["virustotal_request"]
+    assert stage["count"] == 100
+    assert abs(stage["p50"] - 0.0505) < 1e-9
+    assert abs(stage["p99"] - 0.09901) < 1e-9
+    assert stage["max"] == 0.1
+    assert summary["counters"] == [{
+        "name": "http_responses",
+        "labels": {"provider": "censys", "status": 429},
+        "value": 2
+    }]
+    assert summary["gauges"]["in_flight_requests"] == {"value": 1, "max": 3}
+
+
+def test_reservoir_bounds_samples():
+    metrics = PipelineMetrics(reservoir_size=10)
+    for _ in range(1000):
+        metrics.observe("parse", 0.5)
+
+    assert len(metrics._samples["parse"]) == 10
+    assert metrics.stages()["parse"]["count"] == 1000
+    assert metrics.stages()["parse"]["total"] == 500.0
+
+
+def test_prometheus_text(tmp_path):
+    metrics = PipelineMetrics()
+    metrics.observe("parse", 0.25)
+    metrics.increment("requests", provider="virustotal")
+    metrics.set_gauge("pending_tasks", 7)
+    path = tmp_path / "cycad.prom"
+
+    metrics.export(logging.getLogger(__name__), str(path))
+
+    text = path.read_text()
+    assert 'cycad_stage_duration_seconds{stage="parse",quantile="0.99"} 0.25' in text
+    assert 'cycad_stage_duration_seconds_count{stage="parse"} 1' in text
+    assert "# TYPE cycad_requests_total counter" in text
+    assert 'cycad_requests_total{provider="virustotal"} 1' in text
+    assert "cycad_pending_tasks 7" in text
+
+
+def test_sampled_logger_logs_first_and_every_nth(caplog):
+    sampled = SampledLogger(logging.getLogger("sampled"), every=10)
+    formatted = []
+
+    def message():
+        formatted.append(True)
+        return "fetched"
+
+    with caplog.at_level(logging.INFO, logger="sampled"):
+        for _ in range(25):
+            sampled.log("success", message)
+
+    assert [record.getMessage() for record in caplog.records] == [
+        "fetched", "fetched (11 so far)", "fetched (21 so far)"
+    ]
+    assert len(formatted) == 3
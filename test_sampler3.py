@@ -0,0 +1,72 @@
+import json
+from sampler3 import get_recent_articles
+
+
+def test_get_recent_articles_ranks_across_formats(tmp_path):
+    metadata_file = tmp_path / "run.json"
+    metadata_file.write_text(json.dumps({"articles": [
+        {"title": "old", "url": "u1", "published_date": "2024-11-01T00:00:00Z"},
+        {"title": "new", "url": "u2",
+         "published_date": "Tue, 03 Dec 2024 08:00:00 +0100"},
+        {"title": "bad", "url": "u3", "published_date": "No Date"},
+    ]}))
+
+    recent = get_recent_articles(str(metadata_file), top_n=5)
+
+    assert list(recent["title"]) == ["new", "old"]
+    assert recent["published_date"].iloc[0] == "2024-12-03 07:00:00 UTC"
+
+
+def test_top_recent_articles_streams_directory_with_heap(tmp_path):
+    import random
+    from sampler3 import top_recent_articles
+
+    rng = random.Random(0)
+    runs = []
+    for run in range(3):
+        articles = [
+            {"title": f"{run}-{i}", "url": f"https://a/{run}/{i}",
+             "published_date": f"2024-{rng.randint(1, 12):02d}-"
+                               f"{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00Z"}
+            for i in range(200)
+        ]
+        runs.append(articles)
+    # The same article collected again in a later run is kept once.
+    runs[2].append(dict(runs[0][0]))
+    for run, articles in enumerate(runs):
+        (tmp_path / f"2024-12-0{run + 1}T00:00:00Z.json").write_text(
+            json.dumps({"timestamp": run, "articles": articles})
+        )
+    (tmp_path / "feed_state.json").write_text("{}")
+
+    recent = top_recent_articles(str(tmp_path), top_n=25, batch_size=64)
+
+    everything = sorted(
+        {article["url"]: article for articles in runs for article in articles}.values(),
+        key=lambda article: article["published_date"], reverse=True
+    )
+    assert [str(published)[:19] for published, _ in recent] == [
+        article["published_date"][:19].replace("T", " ") for article in everything[:25]
+    ]
+    assert len({article["url"] for _, article in recent}) == 25
+
+
+def test_top_recent_articles_ignores_repeated_urls_within_a_batch(tmp_path):
+    from sampler3 import top_recent_articles
+
+    def article(url, day):
+        return {"title": url, "url": url, "published_date": f"2024-06-{day:02d}T00:00:00Z"}
+
+    # Q is already kept from the first file; its copies and A's copy must not
+    # take the preselected slots of the second file, where Z belongs to the top 2.
+    (tmp_path / "2024-06-01T00:00:00Z.json").write_text(
+        json.dumps({"articles": [article("Q", 1)]})
+    )
+    (tmp_path / "2024-06-02T00:00:00Z.json").write_text(
+        json.dumps({"articles": [article("A", 20), article("A", 20), article("Q", 9),
+                                 article("Q", 9), article("Z", 8)]})
+    )
+
+    recent = top_recent_articles(str(tmp_path), top_n=2, batch_size=10)
+
+    assert [article["url"] for _, article in recent] == ["A", "Z"]
@@ -0,0 +1,50 @@
+import json
+from stix_extractor import extract_indicators, extract_indicators_from_stix
+
+
+def test_extract_indicators_covers_every_type():
+    text = (
+        "Payload hxxps://evil[.]com/drop.php, then payload.exe contacted "
+        "10.0.0.1 and cdn.Bad-Domain.net. MD5 D41D8CD98F00B204E9800998ECF8427E, "
+        "SHA1 da39a3ee5e6b4b0d3255bfef95601890afd80709, SHA256 "
+        "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855. "
+        "Exploits cve-2021-44228; version 1.2.3 is unaffected."
+    )
+
+    assert extract_indicators(text) == [
+        ("url", "https://evil.com/drop.php"),
+        ("ipv4", "10.0.0.1"),
+        ("domain", "cdn.bad-domain.net"),
+        ("md5", "d41d8cd98f00b204e9800998ecf8427e"),
+        ("sha1", "da39a3ee5e6b4b0d3255bfef95601890afd80709"),
+        ("sha256", "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"),
+        ("cve", "CVE-2021-44228"),
+    ]
+
+
+def test_extract_from_bundles_deduplicates_per_stix_id(tmp_path):
+    indicator = {
+        "type": "indicator", "id": "indicator--1",
+        "created_by_ref": "identity--aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa",
+        "pattern": "[url:value = 'http://evil.com/a']",
+        "description": "Seen at http://evil.com/a",
+    }
+    report = {
+        "type": "report", "id": "report--2", "name": "Campaign on 192.168.1.10",
+        "external_references": [{"url": "https://vendor.example/report"}],
+    }
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "a.json").write_text(json.dumps({"type": "bundle", "objects": [indicator]}))
+    (tmp_path / "nested" / "b.json").write_text(
+        json.dumps({"type": "bundle", "objects": [indicator, report]})
+    )
+
+    table = extract_indicators_from_stix(str(tmp_path))
+
+    assert table.values.tolist() == [
+        ["indicator--1", "indicator", "url", "http://evil.com/a"],
+        ["report--2", "report", "ipv4", "192.168.1.10"],
+        ["report--2", "report", "url", "https://vendor.example/report"],
+    ]
+    only_reports = extract_indicators_from_stix(str(tmp_path), object_types={"report"})
+    assert set(only_reports["stix_id"]) == {"report--2"}
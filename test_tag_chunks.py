@@ -0,0 +1,78 @@
+import pandas as pd
+import pytest
+from tag_chunks import encode_tag_file, fit_tag_vocabulary, read_tag_matrix
+from tag_parser import TagEncoder
+
+COLUMNS = ["Reasons", "Device Health Reasons"]
+
+
+@pytest.fixture
+def export(tmp_path):
+    df = pd.DataFrame({
+        "event_id": [f"e{i}" for i in range(7)],
+        "Reasons": [
+            "{'proxy': 1}", "{'proxy': 1}, {'velocity': 2}", None, "{'tor': 1}",
+            "{'proxy': 1}", "{'velocity': 1}", "{'proxy': 1}",
+        ],
+        "Device Health Reasons": [
+            "{rooted}", None, "{rooted}", "{emulator}", "{rooted}", "{rooted}", None,
+        ],
+    })
+    path = tmp_path / "export.csv"
+    df.to_csv(path, index=False)
+    return df, str(path)
+
+
+def test_chunked_vocabulary_matches_a_full_fit(export):
+    df, path = export
+
+    chunked = fit_tag_vocabulary(
+        path, columns=COLUMNS, chunk_size=3, min_frequency=2, other_bucket="other"
+    )
+    full = TagEncoder(columns=COLUMNS, min_frequency=2, other_bucket="other").fit(df)
+
+    assert chunked.feature_names_ == full.feature_names_
+    for column in COLUMNS:
+        assert (
+            chunked.encoders_[column].counts_ == full.encoders_[column].counts_
+        ).all()
+
+
+@pytest.mark.parametrize("layout", ["indices", "bits"])
+def test_encoded_file_round_trips(export, tmp_path, layout):
+    df, path = export
+    encoder = TagEncoder(columns=COLUMNS, other_bucket="other").fit(df)
+    destination = str(tmp_path / "encoded.parquet")
+
+    rows = encode_tag_file(
+        path, destination, encoder, chunk_size=3, keep_columns=("event_id",),
+        layout=layout,
+    )
+    matrix, features, kept = read_tag_matrix(destination, columns=("event_id",))
+
+    assert rows == 7
+    assert features == encoder.feature_names_
+    assert (matrix != encoder.transform(df)).nnz == 0
+    assert kept["event_id"].tolist() == df["event_id"].tolist()
+    assert not (tmp_path / "encoded.parquet.tmp").exists()
+
+
+def test_failed_encoding_removes_the_partial_file(export, tmp_path, monkeypatch):
+    df, path = export
+    encoder = TagEncoder(columns=COLUMNS).fit(df)
+    destination = tmp_path / "encoded.parquet"
+    transform = encoder.transform
+    calls = []
+
+    def failing_transform(chunk):
+        calls.append(len(chunk))
+        if len(calls) == 2:
+            raise RuntimeError("bad chunk")
+        return transform(chunk)
+
+    monkeypatch.setattr(encoder, "transform", failing_transform)
+    with pytest.raises(RuntimeError):
+        encode_tag_file(path, str(destination), encoder, chunk_size=3)
+
+    assert not destination.exists()
+    assert not (tmp_path / "encoded.parquet.tmp").exists()
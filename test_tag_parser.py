@@ -0,0 +1,98 @@
+import pandas as pd
+import pytest
+import logging
+from tag_parser import TagEncoder, parse_tags, tag_encoder_for
+
+
+@pytest.mark.parametrize("raw, tags", [
+    ("{'velocity': 'high'}, {'proxy': 'yes'}", {"velocity", "proxy"}),
+    ("[{'a': 1}, {'b': 2}]", {"a", "b"}),
+    ('{"data1","data2"}', {"data1", "data2"}),
+    ("{“data1”,“data3”}", {"data1", "data3"}),
+    ("{voip, prepaid}", {"voip", "prepaid"}),
+    ("{emulator}", {"emulator"}),
+    ("{}", set()),
+])
+def test_parse_tags_recognises_every_format(raw, tags):
+    assert parse_tags(raw) == tags
+
+
+def test_parse_tags_is_memoized():
+    parse_tags.cache_clear()
+    parse_tags("{rooted}")
+    parse_tags("{rooted}")
+    assert parse_tags.cache_info().hits == 1
+
+
+def test_tag_encoder_encodes_several_columns():
+    df = pd.DataFrame({
+        "Reasons": ["{'proxy': 1}, {'velocity': 2}", None, "{'proxy': 1}"],
+        "Device Health Reasons": ["{rooted}", "{emulator}", None],
+    }, index=["a", "b", "c"])
+    encoder = TagEncoder(columns=["Reasons", "Device Health Reasons"])
+
+    encoded = encoder.fit(df).transform_frame(df)
+
+    assert encoded.columns.tolist() == [
+        "Reasons_proxy", "Reasons_velocity",
+        "Device Health Reasons_emulator", "Device Health Reasons_rooted",
+    ]
+    assert encoded.index.tolist() == ["a", "b", "c"]
+    assert encoded.sparse.to_dense().values.tolist() == [
+        [1, 1, 0, 1], [0, 0, 1, 0], [1, 0, 0, 0]
+    ]
+    # Scoring data keeps the fitted columns; unseen tags are dropped
+    scoring = pd.DataFrame({
+        "Reasons": ["{'new': 1}"], "Device Health Reasons": ["{rooted}"]
+    })
+    assert encoder.transform(scoring).toarray().tolist() == [[0, 0, 0, 1]]
+
+
+def test_saved_vocabulary_reproduces_training_columns(tmp_path):
+    train = pd.DataFrame({"Device Health Reasons": ["{rooted}"] * 3 + ["{emulator}"]})
+    encoder = TagEncoder(
+        columns=["Device Health Reasons"], min_frequency=2, other_bucket="other"
+    ).fit(train)
+    encoder.save(str(tmp_path / "vocabulary.json"))
+
+    loaded = TagEncoder.load(str(tmp_path / "vocabulary.json"))
+    scoring = pd.DataFrame({"Device Health Reasons": ["{jailbroken}", "{rooted}"]})
+
+    assert loaded.feature_names_ == [
+        "Device Health Reasons_rooted", "Device Health Reasons_other"
+    ]
+    assert loaded.encoders_["Device Health Reasons"].counts_.tolist() == [3, 1]
+    assert loaded.transform(scoring).toarray().tolist() == [[0, 1], [1, 0]]
+
+
+def test_device_health_reasons_keep_one_tag_per_cell(tmp_path):
+    df = pd.DataFrame({
+        "Reasons": ["{'a': 1}, {'b': 2}"], "Device Health Reasons": ["{'a', b}"]
+    })
+    encoder = TagEncoder(columns=["Reasons", "Device Health Reasons"]).fit(df)
+    encoder.save(str(tmp_path / "vocabulary.json"))
+
+    expected = ["Reasons_a", "Reasons_b", "Device Health Reasons_'a', b"]
+    assert encoder.feature_names_ == expected
+    assert TagEncoder.load(str(tmp_path / "vocabulary.json")).feature_names_ == expected
+
+
+def test_tag_encoder_for_fits_explicitly_and_logs_the_file(tmp_path, caplog):
+    train = pd.DataFrame({"Reasons": ["{'proxy': 1}", "{'tor': 1}"]})
+    path = str(tmp_path / "reasons.json")
+    TagEncoder(columns=["Reasons"]).fit(
+        pd.DataFrame({"Reasons": ["{'stale': 1}"]})
+    ).save(path)
+
+    with caplog.at_level(logging.INFO, logger="tag_parser"):
+        fitted = tag_encoder_for(train, ["Reasons"], path, fit=True)
+        loaded = tag_encoder_for(train, ["Reasons"], path)
+
+    # Fitting replaces a stale file instead of reusing it.
+    assert fitted.feature_names_ == ["Reasons_proxy", "Reasons_tor"]
+    assert loaded.feature_names_ == fitted.feature_names_
+    saved, loaded_message = caplog.messages
+    assert saved.startswith("Saved") and loaded_message.startswith("Loaded")
+    assert path in saved and path in loaded_message
+    with pytest.raises(ValueError, match="encodes the columns"):
+        tag_encoder_for(train, ["Device Health Reasons"], path)
@@ -0,0 +1,305 @@
+import json
+import time
+import asyncio
+import pytest
+import pandas as pd
+import pyarrow as pa
+from unittest.mock import AsyncMock, MagicMock
+from tm_1 import ThreatMetrixDataExtraction
+from enrichment_cache import SQLiteEnrichmentCache
+from high_water_mark import HighWaterMark
+from enrichment_checkpoint import EnrichmentCheckpoint
+from enrichment_scheduler import EnrichmentScheduler
+
+
+@pytest.fixture
+def mock_config_file(tmp_path):
+    """Creates a mock config.json file for testing."""
+    config_data = {
+        "threat_metrix": {"api_key": "mock_threat_metrix_key"},
+        "virustotal": {"api_key": "mock_virustotal_key"},
+        "censys": {"api_id": "mock_censys_id", "api_secret": "mock_censys_secret"}
+    }
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(config_data))
+    return str(config_path)
+
+
+@pytest.fixture
+def tm_instance(mock_config_file):
+    return ThreatMetrixDataExtraction(
+        config_path=mock_config_file, client=MagicMock(),
+        cache=SQLiteEnrichmentCache(":memory:")
+    )
+
+
+def make_events(ip_addresses):
+    return pd.DataFrame({
+        "body": [
+            json.dumps({"event_id": i, "ip_address": ip})
+            for i, ip in enumerate(ip_addresses)
+        ]
+    })
+
+
+@pytest.mark.asyncio
+async def test_process_enriches_each_unique_ip_once(tm_instance):
+    """Events sharing an IP trigger a single lookup per provider."""
+    tm_instance.enrich_with_virus_total = AsyncMock(return_value={"vt": 1})
+    tm_instance.enrich_with_censys = AsyncMock(return_value={"censys": 1})
+    events = make_events(["1.1.1.1", "2.2.2.2", "1.1.1.1", "1.1.1.1", None])
+
+    results = await tm_instance.process_threat_metrix_data(
+        events, session=MagicMock()
+    )
+
+    assert len(results) == 5
+    assert tm_instance.enrich_with_virus_total.await_count == 2
+    assert tm_instance.enrich_with_censys.await_count == 2
+    assert list(results["event_id"]) == ["0", "1", "2", "3", "4"]
+    assert results.loc[2, "virustotal"] == {"vt": 1}
+    assert results.loc[4, "virustotal"] == {}
+    assert tm_instance.last_run_stats["unique_ips"] == 2
+    assert tm_instance.last_run_stats["dedup_ratio"] == 2.0
+    assert tm_instance.last_run_stats["api_calls_saved"] == 4
+
+
+class FakePagedClient:
+    """BigQuery stand-in whose result yields Arrow pages."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.page_sizes = []
+
+    def query(self, sql, job_config=None):
+        job = MagicMock()
+
+        def result(page_size=None):
+            self.page_sizes.append(page_size)
+            rows = MagicMock()
+            rows.to_arrow_iterable.return_value = iter(self.pages)
+            return rows
+
+        job.result.side_effect = result
+        return job
+
+
+def make_page(start, stop):
+    return pa.RecordBatch.from_pydict({
+        "body": [
+            json.dumps({"event_id": i, "ip_address": f"10.0.0.{i % 3}"})
+            for i in range(start, stop)
+        ]
+    })
+
+
+def test_iter_batches_bounds_batch_size(tm_instance):
+    """Pages larger than batch_size are split into bounded batches."""
+    client = FakePagedClient([make_page(0, 7), make_page(7, 9)])
+    tm_instance.client = client
+
+    batches = list(tm_instance.iter_threat_metrix_batches(
+        "2024-01-01", "2024-01-02", batch_size=3
+    ))
+
+    assert [batch.num_rows for batch in batches] == [3, 3, 1, 2]
+    assert client.page_sizes == [3]
+
+
+@pytest.mark.asyncio
+async def test_stream_enriches_every_batch(tm_instance):
+    tm_instance.client = FakePagedClient([make_page(0, 5), make_page(5, 8)])
+    tm_instance.enrich_with_virus_total = AsyncMock(return_value={"vt": 1})
+    tm_instance.enrich_with_censys = AsyncMock(return_value={})
+
+    enriched_batches = [
+        batch async for batch in tm_instance.stream_threat_metrix_data(
+            "2024-01-01", "2024-01-02", batch_size=4, session=MagicMock()
+        )
+    ]
+
+    assert [len(batch) for batch in enriched_batches] == [4, 1, 3]
+    event_ids = pd.concat(enriched_batches)["event_id"].astype(int)
+    assert sorted(event_ids) == list(range(8))
+
+
+class RecordingClient:
+    """BigQuery stand-in that records every submitted query."""
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.queries = []
+
+    def query(self, sql, job_config=None):
+        self.queries.append((sql, job_config))
+        job = MagicMock()
+        job.to_dataframe.return_value = self.frame
+        return job
+
+
+def test_fetch_uses_query_parameters(tm_instance):
+    client = RecordingClient(pd.DataFrame({"body": []}))
+    tm_instance.client = client
+
+    tm_instance.fetch_threat_metrix_data(
+        "2024-01-01 00:00:00", "2024-01-02 00:00:00"
+    )
+
+    sql, job_config = client.queries[0]
+    assert "2024-01-01" not in sql
+    assert "event_time >= @start_time AND event_time < @end_time" in sql
+    assert "SELECT body" in sql
+    parameters = {
+        p.name: p.value.strftime("%Y-%m-%d %H:%M:%S")
+        for p in job_config.query_parameters
+    }
+    assert parameters == {
+        "start_time": "2024-01-01 00:00:00",
+        "end_time": "2024-01-02 00:00:00"
+    }
+
+
+def test_fetch_projects_fields_server_side(tm_instance):
+    client = RecordingClient(pd.DataFrame())
+    tm_instance.client = client
+
+    tm_instance.fetch_threat_metrix_data(
+        "2024-01-01", "2024-01-02", fields=["ip_address", "geolocation"]
+    )
+
+    sql, _ = client.queries[0]
+    assert "JSON_VALUE(body, '$.ip_address') AS ip_address" in sql
+    assert "JSON_QUERY(body, '$.geolocation') AS geolocation" in sql
+    assert "SELECT body" not in sql
+
+
+@pytest.mark.asyncio
+async def test_process_accepts_projected_batches(tm_instance):
+    tm_instance.enrich_with_virus_total = AsyncMock(return_value={"vt": 1})
+    tm_instance.enrich_with_censys = AsyncMock(return_value={})
+    projected = pd.DataFrame({
+        "event_id": ["1", "2"],
+        "ip_address": ["1.1.1.1", None],
+        "vpn": ["true", "false"]
+    })
+
+    results = await tm_instance.process_threat_metrix_data(
+        projected, session=MagicMock()
+    )
+
+    assert list(results["vpn"]) == [True, False]
+    assert list(results["virustotal"]) == [{"vt": 1}, {}]
+
+
+def test_high_water_mark_limits_next_window(tmp_path):
+    marks = HighWaterMark(str(tmp_path / "marks.json"))
+    assert marks.window_start("threat_metrix", "2024-01-01 00:00:00") == (
+        "2024-01-01 00:00:00"
+    )
+
+    marks.set("threat_metrix", "2024-01-01 12:00:00")
+
+    reloaded = HighWaterMark(str(tmp_path / "marks.json"))
+    assert reloaded.window_start("threat_metrix", "2024-01-01 00:00:00") == (
+        "2024-01-01 12:00:00"
+    )
+    assert reloaded.window_start("threat_metrix", "2024-01-02 00:00:00") == (
+        "2024-01-02 00:00:00"
+    )
+
+
+def test_run_processing_exports_metrics(tm_instance):
+    tm_instance.enrich_with_virus_total = AsyncMock(return_value={"vt": 1})
+    tm_instance.enrich_with_censys = AsyncMock(return_value={})
+
+    tm_instance.run_processing(make_events(["1.1.1.1", "1.1.1.1"]))
+
+    assert tm_instance.last_metrics["stages"]["parse"]["count"] == 1
+    assert tm_instance.last_metrics["gauges"]["pending_tasks"]["max"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_lookup_is_isolated_and_retried_on_resume(tm_instance,
+                                                               tmp_path):
+    async def flaky_virus_total(session, ip_address):
+        if ip_address == "2.2.2.2":
+            raise ValueError("malformed response")
+        return {"vt": ip_address}
+
+    tm_instance.enrich_with_virus_total = flaky_virus_total
+    tm_instance.enrich_with_censys = AsyncMock(return_value={})
+    events = make_events(["1.1.1.1", "2.2.2.2", "3.3.3.3", "1.1.1.1"])
+    checkpoint = EnrichmentCheckpoint(str(tmp_path))
+
+    first = await tm_instance.process_threat_metrix_data(
+        events, session=MagicMock(), checkpoint=checkpoint,
+        checkpoint_every=2
+    )
+
+    assert list(first["enrichment_failed"]) == [False, True, False, False]
+    assert first.loc[2, "virustotal"] == {"vt": "3.3.3.3"}
+    assert checkpoint.completed_ids == {"0", "2", "3"}
+
+    tm_instance.enrich_with_virus_total = AsyncMock(return_value={"vt": 1})
+    resumed = await tm_instance.process_threat_metrix_data(
+        events, session=MagicMock(),
+        checkpoint=EnrichmentCheckpoint(str(tmp_path))
+    )
+
+    assert list(resumed["event_id"]) == ["1"]
+    assert tm_instance.enrich_with_virus_total.await_count == 1
+    assert len(EnrichmentCheckpoint(str(tmp_path)).load()) == 4
+
+
+class FakeResponse:
+    def __init__(self, status, headers=None):
+        self.status = status
+        self.headers = headers or {}
+
+    async def json(self):
+        return {"status": self.status}
+
+    async def __aenter__(self):
+        await asyncio.sleep(0.02)  # Network latency.
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class RateLimitedSession:
+    """Answers the first request with 429 and records request times.
+
+    Responses take a moment, so the other callers are already waiting
+    for tokens when the 429 arrives.
+    """
+
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+        self.request_times = []
+
+    def get(self, url, **kwargs):
+        self.request_times.append(time.monotonic())
+        if len(self.request_times) == 1:
+            return FakeResponse(429, {"Retry-After": str(self.retry_after)})
+        return FakeResponse(200)
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_requests_already_waiting(tm_instance):
+    """After a 429, no request leaves before Retry-After has elapsed."""
+    tm_instance.scheduler = EnrichmentScheduler({"censys": (20, 1)})
+    session = RateLimitedSession(retry_after=0.3)
+
+    results = await asyncio.gather(*[
+        tm_instance._fetch_json(
+            session, "censys", f"https://censys/{i}", f"10.0.0.{i}",
+            retries=2, backoff_factor=0
+        )
+        for i in range(4)
+    ])
+
+    assert results == [{"status": 200}] * 4
+    first, *later = session.request_times
+    assert len(later) == 4
+    assert min(later) - first >= 0.3 * 0.95
@@ -0,0 +1,261 @@
+import json
+import random
+import asyncio
+import pytest
+import user_agents
+from functools import lru_cache
+from unittest.mock import AsyncMock, MagicMock
+from ua1 import UserAgentAnalysis
+from ua_fast_path import UserAgentFastPath
+from enrichment_cache import SQLiteEnrichmentCache
+
+CHROME = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+FIREFOX = (
+    "Mozilla/5.0 (X11; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0"
+)
+
+
+@pytest.fixture
+def ua_instance(tmp_path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"virustotal": {"api_key": "key"}}))
+    return UserAgentAnalysis(
+        str(config_path), client=MagicMock(),
+        cache=SQLiteEnrichmentCache(":memory:")
+    )
+
+
+def test_parse_user_agents_parses_each_distinct_string_once(ua_instance):
+    calls = []
+    parse = ua_instance.parse_user_agent
+
+    def counting_parse(user_agent_string):
+        calls.append(user_agent_string)
+        return parse(user_agent_string)
+
+    ua_instance._parse_memo = lru_cache(maxsize=16)(counting_parse)
+
+    frame = ua_instance.parse_user_agents(
+        [CHROME, FIREFOX, CHROME, None, CHROME]
+    )
+    ua_instance.parse_user_agents([FIREFOX, CHROME])
+
+    assert sorted(calls, key=str) == sorted([CHROME, FIREFOX, None], key=str)
+    assert list(frame.columns) == list(UserAgentAnalysis.PARSED_COLUMNS)
+    assert list(frame["browser"].astype(object).fillna("<NA>")) == [
+        "Chrome", "Firefox", "Chrome", "<NA>", "Chrome"
+    ]
+    assert list(frame["status"]) == [
+        "valid", "valid", "valid", "empty", "valid"
+    ]
+    assert frame.loc[1, "browser_version"] == "121.0"
+
+
+@pytest.mark.asyncio
+async def test_process_user_agents_looks_up_each_distinct_string_once(
+        ua_instance):
+    ua_instance.enrich_with_virus_total = AsyncMock(return_value={"vt": 1})
+
+    results = await ua_instance.process_user_agents([CHROME, CHROME, FIREFOX])
+
+    assert ua_instance.enrich_with_virus_total.await_count == 2
+    assert [result["browser"] for result in results] == [
+        "Chrome", "Chrome", "Firefox"
+    ]
+    assert results[0]["virustotal"] == {"vt": 1}
+
+
+class StatusSession:
+    """Answers requests with the given statuses in turn."""
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.requests = []
+
+    def get(self, url, **kwargs):
+        self.requests.append((url, kwargs["params"]))
+        response = MagicMock(status=self.statuses.pop(0), headers={})
+        response.json = AsyncMock(return_value={"data": []})
+        context = MagicMock()
+        context.__aenter__ = AsyncMock(return_value=response)
+        context.__aexit__ = AsyncMock(return_value=False)
+        return context
+
+
+@pytest.mark.asyncio
+async def test_virus_total_lookup_shares_the_ip_lookup_handling(ua_instance):
+    """Retry and negative statuses are those of the IP enrichment."""
+    charged = []
+    slot = ua_instance.scheduler.slot
+
+    def recording_slot(provider):
+        charged.append(provider)
+        return slot(provider)
+
+    ua_instance.scheduler.slot = recording_slot
+    session = StatusSession(503, 200, 404)
+
+    found = await ua_instance.enrich_with_virus_total(
+        session, CHROME, backoff_factor=0
+    )
+    missing = await ua_instance.enrich_with_virus_total(
+        session, FIREFOX, backoff_factor=0
+    )
+
+    assert (found, missing) == ({"data": []}, {})
+    assert session.requests[0][1] == {"query": CHROME}
+    assert charged == ["virustotal"] * 3
+    assert ua_instance.cache.get(ua_instance.CACHE_PROVIDER, FIREFOX) == {}
+
+
+@pytest.mark.asyncio
+async def test_process_user_agents_bounds_the_lookups_in_progress(tmp_path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"virustotal": {"api_key": "key"}}))
+    ua_instance = UserAgentAnalysis(
+        str(config_path), client=MagicMock(),
+        cache=SQLiteEnrichmentCache(":memory:"), max_in_flight=2
+    )
+    active = 0
+    peak = 0
+
+    async def slow_lookup(session, user_agent):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.005)
+        active -= 1
+        return {"vt": user_agent}
+
+    ua_instance.enrich_with_virus_total = slow_lookup
+    user_agents_list = [f"agent/{i}" for i in range(30)]
+
+    results = await ua_instance.process_user_agents(
+        user_agents_list, session=MagicMock()
+    )
+
+    assert [result["virustotal"] for result in results] == [
+        {"vt": user_agent} for user_agent in user_agents_list
+    ]
+    # Two lookups in flight, as many again scheduled behind them.
+    assert peak <= 4
+
+
+def build_corpus(seed=0):
+    """Dominant user agent shapes with randomised versions."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(100):
+        chrome = (
+            f"{rng.randint(80, 131)}.0.{rng.randint(1000, 6999)}."
+            f"{rng.randint(0, 250)}"
+        )
+        mac = rng.choice(["10_15_7", "10_14_6", "11_6", "13_5_2", "14_1"])
+        ios = rng.choice(["17_1_2", "16_6", "15_7_9", "17_0"])
+        safari = rng.choice(["17.1", "16.6", "15.6.1", "17.0"])
+        windows = rng.choice(["10.0", "6.3", "6.2", "6.1"])
+        platform = rng.choice(["Win64; x64", "WOW64"])
+        firefox = f"{rng.randint(90, 132)}.0"
+        corpus += [
+            f"Mozilla/5.0 (Windows NT {windows}; {platform}) "
+            f"AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{chrome} "
+            f"Safari/537.36",
+            f"Mozilla/5.0 (Windows NT {windows}; {platform}) "
+            f"AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{chrome} "
+            f"Safari/537.36 Edg/{chrome}",
+            f"Mozilla/5.0 (Macintosh; Intel Mac OS X {mac}) "
+            f"AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{chrome} "
+            f"Safari/537.36",
+            f"Mozilla/5.0 (Macintosh; Intel Mac OS X {mac}) "
+            f"AppleWebKit/605.1.15 (KHTML, like Gecko) Version/{safari} "
+            f"Safari/605.1.15",
+            f"Mozilla/5.0 (Windows NT {windows}; {platform}; rv:{firefox}) "
+            f"Gecko/20100101 Firefox/{firefox}",
+            f"Mozilla/5.0 (Macintosh; Intel Mac OS X "
+            f"{mac.replace('_', '.')}; rv:{firefox}) Gecko/20100101 "
+            f"Firefox/{firefox}",
+            f"Mozilla/5.0 (iPhone; CPU iPhone OS {ios} like Mac OS X) "
+            f"AppleWebKit/605.1.15 (KHTML, like Gecko) Version/{safari} "
+            f"Mobile/15E148 Safari/604.1",
+            f"Mozilla/5.0 (iPad; CPU OS {ios} like Mac OS X) "
+            f"AppleWebKit/605.1.15 (KHTML, like Gecko) Version/{safari} "
+            f"Mobile/15E148 Safari/604.1",
+            f"Mozilla/5.0 (iPhone; CPU iPhone OS {ios} like Mac OS X) "
+            f"AppleWebKit/605.1.15 (KHTML, like Gecko) CriOS/{chrome} "
+            f"Mobile/15E148 Safari/604.1",
+            f"Mozilla/5.0 (Linux; Android {rng.randint(10, 15)}; K) "
+            f"AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{chrome} "
+            f"Mobile Safari/537.36",
+        ]
+    return corpus
+
+
+def test_parse_failures_stay_invalid_in_batches(ua_instance, monkeypatch):
+    """A string the parser fails on is 'invalid' in both code paths."""
+    broken = "Mozilla/5.0 (broken)"
+    real_parse = user_agents.parse
+
+    def failing_parse(user_agent_string):
+        if user_agent_string == broken:
+            raise ValueError("unparseable")
+        return real_parse(user_agent_string)
+
+    monkeypatch.setattr("ua1.user_agents.parse", failing_parse)
+    ua_instance.fast_path = None
+
+    frame = ua_instance.parse_user_agents([broken, CHROME, None])
+
+    assert ua_instance.parse_user_agent(broken) == {'status': 'invalid'}
+    assert list(frame["status"]) == ["invalid", "valid", "empty"]
+    assert list(frame["is_valid"]) == [False, True, False]
+
+
+def test_fast_path_defaults_per_instance_and_none_disables_it(tmp_path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"virustotal": {"api_key": "key"}}))
+    first, second = (
+        UserAgentAnalysis(str(config_path), client=MagicMock(), cache=MagicMock())
+        for _ in range(2)
+    )
+    disabled = UserAgentAnalysis(
+        str(config_path), client=MagicMock(), cache=MagicMock(), fast_path=None
+    )
+
+    assert isinstance(first.fast_path, UserAgentFastPath)
+    assert first.fast_path is not second.fast_path
+    assert disabled.fast_path is None
+
+
+def test_fast_path_agrees_with_full_parser(ua_instance):
+    fast_path = UserAgentFastPath()
+    corpus = build_corpus() + [
+        CHROME, FIREFOX,
+        "Mozilla/5.0 (Linux; Android 14; SM-S918B) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/120.0.6099.144 Mobile Safari/537.36",
+        "python-requests/2.31.0",
+        "curl/8.4.0",
+    ]
+    ua_instance.fast_path = None
+
+    misses = []
+    for user_agent_string in corpus:
+        fast = fast_path.match(user_agent_string)
+        if fast is None:
+            misses.append(user_agent_string)
+            continue
+        full = ua_instance.parse_user_agent(user_agent_string)
+        browser, browser_version, os, os_version, device = fast
+        assert (
+            browser, ".".join(map(str, browser_version)), os, os_version,
+            device
+        ) == (
+            full["browser"], full["browser_version"], full["os"],
+            full["os_version"], full["device"]
+        ), user_agent_string
+
+    # Every dominant shape takes the fast path; Linux, full Android 
+    # model strings and unknown clients fall back.
+    assert misses == corpus[-4:]
@@ -0,0 +1,60 @@
+import pandas as pd
+from datetime import datetime
+from ua_scoring import score_user_agents, release_year
+
+
+def test_scores_whole_columns():
+    parsed = pd.DataFrame({
+        "browser": pd.Categorical(
+            ["Chrome", "Firefox", "Other", None, "Mobile Safari", "Opera"]
+        ),
+        "browser_version": pd.array(
+            ["120.0.0", "121.0", "", None, "17.1", "105.0"], dtype="string"
+        ),
+        "os": pd.Categorical(
+            ["Windows", "Linux", "Other", None, "iOS", "Windows"]
+        ),
+        "device": pd.Categorical(
+            ["Other", "Other", "Other", None, "iPhone", "Other"]
+        ),
+    })
+
+    scores = score_user_agents(
+        parsed, as_of=datetime(2025, 6, 1), stale_after=2
+    )
+
+    assert list(scores["status"]) == [
+        "valid", "valid", "invalid", "empty", "valid", "valid"
+    ]
+    assert list(scores["release_year"].fillna(0)) == [
+        2023, 2023, 0, 0, 2023, 0
+    ]
+    assert list(scores["user_agent_age"].fillna(-1)) == [2, 2, -1, -1, 2, -1]
+    assert list(scores["is_valid"]) == [True, True, False, False, True, True]
+    assert list(scores["is_stale"].fillna(False)) == [
+        True, True, False, False, True, False
+    ]
+    assert scores["is_stale"].isna().sum() == 3
+
+
+def test_carried_invalid_status_is_kept():
+    """Browser-less rows marked 'invalid' by the parser are not 'empty'."""
+    parsed = pd.DataFrame({
+        "browser": pd.Categorical(["Chrome", None, None]),
+        "browser_version": pd.array(["120.0", None, None], dtype="string"),
+        "os": pd.Categorical(["Windows", None, None]),
+        "device": pd.Categorical(["Other", None, None]),
+        "status": ["valid", "invalid", "empty"],
+    })
+
+    scores = score_user_agents(parsed, as_of=datetime(2025, 6, 1))
+
+    assert list(scores["status"]) == ["valid", "invalid", "empty"]
+    assert list(scores["is_valid"]) == [True, False, False]
+
+
+def test_release_year_lookup():
+    assert release_year("Chrome", 132) == 2025
+    assert release_year("Edge", 79) == 2020
+    assert release_year("Safari", 18) == 2024
+    assert release_year("Chrome", 9999) is None
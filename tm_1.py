@@ -1,19 +1,24 @@
 import json
-import requests
 import logging
 import aiohttp
 import asyncio
+import numpy as np
 import pandas as pd
-from aiocache import cached, SimpleMemoryCache
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 from google.cloud import bigquery
-from dask import delayed, compute
+from enrichment_cache import cache_from_config
+from enrichment_client import EnrichmentClient
+from pipeline_metrics import PipelineMetrics, SampledLogger
+from enrichment_checkpoint import EnrichmentCheckpoint
+from event_schema import (
+    THREAT_METRIX_SCHEMA, flatten_event, flatten_events, 
+    frame_from_projection, projection_sql
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class ThreatMetrixDataExtraction:
+
+class ThreatMetrixDataExtraction(EnrichmentClient):
     """Handles the extraction and analysis of ThreatMetrix data.
 
     This class connects to a BigQuery database and enriches the data 
@@ -22,15 +27,50 @@ class ThreatMetrixDataExtraction:
     Args:
         api_key (str): API key for accessing ThreatMetrix data.
     """
+
+    SOURCE_TABLE = "your_dataset.your_source_table"
+    # BigQuery type of the event_time column, used for the window 
+    # parameters.
+    EVENT_TIME_TYPE = "TIMESTAMP"
+
+    VIRUSTOTAL_URL = "https://www.virustotal.com/api/v3/ip_addresses/{ip}"
+    CENSYS_URL = "https://search.censys.io/api/v2/hosts/{ip}"
+
+    PROVIDER_NAMES = {"virustotal": "VirusTotal", "censys": "Censys"}
+    SCHEMA = THREAT_METRIX_SCHEMA
     
-    def __init__(self, config_path="config.json"):
+    def __init__(self, config_path="config.json", client=None,
+                 connection_limit=100, limit_per_host=20,
+                 keepalive_timeout=30, max_in_flight=50, cache=None,
+                 metrics=None):
         """Initializes the ThreatMetrixDataExtraction class by loading
         API keys from a configuration file.
 
         Args:
             config_path (str): Path to the JSON configuration file.
+            client (bigquery.Client, optional): BigQuery client to use. 
+                A default client is created when omitted.
+            connection_limit (int, optional): Maximum number of open 
+                connections in the shared HTTP pool (default is 100).
+            limit_per_host (int, optional): Maximum number of open 
+                connections to a single API host (default is 20).
+            keepalive_timeout (int or float, optional): Seconds an idle 
+                connection is kept open for reuse (default is 30).
+            max_in_flight (int, optional): Maximum number of enrichment 
+                requests in flight across all providers (default is 50).
+            cache (EnrichmentCache, optional): Persistent cache for API 
+                results. Built from the "cache" section of the 
+                configuration file when omitted.
+            metrics (PipelineMetrics, optional): Collector for stage 
+                latencies, counters and queue depths. A new collector is 
+                created when omitted.
         """
-        self.client = bigquery.Client()
+        self.client = client if client is not None else bigquery.Client()
+        self.metrics = metrics if metrics is not None else PipelineMetrics()
+        self.sampled_logger = SampledLogger(logger)
+        self.connection_limit = connection_limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
 
         with open(config_path, 'r') as config_file:
             config = json.load(config_file)
@@ -40,33 +80,117 @@ class ThreatMetrixDataExtraction:
         self.censys_api_id = config["censys"]["api_id"]
         self.censys_api_secret = config["censys"]["api_secret"]
 
-    def fetch_threat_metrix_data(self, start_time, end_time):
+        self.scheduler = self.scheduler_from_config(config, max_in_flight)
+        self.cache = (
+            cache if cache is not None
+            else cache_from_config(config.get("cache"))
+        )
+        self.last_run_stats = {}
+        self.last_metrics = {}
+
+    def fetch_threat_metrix_data(self, start_time, end_time, fields=None):
         """Fetches raw ThreatMetrix data from a BigQuery table based on 
            a given time range.
 
-        This method constructs a SQL query to retrieve data from a 
-        specified BigQuery table within the given time period. The data 
-        consists of event bodies stored as JSON strings.
+        This method runs a parameterized SQL query against the table in 
+        ``SOURCE_TABLE`` for the half-open window [start_time, end_time), 
+        so consecutive windows never overlap. The time bounds are passed 
+        as query parameters, which lets BigQuery prune partitions on 
+        ``event_time``. By default the data consists of event bodies 
+        stored as JSON strings; with ``fields``, the listed schema fields 
+        are extracted inside BigQuery and the body is not transferred.
 
         Args:
             start_time (str): The start date and time for the query in 
-                              'YYYY-MM-DD' format.
+                              'YYYY-MM-DD HH:MM:SS' format (inclusive).
             end_time (str): The end date and time for the query in 
-                            'YYYY-MM-DD' format.
+                            'YYYY-MM-DD HH:MM:SS' format (exclusive).
+            fields (list[str], optional): Schema field names to project 
+                server-side instead of selecting the raw body.
 
         Returns:
             pandas.DataFrame: A DataFrame containing the queried 
-            ThreatMetrix event data,with each row representing an event 
-            body in JSON format.
+            ThreatMetrix event data, with each row representing an event 
+            body in JSON format, or the projected fields when ``fields`` 
+            is given.
+        """
+        query, job_config = self._build_query(start_time, end_time, fields)
+        with self.metrics.timer("bigquery_fetch"):
+            return self.client.query(
+                query, job_config=job_config
+            ).to_dataframe()
+
+    def _build_query(self, start_time, end_time, fields=None):
+        """Builds the parameterized query for a time window.
+
+        Args:
+            start_time (str): Inclusive start of the window.
+            end_time (str): Exclusive end of the window.
+            fields (list[str], optional): Schema fields to extract with 
+                ``JSON_VALUE``/``JSON_QUERY`` instead of selecting 'body'.
+
+        Returns:
+            tuple[str, bigquery.QueryJobConfig]: The SQL text and the job 
+            configuration carrying the window bounds as parameters.
         """
+        select = (
+            ",\n                   ".join(projection_sql(fields, self.SCHEMA))
+            if fields else "body"
+        )
         query = f"""
-            SELECT body
-            FROM `your_dataset.your_source_table`
-            WHERE event_time BETWEEN '{start_time}' AND '{end_time}'
+            SELECT {select}
+            FROM `{self.SOURCE_TABLE}`
+            WHERE event_time >= @start_time AND event_time < @end_time
         """
-        return self.client.query(query).to_dataframe()
+        job_config = bigquery.QueryJobConfig(query_parameters=[
+            bigquery.ScalarQueryParameter(
+                "start_time", self.EVENT_TIME_TYPE, start_time
+            ),
+            bigquery.ScalarQueryParameter(
+                "end_time", self.EVENT_TIME_TYPE, end_time
+            )
+        ])
+        return query, job_config
 
-    async def analyze_with_threat_metrix(self, event_body):
+    def iter_threat_metrix_batches(self, start_time, end_time, 
+                                   batch_size=50_000, fields=None):
+        """Streams raw ThreatMetrix data from BigQuery in bounded batches.
+
+        Unlike ``fetch_threat_metrix_data``, the result set is never 
+        materialised as a whole: rows are paged from BigQuery as Arrow 
+        record batches, so peak memory is set by ``batch_size`` rather 
+        than by the size of the time window.
+
+        Args:
+            start_time (str): The start date and time for the query in 
+                'YYYY-MM-DD HH:MM:SS' format (inclusive).
+            end_time (str): The end date and time for the query in 
+                'YYYY-MM-DD HH:MM:SS' format (exclusive).
+            batch_size (int, optional): Maximum number of rows per yielded 
+                batch, also used as the BigQuery page size (default is 
+                50,000).
+            fields (list[str], optional): Schema field names to project 
+                server-side instead of selecting the raw body.
+
+        Yields:
+            pyarrow.RecordBatch: Batches of at most ``batch_size`` rows 
+            with the event bodies in the 'body' column, or one column per 
+            projected field.
+        """
+        query, job_config = self._build_query(start_time, end_time, fields)
+        rows = self.client.query(query, job_config=job_config).result(
+            page_size=batch_size
+        )
+        pages = iter(rows.to_arrow_iterable())
+        while True:
+            with self.metrics.timer("bigquery_page"):
+                record_batch = next(pages, None)
+            if record_batch is None:
+                return
+            for offset in range(0, record_batch.num_rows, batch_size):
+                yield record_batch.slice(offset, batch_size)
+
+    async def analyze_with_threat_metrix(self, event_body, session=None):
         """Asynchronously analyzes and enriches a single ThreatMetrix event 
         with data from external APIs.
 
@@ -78,6 +202,9 @@ class ThreatMetrixDataExtraction:
         Args:
             event_body (str): The raw ThreatMetrix event data in JSON string 
             format.
+            session (aiohttp.ClientSession, optional): Shared session used 
+            for the API requests. A short-lived session is opened when 
+            omitted.
 
         Returns:
             dict: A dictionary containing the enriched event data with 
@@ -85,86 +212,40 @@ class ThreatMetrixDataExtraction:
             reputation, device reputation), along with the original event 
             attributes (e.g., location, device information, etc.).
         """
-        data = json.loads(event_body)
-        ip_address = data.get('ip_address')
+        if session is None:
+            async with self.create_session() as session:
+                return await self.analyze_with_threat_metrix(
+                    event_body, session
+                )
 
-        async with aiohttp.ClientSession() as session:
-            
-            vt_data, censys_data = await asyncio.gather(
-                self.enrich_with_virus_total(session, ip_address),
-                self.enrich_with_censys(session, ip_address)
-            )
-
-        enriched_event = {
-            'event_id': data.get('event_id'),
-            'ip_address': ip_address,
-            'user_agent': data.get('user_agent'),
-            'device_id': data.get('device_id'),
-            'location': data.get('location'),
-            'event_time': data.get('event_time'),
-            'risk_score': data.get('risk_score'),
-            'account_id': data.get('account_id'),
-            'login_attempt': data.get('login_attempt'),
-            'session_id': data.get('session_id'),
-            'transaction_id': data.get('transaction_id'),
-            'device_os': data.get('device_os'),
-            'device_model': data.get('device_model'),
-            'device_type': data.get('device_type'),
-            'country': data.get('country'),
-            'region': data.get('region'),
-            'city': data.get('city'),
-            'zip_code': data.get('zip_code'),
-            'latitude': data.get('latitude'),
-            'longitude': data.get('longitude'),
-            'confidence_score': data.get('confidence_score'),
-            'fraud_type': data.get('fraud_type'),
-            'identity_score': data.get('identity_score'),
-            'email_domain': data.get('email_domain'),
-            'phone_number': data.get('phone_number'),
-            'payment_method': data.get('payment_method'),
-            'proxy': data.get('proxy'),
-            'vpn': data.get('vpn'),
-            'tor': data.get('tor'),
-            'bot': data.get('bot'),
-            'malware': data.get('malware'),
-            'phishevent': data.get('phishevent'),
-            'account_creation': data.get('account_creation'),
-            'account_takeover': data.get('account_takeover'),
-            'account_funding': data.get('account_funding'),
-            'device_change': data.get('device_change'),
-            'password_reset': data.get('password_reset'),
-            'profile_change': data.get('profile_change'),
-            'withdrawal': data.get('withdrawal'),
-            'deposit': data.get('deposit'),
-            'purchase': data.get('purchase'),
-            'transfer': data.get('transfer'),
-            'refund': data.get('refund'),
-            'login_success': data.get('login_success'),
-            'login_failure': data.get('login_failure'),
-            'multi_factor_auth': data.get('multi_factor_auth'),
-            'sms_verification': data.get('sms_verification'),
-            'email_verification': data.get('email_verification'),
-            'phone_verification': data.get('phone_verification'),
-            'ip_reputation': data.get('ip_reputation'),
-            'blacklist_status': data.get('blacklist_status'),
-            'device_reputation': data.get('device_reputation'),
-            'behavioral_biometrics': data.get('behavioral_biometrics'),
-            'network_attributes': data.get('network_attributes'),
-            'geolocation': data.get('geolocation'),
-            'risk_rules_triggered': data.get('risk_rules_triggered'),
-            'custom_attributes': data.get('custom_attributes'),
-            'screen_resolution': data.get('screen_resolution'),
-            'charging_status': data.get('charging_status'),
+        data = json.loads(event_body)
+        vt_data, censys_data = await self.enrich_ip_address(
+            session, data.get('ip_address')
+        )
+        return {
+            **flatten_event(data, self.SCHEMA),
             'virustotal': vt_data,
             'censys': censys_data
         }
-        return enriched_event
 
-    # This will cache the results in memory with a time-to-live (TTL) of 
-    # 3600 seconds (1 hour), which is good for testing and development.
-    # Later, we can adjust this to use a more robust cache backend, 
-    # such as Redis.
-    @cached(ttl=3600, cache=SimpleMemoryCache)
+    async def enrich_ip_address(self, session, ip_address):
+        """Enriches one IP address with VirusTotal and Censys concurrently.
+
+        Args:
+            session (aiohttp.ClientSession): Shared session for the run.
+            ip_address (str or None): The IP address to look up. Events 
+                without an IP address are not sent to the APIs.
+
+        Returns:
+            tuple[dict, dict]: The VirusTotal and Censys data.
+        """
+        if not ip_address:
+            return {}, {}
+        return await asyncio.gather(
+            self.enrich_with_virus_total(session, ip_address),
+            self.enrich_with_censys(session, ip_address)
+        )
+
     async def enrich_with_virus_total(self, session, ip_address, 
                                       retries=3, backoff_factor=1):
         """Fetches enrichment data from VirusTotal for a given IP 
@@ -174,11 +255,13 @@ class ThreatMetrixDataExtraction:
         retrieve reputation and security-related information associated 
         with the provided IP address. It includes error handling with 
         retries for better fault tolerance in cases of rate-limiting or 
-        transient server errors. 
+        transient server errors. Results are served from and stored in 
+        ``self.cache``, keyed by IP address.
 
         The method employs an exponential backoff strategy when retrying 
         failed requests due to specific HTTP status codes (e.g., 429, 
-        500, 502, 503, 504).
+        500, 502, 503, 504), and honours the ``Retry-After`` header when 
+        VirusTotal sends one.
 
         Args:
             session (aiohttp.ClientSession): The aiohttp session used to 
@@ -196,50 +279,12 @@ class ThreatMetrixDataExtraction:
             IP address, such as reputation and associated threats, or an 
             empty dictionary if the request fails after all retries.
         """
-
-        url = (
-            f"https://www.virustotal.com/api/v3/ip_addresses/{ip_address}"
+        return await self._fetch_json(
+            session, "virustotal", self.VIRUSTOTAL_URL.format(ip=ip_address),
+            ip_address, retries, backoff_factor,
+            headers={"x-apikey": self.virustotal_api_key}
         )
-        headers = {"x-apikey": self.virustotal_api_key}
-        
-        for attempt in range(retries):
-            try:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        logger.info(
-                            f"Successfully fetched data from VirusTotal for " 
-                            f"IP: {ip_address}"
-                        )
-                        return await response.json()
-                    elif response.status in [429, 500, 502, 503, 504]:
-                        logger.warning(
-                            f"Attempt {attempt+1}: Error {response.status}, "
-                            f"retrying after backoff for IP: {ip_address}"
-                        )
-                        await asyncio.sleep(backoff_factor * (2 ** attempt))
-                    else:
-                        logger.error(
-                            f"Error {response.status}: Failed to fetch data "
-                            f"from VirusTotal for IP: {ip_address}"
-                        )
-                        return {}
-            except aiohttp.ClientError as e:
-                logger.error(
-                    f"Error fetching VirusTotal data for IP: {ip_address}: {e}"
-                    )
-                await asyncio.sleep(backoff_factor * (2 ** attempt))  
-
-        logger.error(
-            f"Failed to fetch data from VirusTotal for IP: "
-            f"{ip_address} after {retries} attempts."
-            )
-        return {}
     
-    # This will cache the results in memory with a time-to-live (TTL) of 
-    # 3600 seconds (1 hour), which is good for testing and development.
-    # Later, we can adjust this to use a more robust cache backend, 
-    # such as Redis.
-    @cached(ttl=3600, cache=SimpleMemoryCache)
     async def enrich_with_censys(self, session, ip_address, retries=3, 
                                  backoff_factor=1):
         """Fetches enrichment data from Censys for a given IP address 
@@ -248,11 +293,13 @@ class ThreatMetrixDataExtraction:
         This method sends an asynchronous API request to Censys to 
         retrieve information related to the provided IP address. It 
         includes error handling with retries for better fault tolerance 
-        in cases of rate-limiting or transient server errors.
+        in cases of rate-limiting or transient server errors. Results are 
+        served from and stored in ``self.cache``, keyed by IP address.
 
         The method employs an exponential backoff strategy when retrying 
         failed requests due to specific HTTP status codes (e.g., 429, 
-        500, 502, 503, 504).
+        500, 502, 503, 504), and honours the ``Retry-After`` header when 
+        Censys sends one.
 
         Args:
             session (aiohttp.ClientSession): The aiohttp session used to 
@@ -270,80 +317,328 @@ class ThreatMetrixDataExtraction:
                 address, or an empty dictionary if the request fails 
                 after all retries.
         """
+        return await self._fetch_json(
+            session, "censys", self.CENSYS_URL.format(ip=ip_address),
+            ip_address, retries, backoff_factor,
+            auth=aiohttp.BasicAuth(self.censys_api_id, self.censys_api_secret)
+        )
 
-        url = f"https://search.censys.io/api/v2/hosts/{ip_address}"
-        headers = {
-            "Authorization": f"Bearer {self.censys_api_key}"
-        }
+    def to_event_frame(self, threat_metrix_data):
+        """Turns a fetched batch into the typed event frame of ``SCHEMA``.
 
-        for attempt in range(retries):
-            try:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        logger.info(
-                            f"Successfully fetched data from Censys for "
-                            f"IP: {ip_address}"
-                        )
-                        return await response.json()
-                    elif response.status in [429, 500, 502, 503, 504]:
-                        logger.warning(
-                            f"Attempt {attempt+1}: Error {response.status}, "
-                            f"retrying after backoff for IP: {ip_address}"
-                        )
-                        await asyncio.sleep(backoff_factor * (2 ** attempt))
-                    else:
-                        logger.error(
-                            f"Error {response.status}: Failed to fetch data "
-                            f"from Censys for IP: {ip_address}"
-                            )
-                        return {}
-            except aiohttp.ClientError as e:
-                logger.error(
-                    f"Error fetching Censys data for IP: {ip_address}: {e}"
-                    )
-                await asyncio.sleep(backoff_factor * (2 ** attempt))
-
-        logger.error(
-            f"Failed to fetch data from Censys for IP: {ip_address} after "
-            f"{retries} attempts."
-            )
-        return {}
+        Batches with a 'body' column are parsed with ``flatten_events``; 
+        batches projected server-side are only converted to the schema 
+        types.
+        """
+        columns = (
+            threat_metrix_data.schema.names
+            if hasattr(threat_metrix_data, 'schema')
+            else threat_metrix_data.columns
+        )
+        with self.metrics.timer("parse"):
+            if 'body' not in columns:
+                return frame_from_projection(threat_metrix_data, self.SCHEMA)
+            bodies = threat_metrix_data['body']
+            if hasattr(bodies, 'to_pylist'):
+                bodies = bodies.to_pylist()
+            return flatten_events(bodies, self.SCHEMA)
+
+    async def iter_ip_enrichment(self, ip_addresses, session):
+        """Enriches IP addresses and yields the results as they finish.
+
+        Only a bounded number of lookups is scheduled at a time and the 
+        request rate per provider is governed by ``self.scheduler``. A 
+        lookup that raises is logged and reported with None results 
+        instead of aborting the other lookups.
 
-    import asyncio
+        Args:
+            ip_addresses (iterable of str): Unique IP addresses to enrich.
+            session (aiohttp.ClientSession): Shared session for the run.
 
-    async def process_threat_metrix_data(self, threat_metrix_data):
+        Yields:
+            tuple[str, dict, dict]: Each IP address with its VirusTotal 
+            and Censys data, in the order the lookups completed. Both 
+            results are None when the lookup failed.
+        """
+        async def enrich(ip_address):
+            try:
+                vt_data, censys_data = await self.enrich_ip_address(
+                    session, ip_address
+                )
+            except Exception as e:
+                self.metrics.increment("enrichment_failures")
+                logger.error(f"Error enriching IP: {ip_address}: {e}")
+                return ip_address, None, None
+            return ip_address, vt_data, censys_data
+
+        async for result in self.scheduler.stream(ip_addresses, enrich):
+            yield result
+
+    async def process_threat_metrix_data(self, threat_metrix_data, 
+                                         session=None, checkpoint=None,
+                                         checkpoint_every=10_000):
         """Processes and enriches a batch of ThreatMetrix event data 
             asynchronously.
 
-        This method iterates over a DataFrame of ThreatMetrix event 
-        data, enriching each event using external APIs (VirusTotal,
-        Censys). The result is a list of enriched event records fetched 
-        concurrently.
+        The batch is first flattened into a typed columnar frame following 
+        ``SCHEMA``. Events in a batch mostly share a small set of IPs, so 
+        each unique ``ip_address`` is enriched once through 
+        ``iter_ip_enrichment`` and the results are joined back onto the 
+        frame by IP. Deduplication figures for the batch are logged and 
+        stored in ``self.last_run_stats``. All lookups share one pooled 
+        session, so connections are reused across the whole run.
+
+        With a ``checkpoint``, events already in it are skipped and the 
+        rest are enriched in chunks of ``checkpoint_every`` events, each 
+        written to the checkpoint as soon as it is done. A run that fails 
+        part-way then resumes from the last completed chunk.
 
         Args:
-            threat_metrix_data (pandas.DataFrame): A DataFrame 
-            containing the ThreatMetrix event data. Each row should 
-            contain an event body in JSON format.
+            threat_metrix_data (pandas.DataFrame or pyarrow.RecordBatch): 
+            A batch containing the ThreatMetrix event data. Each row 
+            should contain an event body in JSON format, or the fields 
+            projected by ``fetch_threat_metrix_data``.
+            session (aiohttp.ClientSession, optional): Session to reuse. 
+            A pooled session is created for the run when omitted.
+            checkpoint (EnrichmentCheckpoint, optional): Checkpoint to 
+            resume from and write to.
+            checkpoint_every (int, optional): Events per checkpoint part 
+            (default is 10,000).
 
         Returns:
-            list[dict]: A list of dictionaries where each dictionary 
-            represents an enriched event, combining original event 
-            attributes with additional information from external sources 
-            (e.g., IP reputation, device reputation).
+            pandas.DataFrame: One row per event, in input order, with one 
+            column per schema field (e.g., location, device information) 
+            plus 'virustotal' and 'censys' columns holding the enrichment 
+            data (e.g., IP reputation) and an 'enrichment_failed' flag. 
+            Events without an IP address get empty enrichment 
+            dictionaries. With a checkpoint, only the events enriched in 
+            this call are returned; ``checkpoint.load`` returns them all.
         """
-        tasks = []
-        for row in threat_metrix_data.to_dict(orient='records'):
-            tasks.append(self.analyze_with_threat_metrix(row['body']))
+        if session is None:
+            async with self.create_session() as session:
+                return await self.process_threat_metrix_data(
+                    threat_metrix_data, session, checkpoint, checkpoint_every
+                )
 
         try:
-            processed_results = await asyncio.gather(*tasks)
+            events = self.to_event_frame(threat_metrix_data)
         except Exception as e:
             logger.error(f"Error processing batch data: {e}")
-            return []
+            return pd.DataFrame()
+        if checkpoint is None:
+            return await self.enrich_events(events, session)
+
+        events = checkpoint.pending(events)
+        enriched_chunks = []
+        for offset in range(0, len(events), checkpoint_every):
+            enriched = await self.enrich_events(
+                events.iloc[offset:offset + checkpoint_every], session
+            )
+            if enriched.empty:
+                continue
+            # Failed events stay out of the checkpoint so a resumed run 
+            # retries them.
+            checkpoint.write(enriched[~enriched['enrichment_failed']])
+            enriched_chunks.append(enriched)
+        if not enriched_chunks:
+            return pd.DataFrame()
+        return pd.concat(enriched_chunks)
+
+    async def enrich_events(self, events, session=None):
+        """Enriches an already flattened event frame.
+
+        This is the enrichment half of ``process_threat_metrix_data``, for 
+        callers that share one flattened frame between several modules. 
+        ``events`` is not modified; the enrichment columns are added to a 
+        new frame that shares the event columns with it.
+
+        Args:
+            events (pandas.DataFrame): Frame with the layout returned by 
+                ``flatten_events``.
+            session (aiohttp.ClientSession, optional): Session to reuse. 
+                A pooled session is created for the run when omitted.
 
-        return processed_results
+        Returns:
+            pandas.DataFrame: ``events`` plus the 'virustotal', 'censys' 
+            and 'enrichment_failed' columns, or an empty DataFrame on 
+            error. Events whose lookup failed get empty enrichment 
+            dictionaries and are flagged in 'enrichment_failed'.
+        """
+        if session is None:
+            async with self.create_session() as session:
+                return await self.enrich_events(events, session)
+
+        try:
+            codes, ip_addresses = pd.factorize(events['ip_address'])
+            self._record_dedup_stats(
+                len(events), int((codes >= 0).sum()), len(ip_addresses)
+            )
+
+            # The extra last slot holds the empty result that code -1 
+            # (no IP address) selects.
+            vt_by_ip = np.empty(len(ip_addresses) + 1, dtype=object)
+            censys_by_ip = np.empty(len(ip_addresses) + 1, dtype=object)
+            failed_by_ip = np.zeros(len(ip_addresses) + 1, dtype=bool)
+            vt_by_ip[-1], censys_by_ip[-1] = {}, {}
+            position = {ip: i for i, ip in enumerate(ip_addresses)}
+            async for ip_address, vt_data, censys_data in (
+                self.iter_ip_enrichment(ip_addresses, session)
+            ):
+                i = position[ip_address]
+                if vt_data is None:
+                    failed_by_ip[i] = True
+                    vt_data, censys_data = {}, {}
+                vt_by_ip[i], censys_by_ip[i] = vt_data, censys_data
+        except Exception as e:
+            logger.error(f"Error processing batch data: {e}")
+            return pd.DataFrame()
+
+        return events.assign(
+            virustotal=vt_by_ip[codes], censys=censys_by_ip[codes],
+            enrichment_failed=failed_by_ip[codes]
+        )
+
+    def _record_dedup_stats(self, n_events, n_with_ip, n_lookups):
+        """Logs and stores the IP deduplication figures of a batch."""
+        self.last_run_stats = {
+            'events': n_events,
+            'unique_ips': n_lookups,
+            'dedup_ratio': n_with_ip / n_lookups if n_lookups else 0.0,
+            'api_calls_saved': (
+                len(self.PROVIDER_NAMES) * (n_with_ip - n_lookups)
+            )
+        }
+        logger.info(
+            f"Enriching {n_events} events through {n_lookups} unique IPs "
+            f"(dedup ratio {self.last_run_stats['dedup_ratio']:.1f}x, "
+            f"{self.last_run_stats['api_calls_saved']} API calls saved)"
+        )
     
-    def run_processing(self, threat_metrix_data):
-        """Wrapper to run asynchronous processing in an event loop."""
-        return asyncio.run(self.process_threat_metrix_data(threat_metrix_data))
+    async def stream_threat_metrix_data(self, start_time, end_time, 
+                                        batch_size=50_000, session=None,
+                                        fields=None, checkpoint=None):
+        """Fetches and enriches a time window batch by batch.
+
+        While one batch is being enriched, the next one is downloaded 
+        from BigQuery in a worker thread, so network I/O to BigQuery and 
+        to the enrichment APIs overlap and the first enriched events are 
+        available as soon as the first page arrives.
+
+        Args:
+            start_time (str): The start date and time of the window.
+            end_time (str): The end date and time of the window.
+            batch_size (int, optional): Maximum number of events per 
+                batch (default is 50,000).
+            session (aiohttp.ClientSession, optional): Session to reuse. 
+                A pooled session is created for the run when omitted.
+            fields (list[str], optional): Schema field names to project 
+                server-side instead of fetching the raw body. Must include 
+                'ip_address' for the enrichment to have any input.
+            checkpoint (EnrichmentCheckpoint, optional): Checkpoint that 
+                every enriched batch is written to; events already in it 
+                are skipped.
+
+        Yields:
+            pandas.DataFrame: The enriched events of each batch.
+        """
+        if session is None:
+            async with self.create_session() as session:
+                async for enriched_batch in self.stream_threat_metrix_data(
+                    start_time, end_time, batch_size, session, fields,
+                    checkpoint
+                ):
+                    yield enriched_batch
+            return
+
+        loop = asyncio.get_running_loop()
+        batches = self.iter_threat_metrix_batches(
+            start_time, end_time, batch_size, fields
+        )
+        next_batch = loop.run_in_executor(None, next, batches, None)
+        while True:
+            batch = await next_batch
+            if batch is None:
+                break
+            next_batch = loop.run_in_executor(None, next, batches, None)
+            yield await self.process_threat_metrix_data(
+                batch, session, checkpoint, checkpoint_every=batch_size
+            )
+
+    def run_processing(self, threat_metrix_data, prometheus_path=None,
+                       checkpoint_dir=None):
+        """Wrapper to run asynchronous processing in an event loop.
+
+        The metrics of the run are reset first; when it finishes, their 
+        JSON summary is logged and kept in ``self.last_metrics``.
+
+        Args:
+            threat_metrix_data (pandas.DataFrame): The batch to process.
+            prometheus_path (str, optional): File the metrics are also 
+                written to in Prometheus text format.
+            checkpoint_dir (str, optional): Directory of an 
+                ``EnrichmentCheckpoint``. Events enriched by an earlier, 
+                interrupted run are taken from it instead of being 
+                enriched again.
+
+        Returns:
+            pandas.DataFrame: The enriched events. With a checkpoint, the 
+            checkpointed events come first, followed by the events that 
+            could not be checkpointed (failed or without an event_id).
+        """
+        self.metrics.reset()
+        try:
+            if checkpoint_dir is None:
+                return asyncio.run(
+                    self.process_threat_metrix_data(threat_metrix_data)
+                )
+            checkpoint = EnrichmentCheckpoint(checkpoint_dir)
+            enriched = asyncio.run(self.process_threat_metrix_data(
+                threat_metrix_data, checkpoint=checkpoint
+            ))
+            if not enriched.empty:
+                enriched = enriched[
+                    enriched['enrichment_failed']
+                    | enriched['event_id'].isna()
+                ]
+            return pd.concat(
+                [checkpoint.load(), enriched], ignore_index=True
+            )
+        finally:
+            self.last_metrics = self.metrics.export(logger, prometheus_path)
+
+    def run_streaming(self, start_time, end_time, handle_batch, 
+                      batch_size=50_000, fields=None, checkpoint_dir=None):
+        """Runs ``stream_threat_metrix_data`` in an event loop.
+
+        Args:
+            start_time (str): The start date and time of the window.
+            end_time (str): The end date and time of the window.
+            handle_batch (callable): Called with the enriched DataFrame of 
+                each batch as soon as it is ready, e.g. to write it out, so 
+                enriched batches do not accumulate in memory.
+            batch_size (int, optional): Maximum number of events per 
+                batch (default is 50,000).
+            fields (list[str], optional): Schema field names to project 
+                server-side instead of fetching the raw body.
+            checkpoint_dir (str, optional): Directory of an 
+                ``EnrichmentCheckpoint``. A rerun of an interrupted window 
+                skips the events enriched before the interruption.
+
+        Returns:
+            int: The total number of events enriched by this run.
+        """
+        checkpoint = (
+            EnrichmentCheckpoint(checkpoint_dir) if checkpoint_dir else None
+        )
 
+        async def consume():
+            total = 0
+            async for enriched_batch in self.stream_threat_metrix_data(
+                start_time, end_time, batch_size, fields=fields,
+                checkpoint=checkpoint
+            ):
+                handle_batch(enriched_batch)
+                total += len(enriched_batch)
+            return total
+
+        return asyncio.run(consume())
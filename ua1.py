@@ -1,16 +1,23 @@
 import json
 import user_agents
-import aiohttp
 import asyncio
 import logging
-from aiocache import cached, SimpleMemoryCache
+import pandas as pd
+from functools import lru_cache
 from datetime import datetime
 from google.cloud import bigquery
+from enrichment_cache import cache_from_config
+from enrichment_client import EnrichmentClient
+from pipeline_metrics import PipelineMetrics, SampledLogger
+from ua_fast_path import UserAgentFastPath
+from ua_scoring import release_year, score_user_agents
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+# Default of ``fast_path``, told apart from None, which disables it.
+_DEFAULT = object()
 
-class UserAgentAnalysis:
+class UserAgentAnalysis(EnrichmentClient):
     """Analyzes user agents and enriches data with VirusTotal API.
 
     This class connects to a BigQuery database and performs user agent 
@@ -18,13 +25,75 @@ class UserAgentAnalysis:
 
     Args:
         config_path (str): Path to the JSON configuration file.
+        client (bigquery.Client, optional): BigQuery client to use. A 
+            default client is created when omitted.
+        cache (EnrichmentCache, optional): Persistent cache for VirusTotal 
+            results. Built from the "cache" section of the configuration 
+            file when omitted.
+        metrics (PipelineMetrics, optional): Collector for stage latencies 
+            and counters. A new collector is created when omitted.
+        parse_cache_size (int, optional): Maximum number of distinct user 
+            agent strings whose parsed details are memoized (default is 
+            100,000).
+        fast_path (UserAgentFastPath, optional): Classifier tried before 
+            the full ua-parser cascade. Pass a classifier with extra rules 
+            to recognise more shapes, or None to always use the full 
+            parser (default is the built-in rules).
+        scheduler (EnrichmentScheduler, optional): Rate limiter for the 
+            VirusTotal requests. Pass the ThreatMetrix extractor's 
+            scheduler so both modules share the API key's quota. Built 
+            from the configuration file when omitted.
+        max_in_flight (int, optional): Maximum number of requests in 
+            flight for a scheduler built here (default is 50).
+        connection_limit (int, optional): Maximum number of open 
+            connections in the pooled HTTP session (default is 100).
+        limit_per_host (int, optional): Maximum number of open 
+            connections to a single API host (default is 20).
+        keepalive_timeout (int or float, optional): Seconds an idle 
+            connection is kept open for reuse (default is 30).
     """
+
+    VIRUSTOTAL_SEARCH_URL = "https://www.virustotal.com/api/v3/search"
+    PROVIDER_NAMES = {"virustotal": "VirusTotal"}
+    CACHE_PROVIDER = "virustotal_user_agent"
+    # Columns of the frame returned by parse_user_agents.
+    PARSED_COLUMNS = (
+        'browser', 'browser_version', 'os', 'os_version', 'device',
+        'status', 'release_year', 'user_agent_age', 'is_valid', 'is_stale'
+    )
     
-    def __init__(self, config_path="config.json"):
-        self.client = bigquery.Client()
+    def __init__(self, config_path="config.json", client=None, cache=None,
+                 metrics=None, parse_cache_size=100_000,
+                 fast_path=_DEFAULT, scheduler=None, max_in_flight=50,
+                 connection_limit=100, limit_per_host=20,
+                 keepalive_timeout=30):
+        self.client = client if client is not None else bigquery.Client()
+        self.metrics = metrics if metrics is not None else PipelineMetrics()
+        self.sampled_logger = SampledLogger(logger)
+        self.last_metrics = {}
+        self.connection_limit = connection_limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.fast_path = (
+            UserAgentFastPath() if fast_path is _DEFAULT else fast_path
+        )
+        self.current_year = datetime.now().year
+        # Parsing runs the full ua-parser regex cascade, so each distinct 
+        # string is parsed once and served from this memo afterwards.
+        self._parse_memo = lru_cache(maxsize=parse_cache_size)(
+            self.parse_user_agent
+        )
         with open(config_path, 'r') as config_file:
             config = json.load(config_file)
         self.virustotal_api_key = config["virustotal"]["api_key"]
+        self.scheduler = (
+            scheduler if scheduler is not None
+            else self.scheduler_from_config(config, max_in_flight)
+        )
+        self.cache = (
+            cache if cache is not None
+            else cache_from_config(config.get("cache"))
+        )
 
     def parse_user_agent(self, user_agent_string):
         """Parses a user agent string to extract browser, OS, and device 
@@ -32,10 +101,17 @@ class UserAgentAnalysis:
 
         This function attempts to parse the provided user agent string 
         for information such as the browser, operating system, and 
-        device family. It additionally determines the approximate age of 
-        the user agent based on its major version. If the user agent is 
-        unrecognized and returns generic values (e.g., 'Other' for 
-        browser, OS, and device), it is marked as invalid.
+        device family. It additionally determines the age of the user 
+        agent from the release year of its browser major version. If the 
+        user agent is unrecognized and returns generic values (e.g., 
+        'Other' for browser, OS, and device), it is marked as invalid. 
+        For whole columns, ``parse_user_agents`` computes the same 
+        figures vectorized.
+
+        Common browser/OS shapes are classified by ``self.fast_path`` 
+        with a single regex match; only the remaining strings go through 
+        the full ``user_agents.parse`` cascade. Both paths report the 
+        same details.
 
         Args:
             user_agent_string (str): The user agent string to parse.
@@ -51,31 +127,43 @@ class UserAgentAnalysis:
                 - 'status' (str): 'valid' if parsed successfully, 
                 'invalid' if the user agent is generic/unrecognized, and 
                 'empty' if no user agent string is provided.
-                - 'user_agent_age' (int or str): Approximate age of the 
-                user agent in years, or 'current' if undetermined.
+                - 'user_agent_age' (int or None): Years since the 
+                browser major version was released, or None if the 
+                version is not in the release table.
         """
         if not user_agent_string:
             return {'status': 'empty'}
 
         try:
-            user_agent = user_agents.parse(user_agent_string)
+            fast_match = (
+                self.fast_path.match(user_agent_string)
+                if self.fast_path is not None else None
+            )
+            if fast_match is not None:
+                self.metrics.increment("user_agent_fast_path", result="hit")
+                browser, browser_version, os, os_version, device = fast_match
+            else:
+                self.metrics.increment("user_agent_fast_path", result="miss")
+                user_agent = user_agents.parse(user_agent_string)
+                browser = user_agent.browser.family
+                browser_version = user_agent.browser.version
+                os = user_agent.os.family
+                os_version = user_agent.os.version_string
+                device = user_agent.device.family
             details = {
-                'browser': user_agent.browser.family,
-                'browser_version': ".".join(
-                    map(str, user_agent.browser.version)
-                ),
-                'os': user_agent.os.family,
-                'os_version': user_agent.os.version_string,
-                'device': user_agent.device.family,
+                'browser': browser,
+                'browser_version': ".".join(map(str, browser_version)),
+                'os': os,
+                'os_version': os_version,
+                'device': device,
                 'status': 'valid'
             }
-            current_year = datetime.now().year
-            major_version = (
-                int(user_agent.browser.version[0])
-                if user_agent.browser.version else 0
+            year = release_year(
+                browser, int(browser_version[0]) if browser_version else None
+            )
+            details['user_agent_age'] = (
+                None if year is None else self.current_year - year
             )
-            age = current_year - major_version
-            details['user_agent_age'] = age if age > 0 else 'current'
 
             if (
                 details['browser'] == 'Other'
@@ -86,15 +174,74 @@ class UserAgentAnalysis:
             
             return details
         except Exception as e:
-            print(f"Error parsing user agent: {e}")
+            logger.warning(f"Error parsing user agent: {e}")
             return {'status': 'invalid'}
 
-    @cached(ttl=3600, cache=SimpleMemoryCache)
+    def parse_user_agents(self, user_agent_strings, as_of=None, 
+                          stale_after=2):
+        """Parses a batch of user agent strings into a columnar frame.
+
+        Duplicate strings are parsed once per batch, and every distinct 
+        string is parsed at most once per instance through a bounded 
+        LRU memo, so the cost scales with the number of distinct user 
+        agents rather than with the number of events. Status, age and 
+        the validity/staleness flags are then computed over the whole 
+        columns by ``score_user_agents``.
+
+        Args:
+            user_agent_strings (iterable of str): User agent strings, 
+                e.g. a column of the ThreatMetrix event frame. Missing 
+                values are reported with status 'empty'.
+            as_of (datetime, optional): Reference date for the age 
+                (default is now).
+            stale_after (int, optional): Age in years from which a user 
+                agent is flagged as stale (default is 2).
+
+        Returns:
+            pandas.DataFrame: One row per input string, in input order, 
+            with the columns of ``PARSED_COLUMNS``. Fields that 
+            ``parse_user_agent`` does not return for a string (e.g. for 
+            empty ones) are missing values.
+        """
+        codes, uniques = pd.factorize(
+            pd.Series(user_agent_strings, dtype=object)
+        )
+        with self.metrics.timer("user_agent_parse"):
+            parsed = [self._parse_memo(ua) for ua in uniques]
+        parsed.append(self._parse_memo(None))
+        self.metrics.increment("user_agents_parsed", len(codes))
+        self.metrics.increment("user_agents_distinct", len(uniques))
+
+        columns = {}
+        for column in ('browser', 'browser_version', 'os', 'os_version',
+                       'device'):
+            values = pd.Series([details.get(column) for details in parsed])
+            values = values.astype(
+                'string' if column.endswith('_version') else 'category'
+            )
+            # Code -1 (missing string) selects the appended 'empty' entry.
+            columns[column] = values.take(codes).reset_index(drop=True)
+        frame = pd.DataFrame(columns)
+        # Strings the parser failed on have no browser either; their
+        # 'invalid' status tells them apart from empty ones.
+        statuses = pd.Series([details['status'] for details in parsed])
+        scores = score_user_agents(
+            frame.assign(status=statuses.take(codes).reset_index(drop=True)),
+            as_of, stale_after
+        )
+        return pd.concat([frame, scores], axis=1)[list(self.PARSED_COLUMNS)]
+
     async def enrich_with_virus_total(self, session, user_agent, retries=3, 
                                       backoff_factor=1):
         """Fetches enrichment data from VirusTotal for a given user 
            agent asynchronously.
 
+        Requests go through ``_fetch_json``, with the same status 
+        handling, retries and ``Retry-After`` pauses as the IP lookups, 
+        and are charged to the 'virustotal' quota of ``self.scheduler``. 
+        Results are served from and stored in ``self.cache`` under 
+        ``CACHE_PROVIDER``, keyed by the user agent string.
+
         Args:
             session (aiohttp.ClientSession): aiohttp session for making 
             HTTP requests.
@@ -109,73 +256,69 @@ class UserAgentAnalysis:
             dict: VirusTotal data for the user agent, or an empty dict 
             if request fails.
         """
-        url = f"https://www.virustotal.com/api/v3/search?query={user_agent}"
-        headers = {"x-apikey": self.virustotal_api_key}
-        
-        for attempt in range(retries):
-            try:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        logger.info(
-                            f"Successfully fetched VirusTotal data for user " 
-                            f"agent: {user_agent}"
-                            )
-                        return await response.json()
-                    elif response.status in [429, 500, 502, 503, 504]:
-                        logger.warning(
-                            f"Attempt {attempt+1}: Error {response.status}, "
-                            f"retrying after backoff for user agent: "
-                            f"{user_agent}"
-                            )
-                        await asyncio.sleep(backoff_factor * (2 ** attempt))
-                    else:
-                        logger.error(
-                            f"Error {response.status}: Failed to fetch "
-                            f"VirusTotal data for user agent: {user_agent}"
-                            )
-                        return {}
-            except aiohttp.ClientError as e:
-                logger.error(
-                    f"Network error while fetching VirusTotal data for user "
-                    f"agent: {user_agent}: {e}"
-                    )
-                await asyncio.sleep(backoff_factor * (2 ** attempt))
-
-        logger.error(
-            f"Failed to fetch VirusTotal data for user agent: {user_agent} "
-            f"after {retries} attempts."
-            )
-        return {}
+        return await self._fetch_json(
+            session, "virustotal", self.VIRUSTOTAL_SEARCH_URL,
+            user_agent, retries, backoff_factor,
+            cache_provider=self.CACHE_PROVIDER,
+            params={"query": user_agent},
+            headers={"x-apikey": self.virustotal_api_key}
+        )
 
-    async def process_user_agents(self, ua_list):
+    async def process_user_agents(self, ua_list, session=None):
         """Asynchronously processes a list of user agents and enriches 
            them with VirusTotal data.
 
+        Each distinct user agent is parsed and looked up once; 
+        duplicates share the result. Lookups are streamed through 
+        ``self.scheduler``, so only a bounded number are scheduled at a 
+        time and the VirusTotal quota is respected.
+
         Args:
             ua_list (list): List of user agent strings.
+            session (aiohttp.ClientSession, optional): Session to reuse. 
+            A pooled session is created for the run when omitted.
 
         Returns:
             list[dict]: List of dictionaries containing parsed user 
             agent details and enrichment data from VirusTotal.
         """
-        tasks = []
-        async with aiohttp.ClientSession() as session:
-            for ua in ua_list:
-                parsed_ua = self.parse_user_agent(ua)
-                tasks.append(self.enrich_with_virus_total(session, ua))
-            
-            virus_total_data = await asyncio.gather(*tasks)
-        
-        # Define parsed_user_agents separately to align with the zip operation in the return
-        parsed_user_agents = [self.parse_user_agent(ua) for ua in ua_list]
-        
+        if session is None:
+            async with self.create_session() as session:
+                return await self.process_user_agents(ua_list, session)
+
+        async def enrich(user_agent):
+            return user_agent, await self.enrich_with_virus_total(
+                session, user_agent
+            )
+
+        distinct = list(dict.fromkeys(ua_list))
+        vt_by_ua = {
+            user_agent: data async for user_agent, data
+            in self.scheduler.stream(distinct, enrich)
+        }
+
+        with self.metrics.timer("user_agent_parse"):
+            parsed_by_ua = {ua: self._parse_memo(ua) for ua in distinct}
+
         return [
-            {**parsed_ua, 'virustotal': vt_data}
-            for parsed_ua, vt_data in zip(parsed_user_agents, virus_total_data)
+            {**parsed_by_ua[ua], 'virustotal': vt_by_ua[ua]}
+            for ua in ua_list
         ]
         
-    def run_processing(self, ua_list):
+    def run_processing(self, ua_list, prometheus_path=None):
         """Runs asynchronous processing of user agents in an event 
            loop.
+
+        The metrics of the run are reset first; when it finishes, their 
+        JSON summary is logged and kept in ``self.last_metrics``.
+
+        Args:
+            ua_list (list): List of user agent strings.
+            prometheus_path (str, optional): File the metrics are also 
+                written to in Prometheus text format.
         """
-        return asyncio.run(self.process_user_agents(ua_list))
+        self.metrics.reset()
+        try:
+            return asyncio.run(self.process_user_agents(ua_list))
+        finally:
+            self.last_metrics = self.metrics.export(logger, prometheus_path)
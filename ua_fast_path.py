@@ -0,0 +1,161 @@
+import re
+from collections import namedtuple
+
+FastPathRule = namedtuple("FastPathRule", ["name", "pattern", "build"])
+FastPathRule.__doc__ = """A user agent shape recognised without ua-parser.
+
+Args:
+    name (str): Identifier of the rule, e.g. 'chrome_windows'.
+    pattern (str): Regular expression matching the whole user agent. Its
+        groups must be unnamed.
+    build (callable): Called with the tuple of the pattern's groups;
+        returns ``(browser, browser_version, os, os_version, device)``
+        where ``browser_version`` is a tuple of ints, exactly as
+        ``user_agents.parse`` would report them.
+"""
+
+# Windows NT kernel versions as reported by ua-parser.
+WINDOWS_VERSIONS = {'10.0': '10', '6.3': '8.1', '6.2': '8', '6.1': '7'}
+
+_VERSION3 = r"(\d+)\.(\d+)\.(\d+)\.\d+"
+_WINDOWS = r"\(Windows NT (10\.0|6\.[123]); (?:Win64; x64|WOW64)\)"
+_MAC = r"\(Macintosh; Intel Mac OS X (\d+)[_.](\d+)(?:[_.](\d+))?"
+_WEBKIT = r"AppleWebKit/537\.36 \(KHTML, like Gecko\)"
+_IOS_WEBKIT = r"AppleWebKit/605\.1\.15 \(KHTML, like Gecko\)"
+
+
+def _ints(*groups):
+    return tuple(int(group) for group in groups if group is not None)
+
+
+def _dotted(*groups):
+    return ".".join(group for group in groups if group is not None)
+
+
+DEFAULT_RULES = (
+    FastPathRule(
+        'edge_windows',
+        rf"Mozilla/5\.0 {_WINDOWS} {_WEBKIT} Chrome/[\d.]+ Safari/537\.36 "
+        rf"Edg/{_VERSION3}",
+        lambda g: ('Edge', _ints(*g[1:4]), 'Windows',
+                   WINDOWS_VERSIONS[g[0]], 'Other')
+    ),
+    FastPathRule(
+        'chrome_windows',
+        rf"Mozilla/5\.0 {_WINDOWS} {_WEBKIT} Chrome/{_VERSION3} "
+        r"Safari/537\.36",
+        lambda g: ('Chrome', _ints(*g[1:4]), 'Windows',
+                   WINDOWS_VERSIONS[g[0]], 'Other')
+    ),
+    FastPathRule(
+        'chrome_mac',
+        rf"Mozilla/5\.0 {_MAC}\) {_WEBKIT} Chrome/{_VERSION3} "
+        r"Safari/537\.36",
+        lambda g: ('Chrome', _ints(*g[3:6]), 'Mac OS X',
+                   _dotted(*g[0:3]), 'Mac')
+    ),
+    FastPathRule(
+        'safari_mac',
+        rf"Mozilla/5\.0 {_MAC}\) AppleWebKit/605\.1\.15 "
+        r"\(KHTML, like Gecko\) Version/(\d+)\.(\d+)(?:\.(\d+))? "
+        r"Safari/605\.1\.15",
+        lambda g: ('Safari', _ints(*g[3:6]), 'Mac OS X',
+                   _dotted(*g[0:3]), 'Mac')
+    ),
+    FastPathRule(
+        'firefox_windows',
+        rf"Mozilla/5\.0 \(Windows NT (10\.0|6\.[123]); "
+        r"(?:Win64; x64|WOW64); rv:[\d.]+\) Gecko/20100101 "
+        r"Firefox/(\d+)\.(\d+)",
+        lambda g: ('Firefox', _ints(*g[1:3]), 'Windows',
+                   WINDOWS_VERSIONS[g[0]], 'Other')
+    ),
+    FastPathRule(
+        'firefox_mac',
+        rf"Mozilla/5\.0 {_MAC}; rv:[\d.]+\) Gecko/20100101 "
+        r"Firefox/(\d+)\.(\d+)",
+        lambda g: ('Firefox', _ints(*g[3:5]), 'Mac OS X',
+                   _dotted(*g[0:3]), 'Mac')
+    ),
+    FastPathRule(
+        'safari_iphone',
+        r"Mozilla/5\.0 \(iPhone; CPU iPhone OS (\d+)_(\d+)(?:_(\d+))? "
+        rf"like Mac OS X\) {_IOS_WEBKIT} Version/(\d+)\.(\d+)(?:\.(\d+))? "
+        r"Mobile/\w+ Safari/604\.1",
+        lambda g: ('Mobile Safari', _ints(*g[3:6]), 'iOS',
+                   _dotted(*g[0:3]), 'iPhone')
+    ),
+    FastPathRule(
+        'safari_ipad',
+        r"Mozilla/5\.0 \(iPad; CPU OS (\d+)_(\d+)(?:_(\d+))? "
+        rf"like Mac OS X\) {_IOS_WEBKIT} Version/(\d+)\.(\d+)(?:\.(\d+))? "
+        r"Mobile/\w+ Safari/604\.1",
+        lambda g: ('Mobile Safari', _ints(*g[3:6]), 'iOS',
+                   _dotted(*g[0:3]), 'iPad')
+    ),
+    FastPathRule(
+        'chrome_iphone',
+        r"Mozilla/5\.0 \(iPhone; CPU iPhone OS (\d+)_(\d+)(?:_(\d+))? "
+        rf"like Mac OS X\) {_IOS_WEBKIT} CriOS/{_VERSION3} "
+        r"Mobile/\w+ Safari/604\.1",
+        lambda g: ('Chrome Mobile iOS', _ints(*g[3:6]), 'iOS',
+                   _dotted(*g[0:3]), 'iPhone')
+    ),
+    # Chrome on Android sends a reduced user agent with a fixed 'K'
+    # model since version 110; full model strings need ua-parser's
+    # device table and take the slow path.
+    FastPathRule(
+        'chrome_android_reduced',
+        rf"Mozilla/5\.0 \(Linux; Android (\d+); K\) {_WEBKIT} "
+        rf"Chrome/{_VERSION3} Mobile Safari/537\.36",
+        lambda g: ('Chrome Mobile', _ints(*g[1:4]), 'Android', g[0], 'K')
+    ),
+)
+
+
+class UserAgentFastPath:
+    """Classifies common user agent shapes with one combined regex.
+
+    All rules are joined into a single alternation, so classifying a
+    string costs one regex match instead of ua-parser's cascade of
+    several hundred patterns. Strings no rule matches return None and
+    must go through the full parser.
+
+    Args:
+        rules (sequence of FastPathRule, optional): Shapes to recognise,
+            tried in order (default is ``DEFAULT_RULES``). Extra rules,
+            e.g. for an in-house mobile app, can be appended.
+    """
+
+    def __init__(self, rules=DEFAULT_RULES):
+        self.rules = tuple(rules)
+        alternatives = []
+        self._rule_groups = {}
+        offset = 1
+        for index, rule in enumerate(self.rules):
+            n_groups = re.compile(rule.pattern).groups
+            alternatives.append(f"(?P<r{index}>{rule.pattern})")
+            # Skip the group wrapping the alternative itself.
+            self._rule_groups[f"r{index}"] = (
+                rule, offset + 1, offset + 1 + n_groups
+            )
+            offset += 1 + n_groups
+        self._regex = re.compile("|".join(alternatives))
+
+    def match(self, user_agent_string):
+        """Classifies a user agent string.
+
+        Args:
+            user_agent_string (str): The user agent to classify.
+
+        Returns:
+            tuple or None: ``(browser, browser_version, os, os_version,
+            device)`` as ``user_agents.parse`` would report them, or None
+            when no rule matches.
+        """
+        match = self._regex.fullmatch(user_agent_string)
+        if match is None:
+            return None
+        rule, first, stop = self._rule_groups[match.lastgroup]
+        groups = match.groups()[first - 1:stop - 1]
+        return rule.build(groups)
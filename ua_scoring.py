@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+# Release year of each major version, as (first major, last major, year)
+# spans per browser family. Families reported by ua-parser that share a
+# release train (e.g. Chrome Mobile) reuse the same spans.
+_CHROME_RELEASES = (
+    (1, 1, 2008), (2, 3, 2009), (4, 8, 2010), (9, 16, 2011),
+    (17, 23, 2012), (24, 31, 2013), (32, 39, 2014), (40, 47, 2015),
+    (48, 55, 2016), (56, 63, 2017), (64, 71, 2018), (72, 79, 2019),
+    (80, 87, 2020), (88, 96, 2021), (97, 108, 2022), (109, 120, 2023),
+    (121, 131, 2024), (132, 143, 2025), (144, 155, 2026)
+)
+_FIREFOX_RELEASES = (
+    (1, 1, 2004), (2, 2, 2006), (3, 3, 2008), (4, 9, 2011),
+    (10, 17, 2012), (18, 26, 2013), (27, 34, 2014), (35, 43, 2015),
+    (44, 50, 2016), (51, 57, 2017), (58, 64, 2018), (65, 71, 2019),
+    (72, 84, 2020), (85, 96, 2021), (97, 108, 2022), (109, 121, 2023),
+    (122, 133, 2024), (134, 146, 2025), (147, 159, 2026)
+)
+_SAFARI_RELEASES = (
+    (3, 3, 2007), (4, 4, 2009), (5, 5, 2010), (6, 6, 2012),
+    (7, 7, 2013), (8, 8, 2014), (9, 9, 2015), (10, 10, 2016),
+    (11, 11, 2017), (12, 12, 2018), (13, 13, 2019), (14, 14, 2020),
+    (15, 15, 2021), (16, 16, 2022), (17, 17, 2023), (18, 18, 2024),
+    (26, 26, 2025)
+)
+# EdgeHTML releases, then the Chromium-based Edge that follows Chrome's
+# major versions from 79 on.
+_EDGE_RELEASES = (
+    (12, 13, 2015), (14, 14, 2016), (15, 16, 2017), (17, 18, 2018),
+    (79, 79, 2020)
+) + tuple(span for span in _CHROME_RELEASES if span[0] >= 80)
+
+RELEASE_SPANS = {
+    'Chrome': _CHROME_RELEASES,
+    'Chrome Mobile': _CHROME_RELEASES,
+    'Chrome Mobile iOS': _CHROME_RELEASES,
+    'Chrome Mobile WebView': _CHROME_RELEASES,
+    'Edge': _EDGE_RELEASES,
+    'Edge Mobile': _EDGE_RELEASES,
+    'Firefox': _FIREFOX_RELEASES,
+    'Firefox Mobile': _FIREFOX_RELEASES,
+    'Firefox iOS': _FIREFOX_RELEASES,
+    'Safari': _SAFARI_RELEASES,
+    'Mobile Safari': _SAFARI_RELEASES,
+}
+
+
+def _build_release_years(spans_by_family):
+    families, majors, years = [], [], []
+    for family, spans in spans_by_family.items():
+        for first, last, year in spans:
+            for major in range(first, last + 1):
+                families.append(family)
+                majors.append(major)
+                years.append(year)
+    return pd.Series(
+        years, index=pd.MultiIndex.from_arrays([families, majors]),
+        dtype='int64'
+    )
+
+
+# Release year keyed by (browser family, major version).
+RELEASE_YEARS = _build_release_years(RELEASE_SPANS)
+_RELEASE_YEARS_BY_KEY = RELEASE_YEARS.to_dict()
+
+
+def release_year(browser, major_version):
+    """Returns the release year of one browser major version, or None."""
+    return _RELEASE_YEARS_BY_KEY.get((browser, major_version))
+
+
+def score_user_agents(parsed, as_of=None, stale_after=2,
+                      release_years=RELEASE_YEARS):
+    """Derives age and validity columns from parsed user agents.
+
+    Every figure is computed over whole columns. Release years are
+    resolved once per distinct (browser, version) pair, of which a day
+    of traffic has a few thousand, and broadcast to the rows with a
+    NumPy take; the flags are vectorized comparisons.
+
+    Args:
+        parsed (pandas.DataFrame): Parsed user agents with 'browser',
+            'browser_version', 'os' and 'device' columns, e.g. from
+            ``UserAgentAnalysis.parse_user_agents``. Rows whose browser
+            is missing are treated as empty user agents, unless an
+            optional 'status' column marks them 'invalid' (strings the
+            parser failed on).
+        as_of (datetime, optional): Reference date for the age (default
+            is now).
+        stale_after (int, optional): Age in years from which a user
+            agent counts as stale (default is 2).
+        release_years (pandas.Series, optional): Release year indexed by
+            (browser family, major version) (default is
+            ``RELEASE_YEARS``).
+
+    Returns:
+        pandas.DataFrame: Columns indexed like ``parsed``:
+            - 'status' (category): 'valid', 'invalid' when browser, OS
+              and device are all 'Other', or 'empty'.
+            - 'release_year' (Int64): Release year of the browser major
+              version, missing when it is not in the table.
+            - 'user_agent_age' (Int64): Whole years between the release
+              year and ``as_of``.
+            - 'is_valid' (bool): Whether the status is 'valid'.
+            - 'is_stale' (boolean): Whether the age reaches
+              ``stale_after``; missing when the age is unknown.
+    """
+    as_of_year = (as_of or datetime.now()).year
+    browser_codes, browsers = pd.factorize(parsed['browser'])
+    version_codes, versions = pd.factorize(parsed['browser_version'])
+    majors = pd.to_numeric(
+        pd.Series(versions, dtype='string').str.split('.', n=1).str[0],
+        errors='coerce'
+    ).astype('Int64')
+
+    # Code -1 marks a missing browser or version; shift codes so every
+    # (browser, version) pair maps to one non-negative integer.
+    n_versions = len(versions) + 1
+    pair_codes, pairs = pd.factorize(
+        (browser_codes.astype(np.int64) + 1) * n_versions + version_codes + 1
+    )
+    lookup = (
+        _RELEASE_YEARS_BY_KEY if release_years is RELEASE_YEARS
+        else release_years.to_dict()
+    )
+    pair_years = np.zeros(len(pairs) + 1, dtype=np.int64)
+    for i, pair in enumerate(pairs):
+        browser_code, version_code = divmod(int(pair), n_versions)
+        if browser_code and version_code:
+            major = majors[version_code - 1]
+            if major is not pd.NA:
+                pair_years[i] = lookup.get(
+                    (browsers[browser_code - 1], int(major)), 0
+                )
+    years = pair_years[pair_codes]
+    release_year_column = pd.arrays.IntegerArray(years, years == 0)
+
+    empty = browser_codes < 0
+    invalid = (
+        parsed['browser'].eq('Other').to_numpy(dtype=bool, na_value=False)
+        & parsed['os'].eq('Other').to_numpy(dtype=bool, na_value=False)
+        & parsed['device'].eq('Other').to_numpy(dtype=bool, na_value=False)
+    )
+    if 'status' in parsed:
+        failed = parsed['status'].eq('invalid').to_numpy(
+            dtype=bool, na_value=False
+        )
+        empty &= ~failed
+        invalid |= failed
+    status = np.where(empty, 'empty', np.where(invalid, 'invalid', 'valid'))
+    age = as_of_year - release_year_column
+
+    return pd.DataFrame({
+        'status': pd.Categorical(
+            status, categories=['valid', 'invalid', 'empty']
+        ),
+        'release_year': release_year_column,
+        'user_agent_age': age,
+        'is_valid': status == 'valid',
+        'is_stale': age >= stale_after,
+    }, index=parsed.index)
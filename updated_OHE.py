@@ -1,56 +1,25 @@
-import json
+import logging
+import argparse
+from tag_parser import add_vocabulary_arguments, tag_encoder_for
 
-# Preprocess the column to parse strings into dictionaries
-def preprocess_column(row):
-    """
-    Parses each row in the column, cleaning and converting items into dictionaries.
-    Args:
-        row (str): The input row string.
-    Returns:
-        list: A list of parsed dictionaries or an empty list if invalid.
-    """
-    if pd.isna(row):
-        return []  # Return empty list for NaN values
+logging.basicConfig(level=logging.INFO)
 
-    cleaned_row = []
-    for item in row.split(','):  # Split by commas
-        try:
-            # Replace single quotes with double quotes and strip whitespace
-            cleaned_item = item.strip().replace("'", '"')
-            # Parse as a dictionary
-            parsed_dict = json.loads(cleaned_item)
-            cleaned_row.append(parsed_dict)
-        except json.JSONDecodeError:
-            pass  # Skip invalid entries
-    return cleaned_row
+# Vocabulary file and settings, e.g. `%run -i updated_OHE.py --fit --vocabulary
+# vocab.json` to train and `--vocabulary vocab.json` to score with the same
+# columns; by default every tag gets its own column
+args = add_vocabulary_arguments(argparse.ArgumentParser(
+    description="One-hot encode the dictionary keys in column_name of filtered_df."
+)).parse_args()
 
-# Step 1: Apply preprocessing function to each row
-filtered_df['parsed_reasons'] = filtered_df[column_name].apply(preprocess_column)
+# Step 1: Learn and save the vocabulary when training, load it when scoring
+tag_encoder = tag_encoder_for(
+    filtered_df, [column_name], args.vocabulary, fit=args.fit,
+    min_frequency=args.min_frequency, other_bucket=args.other_bucket
+)
 
-# Step 2: Extract all unique keys from the cleaned dictionaries
-def extract_keys_from_preprocessed(column):
-    """
-    Extracts unique keys from lists of dictionaries in the column.
-    Args:
-        column (pd.Series): The input column with lists of dictionaries.
-    Returns:
-        set: A set of unique keys.
-    """
-    keys = set()
-    for row in column:
-        for dictionary in row:  # Iterate over parsed dictionaries
-            if isinstance(dictionary, dict):  # Ensure it's a dictionary
-                keys.update(dictionary.keys())  # Add keys to the set
-    return keys
-
-# Extract unique keys
-unique_keys = extract_keys_from_preprocessed(filtered_df['parsed_reasons'])
-
-# Step 3: Create one-hot encoded columns for each key
-for key in unique_keys:
-    filtered_df[f"{column_name}_{key}"] = filtered_df['parsed_reasons'].apply(
-        lambda x: 1 if any(key in dictionary for dictionary in x if isinstance(dictionary, dict)) else 0
-    )
+# Step 2: Parse each distinct row once and one-hot encode the dictionary
+# keys as sparse "<column>_<key>" columns in a single join
+filtered_df = filtered_df.join(tag_encoder.transform_frame(filtered_df))
 
 # Display the resulting DataFrame
 print(filtered_df)
@@ -3,8 +3,10 @@ import os
 import json
 from datetime import datetime
 from rss_collector.utils import get_proxy_settings
-from rss_collector.proxy import fetch_feed_content_with_proxy
 from rss_collector.feed_parser import retry_with_backoff, parse_feed
+from feed_fetcher import CurlFeedFetcher
+from feed_state import FeedState
+from article_store import ArticleStore
 
 def load_feeds_from_yaml(file_path="feeds.yaml"):
     """
@@ -33,12 +35,31 @@ def process_feeds_from_yaml(file_path="feeds.yaml"):
     feed_urls = load_feeds_from_yaml(file_path)
     process_feeds(feed_urls)  # Use the existing process_feeds function
 
-def process_feeds(feed_urls):
+def process_feeds(feed_urls, max_workers=8, timeout=30):
     """
-    Process multiple RSS feeds and save metadata for all feeds into a single JSON file.
+    Process multiple RSS feeds, append new articles to the article store and save run metadata into a JSON file.
+
+    Feeds are fetched concurrently through one proxy-authenticated curl
+    process (see CurlFeedFetcher), and each feed is parsed as soon as it
+    arrives while the others are still downloading. Per-feed latency and
+    failures are saved with the metadata under "fetch_stats".
+
+    Feeds are requested conditionally with the ETag/Last-Modified kept in
+    rss_metadata/feed_state.json. Feeds answering 304 Not Modified, or
+    whose body hashes the same as last time, are not parsed again; their
+    articles are already in the article store.
+
+    Articles are appended to rss_metadata/articles.sqlite, deduplicated
+    by URL, and the run's JSON file lists only the articles that were new
+    in this run, so storage grows with new articles rather than with the
+    total size of the feeds.
 
     Args:
         feed_urls (list): List of RSS feed URLs.
+        max_workers (int, optional): Maximum number of feeds fetched at
+            the same time (default is 8).
+        timeout (int or float, optional): Maximum seconds per feed
+            (default is 30).
 
     Returns:
         None
@@ -49,7 +70,7 @@ def process_feeds(feed_urls):
     app_proxy = proxy_settings["app_proxy"]
     username = proxy_settings["username"]
     password = proxy_settings["password"]
-    print(f"Retrieved proxy settings: {proxy_settings}")
+    print(f"Retrieved proxy settings for proxy: {app_proxy}")
 
     # Directory for storing metadata
     output_dir = "rss_metadata"
@@ -66,26 +87,60 @@ def process_feeds(feed_urls):
         "articles": []
     }
 
-    for feed_url in feed_urls:
+    feed_state = FeedState(os.path.join(output_dir, "feed_state.json"))
+    article_store = ArticleStore(os.path.join(output_dir, "articles.sqlite"))
+    unchanged = 0
+
+    fetcher = CurlFeedFetcher(
+        app_proxy, username, password, max_workers=max_workers,
+        timeout=timeout
+    )
+    print(f"Fetching {len(feed_urls)} feeds with up to {max_workers} workers")
+    for result in fetcher.fetch(feed_urls, feed_state.validators(feed_urls)):
+        feed_url, feed_content = result.url, result.content
         print(f"Processing feed: {feed_url}")
-        feed_content = fetch_feed_content_with_proxy(feed_url, app_proxy, username, password)
-        if feed_content:
+        if result.status == 304 or (
+            feed_content and feed_state.is_unchanged(feed_url, feed_content)
+        ):
+            print(f"Feed unchanged since last run: {feed_url}")
+            feed_state.update(feed_url, result.etag, result.last_modified)
+            unchanged += 1
+        elif feed_content:
             print(f"Fetched content for feed: {feed_url}")
             try:
                 feed_data = parse_feed(feed_content)
                 print(f"Parsed feed: {feed_url}")
+                feed_articles = []
                 for entry in feed_data.get("entries", []):
                     article_metadata = {
                         "title": getattr(entry, "title", "No Title"),
                         "url": getattr(entry, "link", "No URL"),
                         "published_date": getattr(entry, "published", "No Date")
                     }
-                    all_metadata["articles"].append(article_metadata)
-                    print(f"Article metadata from {feed_url} added: {article_metadata}")
+                    feed_articles.append(article_metadata)
+                new_articles = article_store.add(
+                    feed_articles, feed_url=feed_url, first_seen=timestamp
+                )
+                all_metadata["articles"].extend(new_articles)
+                print(f"Stored {len(new_articles)} new of {len(feed_articles)} articles from {feed_url}")
+                feed_state.update(
+                    feed_url, result.etag, result.last_modified, feed_content
+                )
             except Exception as e:
                 print(f"Error parsing feed {feed_url}: {e}")
         else:
-            print(f"Failed to fetch feed: {feed_url}")
+            print(f"Failed to fetch feed: {feed_url}: {result.error}")
+    feed_state.save()
+    article_store.close()
+
+    fetch_stats = fetcher.stats()
+    fetch_stats["unchanged"] = unchanged
+    all_metadata["fetch_stats"] = fetch_stats
+    print(
+        f"Fetched {len(feed_urls) - fetch_stats['failed']}/{len(feed_urls)} "
+        f"feeds, {unchanged} unchanged "
+        f"(p95 latency {fetch_stats['latency'].get('p95', 0):.2f}s)"
+    )
 
     # Save all metadata to a single JSON file
     with open(metadata_file, "w") as f: